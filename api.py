@@ -4,6 +4,7 @@ load_dotenv("conf/.env")
 
 import atexit
 import json
+import logging
 import os
 import signal
 import traceback
@@ -20,11 +21,14 @@ from flask import Flask, request, jsonify, Response
 from biz.gitlab.webhook_handler import slugify_url
 from biz.queue.worker import handle_merge_request_event, handle_push_event, handle_github_pull_request_event, \
     handle_github_push_event
-from biz.svn.svn_worker import handle_svn_changes, handle_multiple_svn_repositories
+from biz.svn.svn_worker import handle_svn_changes, handle_multiple_svn_repositories, acquire_svn_repo_lock, \
+    release_svn_repo_lock
 from biz.service.review_service import ReviewService
 from biz.utils.im import notifier
 from biz.utils.log import logger
-from biz.utils.queue import handle_queue
+from biz.utils.payload_spool import PayloadSpool
+from biz.utils.queue import handle_queue, shutdown_queue, QueueFullError, PRIORITY_MERGE_REQUEST, PRIORITY_PUSH, \
+    PRIORITY_SVN_MANUAL, PRIORITY_SVN_SCHEDULED
 from biz.utils.reporter import Reporter
 
 from biz.utils.config_checker import check_config
@@ -143,6 +147,13 @@ def health_check():
     })
 
 
+@api_app.route('/review/cache/stats', methods=['GET'])
+def review_cache_stats():
+    """审查结果缓存的命中统计"""
+    from biz.utils.review_cache import ReviewCache
+    return jsonify(ReviewCache.get_stats())
+
+
 @api_app.route('/review/daily_report', methods=['GET'])
 def daily_report():
     # 获取当前日期0点和23点59分59秒的时间戳
@@ -235,7 +246,7 @@ def setup_scheduler():
                                     
                                     # 为每个仓库创建独立的定时任务
                                     scheduler.add_job(
-                                        lambda repo=repo_config: trigger_single_svn_repo_check(repo),
+                                        lambda repo=repo_config: enqueue_scheduled_svn_check(trigger_single_svn_repo_check, repo),
                                         trigger=CronTrigger(
                                             minute=svn_minute,
                                             hour=svn_hour,
@@ -264,7 +275,8 @@ def setup_scheduler():
                     svn_minute, svn_hour, svn_day, svn_month, svn_day_of_week = svn_cron_parts
                     
                     scheduler.add_job(
-                        trigger_svn_check,
+                        enqueue_scheduled_svn_check,
+                        args=[trigger_svn_check],
                         trigger=CronTrigger(
                             minute=svn_minute,
                             hour=svn_hour,
@@ -298,27 +310,53 @@ def setup_scheduler():
         logger.error(f"❌ Traceback: {traceback.format_exc()}")
 
 
+def log_webhook_payload(raw_body: bytes):
+    """完整的payload只在DEBUG级别输出，直接使用原始请求体，不再重新序列化"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f'Payload: {raw_body.decode("utf-8", errors="replace")}')
+
+
+def enqueue_webhook(function: callable, raw_body: bytes, *args, priority: str = PRIORITY_PUSH):
+    """原始请求体写入暂存区，任务中只携带引用，由工作进程按需读取解析"""
+    payload_ref = PayloadSpool.save(raw_body)
+    try:
+        handle_queue(function, payload_ref, *args, priority=priority)
+    except Exception:
+        PayloadSpool.delete(payload_ref)
+        raise
+
+
 # 处理 GitLab Merge Request Webhook
 @api_app.route('/review/webhook', methods=['POST'])
 def handle_webhook():
     # 获取请求的JSON数据
     if request.is_json:
-        data = request.get_json()
+        # 原始请求体只读取一次：这里解析用于路由判断，队列任务中只携带暂存引用
+        raw_body = request.get_data(cache=False)
+        try:
+            data = json.loads(raw_body)
+        except ValueError:
+            data = None
         if not data:
             return jsonify({"error": "Invalid JSON"}), 400
 
         # 判断是GitLab还是GitHub的webhook
         webhook_source = request.headers.get('X-GitHub-Event')
 
-        if webhook_source:  # GitHub webhook
-            return handle_github_webhook(webhook_source, data)
-        else:  # GitLab webhook
-            return handle_gitlab_webhook(data)
+        try:
+            if webhook_source:  # GitHub webhook
+                return handle_github_webhook(webhook_source, data, raw_body)
+            else:  # GitLab webhook
+                return handle_gitlab_webhook(data, raw_body)
+        except QueueFullError as e:
+            # 本地任务队列已满，返回429让GitLab/GitHub稍后重试
+            logger.warning(f'Webhook任务入队失败: {e}')
+            return jsonify({'message': str(e)}), 429
     else:
         return jsonify({'message': 'Invalid data format'}), 400
 
 
-def handle_github_webhook(event_type, data):    # 获取GitHub配置
+def handle_github_webhook(event_type, data, raw_body: bytes):    # 获取GitHub配置
     github_token = get_env_with_default('GITHUB_ACCESS_TOKEN') or request.headers.get('X-GitHub-Token')
     if not github_token:
         return jsonify({'message': 'Missing GitHub access token'}), 400
@@ -326,19 +364,19 @@ def handle_github_webhook(event_type, data):    # 获取GitHub配置
     github_url = get_env_with_default('GITHUB_URL') or 'https://github.com'
     github_url_slug = slugify_url(github_url)
 
-    # 打印整个payload数据
-    logger.info(f'Received GitHub event: {event_type}')
-    logger.info(f'Payload: {json.dumps(data)}')
+    logger.info(f'Received GitHub event: {event_type}, payload size: {len(raw_body)} bytes')
+    log_webhook_payload(raw_body)
 
     if event_type == "pull_request":
         # 使用handle_queue进行异步处理
-        handle_queue(handle_github_pull_request_event, data, github_token, github_url, github_url_slug)
+        enqueue_webhook(handle_github_pull_request_event, raw_body, github_token, github_url, github_url_slug,
+                        priority=PRIORITY_MERGE_REQUEST)
         # 立马返回响应
         return jsonify(
             {'message': f'GitHub request received(event_type={event_type}), will process asynchronously.'}), 200
     elif event_type == "push":
         # 使用handle_queue进行异步处理
-        handle_queue(handle_github_push_event, data, github_token, github_url, github_url_slug)
+        enqueue_webhook(handle_github_push_event, raw_body, github_token, github_url, github_url_slug)
         # 立马返回响应
         return jsonify(
             {'message': f'GitHub request received(event_type={event_type}), will process asynchronously.'}), 200
@@ -348,7 +386,7 @@ def handle_github_webhook(event_type, data):    # 获取GitHub配置
         return jsonify(error_message), 400
 
 
-def handle_gitlab_webhook(data):
+def handle_gitlab_webhook(data, raw_body: bytes):
     object_kind = data.get("object_kind")    # 优先从请求头获取，如果没有，则从环境变量获取，如果没有，则从推送事件中获取
     gitlab_url = get_env_with_default('GITLAB_URL') or request.headers.get('X-Gitlab-Instance')
     if not gitlab_url:
@@ -370,21 +408,21 @@ def handle_gitlab_webhook(data):
 
     gitlab_url_slug = slugify_url(gitlab_url)
 
-    # 打印整个payload数据，或根据需求进行处理
-    logger.info(f'Received event: {object_kind}')
-    logger.info(f'Payload: {json.dumps(data)}')
+    logger.info(f'Received event: {object_kind}, payload size: {len(raw_body)} bytes')
+    log_webhook_payload(raw_body)
 
     # 处理Merge Request Hook
     if object_kind == "merge_request":
         # 创建一个新进程进行异步处理
-        handle_queue(handle_merge_request_event, data, gitlab_token, gitlab_url, gitlab_url_slug)
+        enqueue_webhook(handle_merge_request_event, raw_body, gitlab_token, gitlab_url, gitlab_url_slug,
+                        priority=PRIORITY_MERGE_REQUEST)
         # 立马返回响应
         return jsonify(
             {'message': f'Request received(object_kind={object_kind}), will process asynchronously.'}), 200
     elif object_kind == "push":
         # 创建一个新进程进行异步处理
         # TODO check if PUSH_REVIEW_ENABLED is needed here
-        handle_queue(handle_push_event, data, gitlab_token, gitlab_url, gitlab_url_slug)
+        enqueue_webhook(handle_push_event, raw_body, gitlab_token, gitlab_url, gitlab_url_slug)
         # 立马返回响应
         return jsonify(
             {'message': f'Request received(object_kind={object_kind}), will process asynchronously.'}), 200
@@ -417,11 +455,11 @@ def manual_svn_check():
         # 异步处理SVN检查
         if repo_name:
             # 检查特定仓库
-            handle_queue(trigger_specific_svn_repo, repo_name=repo_name, hours=hours)
+            handle_queue(trigger_specific_svn_repo, repo_name=repo_name, hours=hours, priority=PRIORITY_SVN_MANUAL)
             message = f'仓库 "{repo_name}" 的SVN检查已启动'
         else:
             # 检查所有仓库
-            handle_queue(trigger_svn_check, hours=hours)
+            handle_queue(trigger_svn_check, hours=hours, priority=PRIORITY_SVN_MANUAL)
             message = 'SVN检查已启动'
         
         # 准备响应消息
@@ -436,6 +474,9 @@ def manual_svn_check():
         import json
         json_str = json.dumps(response_data, ensure_ascii=False, indent=2)
         return Response(json_str, content_type='application/json; charset=utf-8'), 200
+    except QueueFullError as e:
+        logger.warning(f"手动触发SVN检查入队失败: {e}")
+        return jsonify({'message': str(e)}), 429
     except Exception as e:
         logger.error(f"手动触发SVN检查失败: {e}")
         error_message = f'手动触发SVN检查失败: {str(e)}'
@@ -454,36 +495,6 @@ def after_request(response):
     return response
 
 
-def acquire_svn_repo_lock(repo_name: str = "global"):
-    """为特定仓库获取互斥锁，成功返回文件对象，失败返回None（跨平台实现）"""
-    import os
-    import portalocker
-    
-    # 为每个仓库创建独立的锁文件
-    safe_repo_name = "".join(c for c in repo_name if c.isalnum() or c in ('-', '_')).lower()
-    lockfile_path = f"log/svn_check_{safe_repo_name}.lock"
-    
-    try:
-        os.makedirs(os.path.dirname(lockfile_path), exist_ok=True)
-        lockfile = open(lockfile_path, "w")
-        try:
-            portalocker.lock(lockfile, portalocker.LOCK_EX | portalocker.LOCK_NB)
-            return lockfile
-        except portalocker.exceptions.LockException:
-            lockfile.close()
-            return None
-    except Exception:
-        return None
-
-def release_svn_repo_lock(lockfile):
-    """释放SVN仓库互斥锁（跨平台实现）"""
-    import portalocker
-    try:
-        portalocker.unlock(lockfile)
-        lockfile.close()
-    except Exception:
-        pass
-
 def trigger_specific_svn_repo(repo_name: str, hours: int = None):
     """触发特定SVN仓库的检查（带仓库级互斥锁）"""
     lock = acquire_svn_repo_lock(repo_name)
@@ -543,8 +554,11 @@ def trigger_svn_check(hours: int = None):
             logger.debug(f"后10字符: {repr(svn_repositories_config[-10:])}")
             if "'" in svn_repositories_config and '"' not in svn_repositories_config:
                 logger.warning("⚠️ 检测到配置中使用了单引号，JSON要求使用双引号")
-            handle_multiple_svn_repositories(svn_repositories_config, hours, check_limit, "scheduled")
-            return
+            results = handle_multiple_svn_repositories(svn_repositories_config, hours, check_limit, "scheduled")
+            for result in results:
+                logger.info(f"仓库 {result['name']} 检查结果: {result['status']}，耗时 {result['duration']:.1f} 秒，"
+                            f"处理提交 {result.get('processed_count', 0)} 个。{result.get('message', '')}")
+            return results
         svn_remote_url = get_env_with_default('SVN_REMOTE_URL')
         svn_local_path = get_env_with_default('SVN_LOCAL_PATH')
         if not svn_remote_url or not svn_local_path:
@@ -562,6 +576,14 @@ def trigger_svn_check(hours: int = None):
         release_svn_repo_lock(lock)
 
 
+def enqueue_scheduled_svn_check(function: callable, *args):
+    """定时SVN检查进入低优先级通道，不抢占MR/Push审查的工作进程"""
+    try:
+        handle_queue(function, *args, priority=PRIORITY_SVN_SCHEDULED)
+    except QueueFullError as e:
+        logger.warning(f'定时SVN检查任务入队失败，等待下次调度: {e}')
+
+
 def trigger_single_svn_repo_check(repo_config: dict):
     """触发单个SVN仓库检查（带仓库级互斥锁）"""
     repo_name = repo_config.get('name', 'unknown')
@@ -662,6 +684,9 @@ def shutdown_background_tasks():
     # 关闭调度器
     if scheduler:
         scheduler.shutdown()
+
+    # 等待本地进程池中已入队的任务执行完成
+    shutdown_queue()
     
     # 等待后台线程结束
     for thread in background_threads:
@@ -727,8 +752,9 @@ def initialize_all_svn_repositories():
                             from biz.svn.svn_handler import SVNHandler
                             
                             # 创建SVN处理器并初始化工作副本
-                            svn_handler = SVNHandler(remote_url, local_path, username, password)
-                            svn_handler._prepare_working_copy()
+                            # 非远程模式下创建处理器时签出工作副本
+                            SVNHandler(remote_url, local_path, username, password,
+                                       remote_only=repo_config.get('remote_only'))
                             
                             logger.info(f"✅ 仓库 {repo_name} 初始化完成")
                             
@@ -759,8 +785,7 @@ def initialize_all_svn_repositories():
                     logger.info("初始化单SVN仓库...")
                     from biz.svn.svn_handler import SVNHandler
                     
-                    svn_handler = SVNHandler(svn_remote_url, svn_local_path, svn_username, svn_password)
-                    svn_handler._prepare_working_copy()
+                    SVNHandler(svn_remote_url, svn_local_path, svn_username, svn_password)
                     
                     logger.info("✅ 单SVN仓库初始化完成")
                     return True
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 """
-版本追踪定时清理任务
-Scheduled cleanup task for version tracking
+审查记录定时清理任务：将超过保留天数的版本追踪、MR、Push 记录归档后从数据库删除
+Scheduled cleanup task for version tracking and review history
+
+用法:
+    python biz/cmd/cleanup_versions.py                              # 启动定时任务（每天凌晨2点）
+    python biz/cmd/cleanup_versions.py --once                       # 立即执行一次
+    python biz/cmd/cleanup_versions.py --enable-incremental-vacuum  # 开启增量 VACUUM（只需执行一次）
 """
 
 import os
@@ -13,34 +18,36 @@ from datetime import datetime
 # 添加项目根目录到 Python 路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from biz.utils.version_tracker import VersionTracker
+from biz.utils.review_archive import ReviewArchive
 from biz.utils.default_config import get_env_int, get_env_bool
 from biz.utils.log import logger
 
 
 def cleanup_old_versions():
-    """清理旧版本记录"""
-    try:        # 从环境变量获取配置
-        retention_days = get_env_int('VERSION_TRACKING_RETENTION_DAYS')
-        
-        logger.info(f"开始清理 {retention_days} 天前的版本记录...")
+    """按保留策略归档并清理旧审查记录（版本追踪、MR、Push）"""
+    try:
+        logger.info(f"开始执行审查记录保留策略: 版本追踪保留 {get_env_int('VERSION_TRACKING_RETENTION_DAYS')} 天，"
+                    f"MR/Push 保留 {get_env_int('REVIEW_RETENTION_DAYS')} 天（0 表示永久保留）")
         
         # 执行清理
-        deleted_count = VersionTracker.cleanup_old_records(retention_days)
+        result = ReviewArchive.run()
+        archived_count = sum(result.get(table, 0) for table in ReviewArchive.TABLES)
         
-        if deleted_count > 0:
-            logger.info(f"成功清理了 {deleted_count} 条旧版本记录")
+        if archived_count > 0:
+            logger.info(f"成功归档并清理了 {archived_count} 条旧记录: {result}")
         else:
-            logger.info("没有需要清理的版本记录")
+            logger.info("没有需要清理的记录")
             
     except Exception as e:
-        logger.error(f"版本记录清理失败: {e}")
+        logger.error(f"审查记录清理失败: {e}")
 
 
 def run_scheduler():
-    """运行定时任务调度器"""    # 检查是否启用版本追踪
-    if not get_env_bool('VERSION_TRACKING_ENABLED'):
-        logger.info("版本追踪功能未启用，跳过定时清理任务")
+    """运行定时任务调度器"""
+    # 版本追踪和 MR/Push 记录都未配置保留天数时无需清理
+    if not (get_env_bool('VERSION_TRACKING_ENABLED') and get_env_int('VERSION_TRACKING_RETENTION_DAYS')) \
+            and not get_env_int('REVIEW_RETENTION_DAYS'):
+        logger.info("未配置审查记录保留天数，跳过定时清理任务")
         return
     
     # 设置定时任务
@@ -50,7 +57,7 @@ def run_scheduler():
     # 也可以设置为每周执行一次
     # schedule.every().sunday.at("02:00").do(cleanup_old_versions)
     
-    logger.info("版本追踪定时清理任务已启动，将在每天凌晨2点执行清理")
+    logger.info("审查记录定时清理任务已启动，将在每天凌晨2点执行清理")
     logger.info("按 Ctrl+C 停止定时任务")
     
     try:
@@ -66,6 +73,11 @@ if __name__ == '__main__':
     if len(sys.argv) > 1 and sys.argv[1] == '--once':
         # 执行一次性清理
         cleanup_old_versions()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--enable-incremental-vacuum':
+        # 一次性将数据库切换为增量 VACUUM 模式，之后每次清理都会回收空闲空间
+        logger.info("正在切换数据库为增量 VACUUM 模式（需要执行一次完整 VACUUM）...")
+        ReviewArchive.enable_incremental_vacuum()
+        logger.info("已开启增量 VACUUM")
     else:
         # 启动定时任务
         run_scheduler()
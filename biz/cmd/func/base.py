@@ -4,7 +4,8 @@ from abc import abstractmethod
 from typing import List, Dict, Any
 
 from biz.llm.factory import Factory
-from biz.utils.token_util import count_tokens, truncate_text_by_tokens
+from biz.llm.rate_limiter import RateLimiter
+from biz.utils.token_util import is_within_token_limit, truncate_text_by_tokens
 from biz.utils.default_config import get_env_int
 
 
@@ -64,7 +65,8 @@ class LLMReviewFunc(BaseReviewFunc):
 
     def call_llm(self, messages: List[Dict[str, Any]]) -> str:
         print(f"向 AI请求, messages: {messages}")
-        review_result = self.client.completions(messages=messages)
+        with RateLimiter.limit(messages):
+            review_result = self.client.completions(messages=messages)
         print(f"收到 AI 返回结果: {review_result}")
         return review_result
 
@@ -74,8 +76,7 @@ class LLMReviewFunc(BaseReviewFunc):
             return '内容为空，无法进行评审。'
 
         # 计算tokens数量，如果超过REVIEW_MAX_TOKENS，截断changes_text
-        tokens_count = count_tokens(text)
-        if tokens_count > self.review_max_tokens:
+        if not is_within_token_limit(text, self.review_max_tokens):
             text = truncate_text_by_tokens(text, self.review_max_tokens)
 
         messages = self.get_prompts(text)
@@ -47,17 +47,17 @@ def reset_checkpoint(repo_name: str):
     
     SVNCheckpointManager.init_db()
     
-    # 将检查点设置为24小时前
+    # 将检查点设置为24小时前，并清除最后处理的revision，下次检查从24小时前的提交开始
     import time
     reset_time = int(time.time() - 24 * 3600)
     
     try:
-        import sqlite3
-        with sqlite3.connect(SVNCheckpointManager.DB_FILE) as conn:
+        from biz.utils.db_pool import get_connection
+        with get_connection(SVNCheckpointManager.DB_FILE) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE svn_checkpoints 
-                SET last_check_time = ?, updated_at = ?
+                SET last_check_time = ?, last_revision = NULL, updated_at = ?
                 WHERE repo_name = ?
             ''', (reset_time, int(time.time()), repo_name))
             
@@ -83,8 +83,8 @@ def clear_all_checkpoints():
         return
     
     try:
-        import sqlite3
-        with sqlite3.connect(SVNCheckpointManager.DB_FILE) as conn:
+        from biz.utils.db_pool import get_connection
+        with get_connection(SVNCheckpointManager.DB_FILE) as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM svn_checkpoints')
             deleted_count = cursor.rowcount
@@ -1,9 +1,33 @@
+import asyncio
+import os
+import threading
+import weakref
 from abc import abstractmethod
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 
 from biz.llm.types import NotGiven, NOT_GIVEN
 from biz.utils.log import logger
 
+# 进程内常驻的后台事件循环，fork 出的子进程重新创建
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def run_coroutine(coro):
+    """
+    在进程内常驻的后台事件循环中执行协程，阻塞等待并返回结果
+    异步 SDK 客户端及其连接池绑定在事件循环上，所有调用共用同一个循环，客户端和 keep-alive 连接在多次审查之间复用
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='llm-event-loop', daemon=True).start()
+            _loop_pid = os.getpid()
+        loop = _loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
 
 class BaseClient:
     """ Base class for chat models client. """
@@ -24,3 +48,26 @@ class BaseClient:
                     ) -> str:
         """Chat with the model.
         """
+
+    async def acompletions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           ) -> str:
+        """Chat with the model asynchronously.
+        默认在线程池中执行同步的 completions，有原生异步 SDK 的供应商应覆盖此方法
+        """
+        return await asyncio.to_thread(self.completions, messages, model)
+
+    def _get_async_client(self, create: Callable):
+        """
+        获取当前事件循环对应的异步 SDK 客户端，不存在时调用 create 创建
+        异步客户端的连接池绑定在创建它的事件循环上，因此按事件循环分别缓存；
+        通过 run_coroutine 执行时始终是同一个后台循环，客户端在进程内只创建一次
+        """
+        loop = asyncio.get_running_loop()
+        clients = self.__dict__.setdefault('_async_clients', weakref.WeakKeyDictionary())
+        client = clients.get(loop)
+        if client is None:
+            client = create()
+            clients[loop] = client
+        return client
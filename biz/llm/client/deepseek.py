@@ -1,7 +1,7 @@
 import os
 from typing import Dict, List, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from biz.llm.client.base import BaseClient
 from biz.llm.types import NotGiven, NOT_GIVEN
@@ -31,19 +31,44 @@ class DeepSeekClient(BaseClient):
                 model=model,
                 messages=messages
             )
-            
-            if not completion or not completion.choices:
-                logger.error("Empty response from DeepSeek API")
-                return "AI服务返回为空，请稍后重试"
-                
-            return completion.choices[0].message.content
+            return self._parse_completion(completion)
             
         except Exception as e:
-            logger.error(f"DeepSeek API error: {str(e)}")
-            # 检查是否是认证错误
-            if "401" in str(e):
-                return "DeepSeek API认证失败，请检查API密钥是否正确"
-            elif "404" in str(e):
-                return "DeepSeek API接口未找到，请检查API地址是否正确"
-            else:
-                return f"调用DeepSeek API时出错: {str(e)}"
+            return self._error_message(e)
+
+    async def acompletions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           ) -> str:
+        try:
+            model = model or self.default_model
+            logger.debug(f"Sending async request to DeepSeek API. Model: {model}, Messages: {messages}")
+
+            client = self._get_async_client(lambda: AsyncOpenAI(api_key=self.api_key, base_url=self.base_url))
+            completion = await client.chat.completions.create(
+                model=model,
+                messages=messages
+            )
+            return self._parse_completion(completion)
+
+        except Exception as e:
+            return self._error_message(e)
+
+    @staticmethod
+    def _parse_completion(completion) -> str:
+        if not completion or not completion.choices:
+            logger.error("Empty response from DeepSeek API")
+            return "AI服务返回为空，请稍后重试"
+
+        return completion.choices[0].message.content
+
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        logger.error(f"DeepSeek API error: {str(e)}")
+        # 检查是否是认证错误
+        if "401" in str(e):
+            return "DeepSeek API认证失败，请检查API密钥是否正确"
+        elif "404" in str(e):
+            return "DeepSeek API接口未找到，请检查API地址是否正确"
+        else:
+            return f"调用DeepSeek API时出错: {str(e)}"
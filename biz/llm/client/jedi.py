@@ -21,6 +21,9 @@ class JediClient(BaseClient):
         if not self.base_url:
             raise ValueError("Base URL is required. Please provide it or set it in the environment variables.")
 
+        # 复用同一个会话，保持与 Jedi 服务的长连接
+        self.session = requests.Session()
+
     def _convert_messages_to_jedi_format(self, messages: List[Dict[str, str]]) -> Dict:
         """Convert OpenAI format messages to Jedi format"""
         user_messages = []
@@ -129,7 +132,7 @@ class JediClient(BaseClient):
                     logger.info(f"Jedi API 请求尝试 {attempt + 1}/{max_retries + 1}, 复杂度: {complexity_level}, 超时设置: {timeout}秒")
                     
                     # 发送请求
-                    response = requests.post(
+                    response = self.session.post(
                         self.base_url,
                         headers=headers,
                         json=payload,
@@ -3,7 +3,7 @@ import re
 from typing import Dict, List, Optional
 
 from ollama import ChatResponse
-from ollama import Client
+from ollama import AsyncClient, Client
 
 from biz.llm.client.base import BaseClient
 from biz.llm.types import NotGiven, NOT_GIVEN
@@ -44,3 +44,12 @@ class OllamaClient(BaseClient):
         response: ChatResponse = self.client.chat(model or self.default_model, messages)
         content = response['message']['content']
         return self._extract_content(content)
+
+    async def acompletions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           ) -> str:
+        client = self._get_async_client(lambda: AsyncClient(host=self.base_url))
+        response: ChatResponse = await client.chat(model or self.default_model, messages)
+        content = response['message']['content']
+        return self._extract_content(content)
@@ -1,7 +1,7 @@
 import os
 from typing import Dict, List, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from biz.llm.client.base import BaseClient
 from biz.llm.types import NotGiven, NOT_GIVEN
@@ -30,3 +30,16 @@ class QwenClient(BaseClient):
             extra_body=self.extra_body,
         )
         return completion.choices[0].message.content
+
+    async def acompletions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           ) -> str:
+        model = model or self.default_model
+        client = self._get_async_client(lambda: AsyncOpenAI(api_key=self.api_key, base_url=self.base_url))
+        completion = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            extra_body=self.extra_body,
+        )
+        return completion.choices[0].message.content
@@ -0,0 +1,34 @@
+from unittest import TestCase, main
+
+from biz.llm.client.base import BaseClient, run_coroutine
+
+
+class FakeAsyncClient:
+    created = 0
+
+    def __init__(self):
+        FakeAsyncClient.created += 1
+
+
+class FakeClient(BaseClient):
+    def completions(self, messages, model=None):
+        return 'ok'
+
+    async def acompletions(self, messages, model=None):
+        self._get_async_client(FakeAsyncClient)
+        return 'ok'
+
+
+class TestRunCoroutine(TestCase):
+    def test_async_client_reused_across_runs(self):
+        client = FakeClient()
+        created = FakeAsyncClient.created
+        for _ in range(3):
+            self.assertEqual(run_coroutine(client.acompletions([])), 'ok')
+        # 每次审查都在同一个后台事件循环中执行，只创建一个异步客户端
+        self.assertEqual(FakeAsyncClient.created - created, 1)
+        self.assertEqual(len(client._async_clients), 1)
+
+
+if __name__ == '__main__':
+    main()
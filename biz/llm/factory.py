@@ -1,4 +1,5 @@
 import os
+import threading
 
 from biz.llm.client.base import BaseClient
 from biz.llm.client.deepseek import DeepSeekClient
@@ -13,6 +14,10 @@ from biz.utils.default_config import get_env_with_default
 
 
 class Factory:
+    # 进程内复用的客户端实例，底层 HTTP 连接池（keep-alive）随实例一起复用
+    _clients = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def getClient(provider: str = None) -> BaseClient:
         provider = provider or get_env_with_default("LLM_PROVIDER")
@@ -26,7 +31,31 @@ class Factory:
         }
 
         provider_func = chat_model_providers.get(provider)
-        if provider_func:
-            return provider_func()
-        else:
+        if not provider_func:
             raise Exception(f'Unknown chat model provider: {provider}')
+
+        # 供应商相关配置（如 OPENAI_API_KEY）热更新后生成新的键，旧实例不再使用
+        cache_key = Factory._cache_key(provider)
+        client = Factory._clients.get(cache_key)
+        if client is None:
+            with Factory._lock:
+                client = Factory._clients.get(cache_key)
+                if client is None:
+                    client = provider_func()
+                    Factory._clients = {k: v for k, v in Factory._clients.items() if k[:2] != cache_key[:2]}
+                    Factory._clients[cache_key] = client
+                    logger.debug(f'创建 {provider} 客户端实例')
+        return client
+
+    @staticmethod
+    def _cache_key(provider: str) -> tuple:
+        prefix = f'{provider.upper()}_'
+        settings = tuple(sorted((k, v) for k, v in os.environ.items() if k.startswith(prefix)))
+        # fork 出的子进程不复用父进程的连接
+        return os.getpid(), provider, settings
+
+    @staticmethod
+    def clear_clients():
+        """清空已缓存的客户端实例"""
+        with Factory._lock:
+            Factory._clients = {}
@@ -0,0 +1,207 @@
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from biz.utils.db_pool import get_connection
+from biz.utils.default_config import get_env_with_default, get_env_int
+from biz.utils.log import logger
+
+
+class RateLimiter:
+    """
+    大模型调用限流器 - 按供应商限制每分钟请求数（RPM）、每分钟token数（TPM）和同时进行的请求数
+    计数保存在 SQLite 中，多个工作进程共享同一份额度；额度不足时排队等待而不是直接失败
+    """
+    DB_FILE = "data/data.db"
+    WINDOW_SECONDS = 60
+
+    _initialized_pid = None
+
+    @staticmethod
+    def init_db():
+        """初始化限流计数表"""
+        try:
+            with get_connection(RateLimiter.DB_FILE) as conn:
+                cursor = conn.cursor()
+                # 滑动窗口内的请求记录
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS llm_rate_events (
+                        provider TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        tokens INTEGER DEFAULT 0
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_llm_rate_events_provider_time
+                    ON llm_rate_events(provider, created_at)
+                ''')
+                # 正在进行中的请求
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS llm_in_flight (
+                        slot_id TEXT PRIMARY KEY,
+                        provider TEXT NOT NULL,
+                        pid INTEGER,
+                        started_at REAL NOT NULL
+                    )
+                ''')
+                conn.commit()
+            RateLimiter._initialized_pid = os.getpid()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"LLM rate limiter database initialization failed: {e}")
+
+    @staticmethod
+    def get_limits(provider: str) -> Dict[str, int]:
+        """
+        读取限流配置，供应商专属配置（如 DEEPSEEK_RPM_LIMIT）优先于全局配置（如 LLM_RPM_LIMIT），0 表示不限制
+        """
+        limits = {}
+        for name in ('RPM_LIMIT', 'TPM_LIMIT', 'MAX_IN_FLIGHT'):
+            provider_value = get_env_int(f'{provider.upper()}_{name}') if provider else 0
+            limits[name] = provider_value or get_env_int(f'LLM_{name}', 0)
+        return limits
+
+    @staticmethod
+    def is_enabled(provider: str) -> bool:
+        return any(RateLimiter.get_limits(provider).values())
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+        """估算请求消耗的token数（仅统计输入）"""
+        from biz.utils.token_util import count_tokens
+        return sum(count_tokens(str(message.get('content', ''))) for message in messages)
+
+    @staticmethod
+    def try_acquire(provider: str, tokens: int = 0) -> Tuple[Optional[str], float]:
+        """
+        尝试占用一次调用额度
+        :return: (slot_id, 0) 表示成功；(None, 建议等待秒数) 表示额度不足
+        """
+        if RateLimiter._initialized_pid != os.getpid():
+            RateLimiter.init_db()
+        limits = RateLimiter.get_limits(provider)
+        now = time.time()
+        window_start = now - RateLimiter.WINDOW_SECONDS
+        in_flight_timeout = get_env_int('LLM_IN_FLIGHT_TIMEOUT', 600)
+
+        with get_connection(RateLimiter.DB_FILE) as conn:
+            cursor = conn.cursor()
+            # 立即获取写锁，保证多个进程之间的“检查+占用”是原子的
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('DELETE FROM llm_rate_events WHERE created_at < ?', (window_start,))
+            # 进程异常退出时未释放的占用，超时后自动回收
+            cursor.execute('DELETE FROM llm_in_flight WHERE started_at < ?', (now - in_flight_timeout,))
+
+            wait_seconds = 0.0
+            cursor.execute('''
+                SELECT COUNT(*), COALESCE(SUM(tokens), 0), MIN(created_at)
+                FROM llm_rate_events WHERE provider = ?
+            ''', (provider,))
+            request_count, token_count, oldest = cursor.fetchone()
+            rpm_exceeded = limits['RPM_LIMIT'] and request_count >= limits['RPM_LIMIT']
+            # 单次请求超过 TPM 上限时，只要窗口为空就放行，避免永远等待
+            tpm_exceeded = limits['TPM_LIMIT'] and token_count and token_count + tokens > limits['TPM_LIMIT']
+            if rpm_exceeded or tpm_exceeded:
+                wait_seconds = max(oldest + RateLimiter.WINDOW_SECONDS - now, 0.1)
+
+            if limits['MAX_IN_FLIGHT']:
+                cursor.execute('SELECT COUNT(*) FROM llm_in_flight WHERE provider = ?', (provider,))
+                if cursor.fetchone()[0] >= limits['MAX_IN_FLIGHT']:
+                    wait_seconds = max(wait_seconds, 0.5)
+
+            if wait_seconds:
+                conn.commit()
+                return None, min(wait_seconds, 5.0)
+
+            slot_id = uuid.uuid4().hex
+            cursor.execute('INSERT INTO llm_rate_events (provider, created_at, tokens) VALUES (?, ?, ?)',
+                           (provider, now, tokens))
+            cursor.execute('INSERT INTO llm_in_flight (slot_id, provider, pid, started_at) VALUES (?, ?, ?, ?)',
+                           (slot_id, provider, os.getpid(), now))
+            conn.commit()
+            return slot_id, 0
+
+    @staticmethod
+    def release(slot_id: Optional[str]):
+        """释放同时进行请求数的占用（RPM/TPM 记录保留到滑出时间窗口）"""
+        if not slot_id:
+            return
+        try:
+            with get_connection(RateLimiter.DB_FILE) as conn:
+                conn.execute('DELETE FROM llm_in_flight WHERE slot_id = ?', (slot_id,))
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error releasing LLM rate limiter slot: {e}")
+
+    @staticmethod
+    def _start(provider: str, messages: List[Dict[str, str]]) -> Tuple[int, float]:
+        limits = RateLimiter.get_limits(provider)
+        tokens = RateLimiter.estimate_tokens(messages) if limits['TPM_LIMIT'] else 0
+        return tokens, time.time() + get_env_int('LLM_RATE_LIMIT_MAX_WAIT', 600)
+
+    @staticmethod
+    def _acquire_step(provider: str, tokens: int, deadline: float) -> Tuple[Optional[str], float, bool]:
+        """返回 (slot_id, 等待秒数, 是否放弃等待)；数据库异常或等待超时时直接放行，限流不应阻断审查"""
+        try:
+            slot_id, wait_seconds = RateLimiter.try_acquire(provider, tokens)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"LLM rate limiter unavailable, request not limited: {e}")
+            return None, 0, True
+        if slot_id:
+            return slot_id, 0, True
+        if time.time() + wait_seconds > deadline:
+            logger.warning(f"{provider} 限流等待超过 LLM_RATE_LIMIT_MAX_WAIT，直接发送请求")
+            return None, 0, True
+        return None, wait_seconds, False
+
+    @staticmethod
+    @contextmanager
+    def limit(messages: List[Dict[str, str]], provider: str = None):
+        """在额度内执行一次大模型调用，额度不足时阻塞等待"""
+        provider = provider or get_env_with_default('LLM_PROVIDER')
+        if not RateLimiter.is_enabled(provider):
+            yield
+            return
+
+        tokens, deadline = RateLimiter._start(provider, messages)
+        waited = 0.0
+        while True:
+            slot_id, wait_seconds, done = RateLimiter._acquire_step(provider, tokens, deadline)
+            if done:
+                break
+            time.sleep(wait_seconds)
+            waited += wait_seconds
+        if waited:
+            logger.info(f"{provider} 调用额度不足，排队等待 {waited:.1f} 秒")
+        try:
+            yield
+        finally:
+            RateLimiter.release(slot_id)
+
+    @staticmethod
+    @asynccontextmanager
+    async def alimit(messages: List[Dict[str, str]], provider: str = None):
+        """limit 的异步版本，等待期间不阻塞事件循环"""
+        provider = provider or get_env_with_default('LLM_PROVIDER')
+        if not RateLimiter.is_enabled(provider):
+            yield
+            return
+
+        tokens, deadline = RateLimiter._start(provider, messages)
+        waited = 0.0
+        while True:
+            slot_id, wait_seconds, done = await asyncio.to_thread(
+                RateLimiter._acquire_step, provider, tokens, deadline)
+            if done:
+                break
+            await asyncio.sleep(wait_seconds)
+            waited += wait_seconds
+        if waited:
+            logger.info(f"{provider} 调用额度不足，排队等待 {waited:.1f} 秒")
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(RateLimiter.release, slot_id)
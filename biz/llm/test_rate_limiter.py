@@ -0,0 +1,39 @@
+import os
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.llm.rate_limiter import RateLimiter
+from biz.utils.db_files import TempDatabaseMixin
+
+
+class TestRateLimiter(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        RateLimiter.init_db()
+
+    def test_rpm_limit(self):
+        with patch.dict(os.environ, {'DEEPSEEK_RPM_LIMIT': '2'}):
+            self.assertIsNotNone(RateLimiter.try_acquire('deepseek')[0])
+            self.assertIsNotNone(RateLimiter.try_acquire('deepseek')[0])
+            slot_id, wait_seconds = RateLimiter.try_acquire('deepseek')
+            self.assertIsNone(slot_id)
+            self.assertGreater(wait_seconds, 0)
+            # 额度按供应商分别计算
+            self.assertIsNotNone(RateLimiter.try_acquire('openai')[0])
+
+    def test_max_in_flight_released(self):
+        with patch.dict(os.environ, {'LLM_MAX_IN_FLIGHT': '1'}):
+            slot_id, _ = RateLimiter.try_acquire('deepseek')
+            self.assertIsNone(RateLimiter.try_acquire('deepseek')[0])
+            RateLimiter.release(slot_id)
+            self.assertIsNotNone(RateLimiter.try_acquire('deepseek')[0])
+
+    def test_tpm_limit(self):
+        with patch.dict(os.environ, {'LLM_TPM_LIMIT': '100'}):
+            self.assertIsNotNone(RateLimiter.try_acquire('deepseek', 80)[0])
+            self.assertIsNone(RateLimiter.try_acquire('deepseek', 30)[0])
+            self.assertIsNotNone(RateLimiter.try_acquire('deepseek', 20)[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -10,12 +10,16 @@ from biz.github.webhook_handler import filter_changes as filter_github_changes,
 from biz.utils.code_reviewer import CodeReviewer
 from biz.utils.im import notifier
 from biz.utils.log import logger
+from biz.utils.payload_spool import spooled_payload
 from biz.utils.version_tracker import VersionTracker
+from biz.utils.write_buffer import ReviewWriteBuffer
 from biz.utils.default_config import get_env_bool
 from biz.service.review_service import ReviewService
 
 
 
+@spooled_payload
+@ReviewWriteBuffer.batched
 def handle_push_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gitlab_url_slug: str):
     push_review_enabled = get_env_bool('PUSH_REVIEW_ENABLED')
     # 检查是否启用版本追踪功能
@@ -175,6 +179,8 @@ def handle_push_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gi
         logger.error('出现未知错误: %s', error_message)
 
 
+@spooled_payload
+@ReviewWriteBuffer.batched
 def handle_merge_request_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gitlab_url_slug: str):
     '''
     处理Merge Request Hook事件
@@ -323,6 +329,8 @@ def handle_merge_request_event(webhook_data: dict, gitlab_token: str, gitlab_url
         notifier.send_notification(content=error_message)
         logger.error('出现未知错误: %s', error_message)
 
+@spooled_payload
+@ReviewWriteBuffer.batched
 def handle_github_push_event(webhook_data: dict, github_token: str, github_url: str, github_url_slug: str):
     push_review_enabled = get_env_bool('PUSH_REVIEW_ENABLED')
     try:
@@ -411,6 +419,8 @@ def handle_github_push_event(webhook_data: dict, github_token: str, github_url:
         logger.error('出现未知错误: %s', error_message)
 
 
+@spooled_payload
+@ReviewWriteBuffer.batched
 def handle_github_pull_request_event(webhook_data: dict, github_token: str, github_url: str, github_url_slug: str):
     '''
     处理GitHub Pull Request 事件
@@ -1,9 +1,14 @@
 import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
 
 import pandas as pd
 
 from biz.entity.review_entity import MergeRequestReviewEntity, PushReviewEntity
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_pool import get_connection, open_connection, table_exists
 from biz.utils.log import logger
+from biz.utils.write_buffer import ReviewWriteBuffer
 
 
 class ReviewService:
@@ -13,7 +18,7 @@ class ReviewService:
     def init_db():
         """初始化数据库及表结构"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
+            with get_connection(ReviewService.DB_FILE) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                         CREATE TABLE IF NOT EXISTS mr_review_log (
@@ -58,25 +63,242 @@ class ReviewService:
             # 初始化版本追踪数据库
             from biz.utils.version_tracker import VersionTracker
             VersionTracker.init_db()
+
+            # 初始化审查结果缓存
+            from biz.utils.review_cache import ReviewCache
+            ReviewCache.init_db()
+
+            # 审查结果、文件详情等大字段的压缩存储
+            BlobStore.init_db()
+
+            # 批量写入的已提交记录标记
+            ReviewWriteBuffer.init_db()
+
+            # 作者/项目/数量汇总表，供仪表盘侧边栏和计数器使用
+            ReviewService.init_summary()
+
+            # 按天汇总表，供图表分析使用
+            from biz.utils.review_rollup import ReviewRollup
+            ReviewRollup.init_db()
+
+            # 审查结果、提交说明和文件路径的全文索引（触发器依赖 file_details 列）
+            ReviewService.upgrade_db_add_file_details()
+            from biz.utils.review_search import ReviewSearch
+            ReviewSearch.init_db()
+
+            # 为仪表盘和日报的查询条件创建索引
+            ReviewService.create_indexes()
             
         except sqlite3.DatabaseError as e:
             print(f"Database initialization failed: {e}")
 
+    # 查询均按时间范围过滤、按时间倒序排列，并可附加作者/项目/类型条件，
+    # 因此索引以等值条件列在前、时间列在后，score 放在末尾使统计查询无需回表
+    INDEXES = {
+        'mr_review_log': {
+            'idx_mr_review_log_updated_at': ['updated_at', 'score'],
+            'idx_mr_review_log_author_updated_at': ['author', 'updated_at', 'score'],
+            'idx_mr_review_log_project_updated_at': ['project_name', 'updated_at', 'score'],
+        },
+        'push_review_log': {
+            'idx_push_review_log_updated_at': ['updated_at', 'score'],
+            'idx_push_review_log_author_updated_at': ['author', 'updated_at', 'score'],
+            'idx_push_review_log_project_updated_at': ['project_name', 'updated_at', 'score'],
+        },
+        'version_tracker': {
+            'idx_version_tracker_reviewed_at': ['reviewed_at', 'score'],
+            'idx_version_tracker_type_reviewed_at': ['review_type', 'reviewed_at', 'score'],
+            'idx_version_tracker_author_reviewed_at': ['author', 'reviewed_at', 'score'],
+            'idx_version_tracker_project_reviewed_at': ['project_name', 'reviewed_at', 'score'],
+            # 按项目和类型分组统计
+            'idx_version_tracker_project_type': ['project_name', 'review_type'],
+        },
+    }
+
     @staticmethod
-    def insert_mr_review_log(entity: MergeRequestReviewEntity):
-        """插入合并请求审核日志"""
+    def create_indexes():
+        """创建查询索引（已存在则跳过），并更新查询优化器的统计信息"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
+            with get_connection(ReviewService.DB_FILE) as conn:
                 cursor = conn.cursor()
+                for table, indexes in ReviewService.INDEXES.items():
+                    for index_name, columns in indexes.items():
+                        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({', '.join(columns)})")
+                conn.commit()
+                # 只分析统计信息缺失或过期的表，已是最新时几乎没有开销
+                cursor.execute("PRAGMA optimize")
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error creating review log indexes: {e}")
+
+    # 汇总表的数据来源：(表名, 审查类型表达式)
+    _SUMMARY_SOURCES = [
+        ('mr_review_log', "'mr'"),
+        ('push_review_log', "'push'"),
+        ('version_tracker', "{row}.review_type"),
+    ]
+
+    @staticmethod
+    def init_summary():
+        """
+        创建 review_summary 汇总表：按 (审查类型, 项目, 作者) 记录审查数量
+        由触发器在审查记录插入/删除/修改时同步更新，因此批量写入、版本追踪的 INSERT OR REPLACE
+        以及清理旧记录都会反映到汇总表中；首次创建时从已有记录回填
+        """
+        try:
+            with get_connection(ReviewService.DB_FILE) as conn:
+                cursor = conn.cursor()
+                # 建表、建触发器和回填放在同一个写事务中，避免期间写入的记录被漏计
+                cursor.execute('BEGIN IMMEDIATE')
+                exists = table_exists(cursor, 'review_summary')
                 cursor.execute('''
-                                INSERT INTO mr_review_log (project_name,author, source_branch, target_branch, updated_at, commit_messages, score, url,review_result, additions, deletions)
-                                VALUES (?,?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''',
-                               (entity.project_name, entity.author, entity.source_branch,
-                                entity.target_branch,
-                                entity.updated_at, entity.commit_messages, entity.score,
-                                entity.url, entity.review_result, entity.additions, entity.deletions))
+                    CREATE TABLE IF NOT EXISTS review_summary (
+                        review_type TEXT NOT NULL,
+                        project_name TEXT NOT NULL,
+                        author TEXT NOT NULL,
+                        review_count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (review_type, project_name, author)
+                    )
+                ''')
+                for table, type_expr in ReviewService._SUMMARY_SOURCES:
+                    for statement in ReviewService._summary_trigger_sql(table, type_expr):
+                        cursor.execute(statement)
+                if not exists:
+                    ReviewService._fill_summary(cursor)
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error initializing review summary: {e}")
+
+    @staticmethod
+    def _summary_key(table_row: str, type_expr: str) -> str:
+        return (f"COALESCE({type_expr.format(row=table_row)}, ''), "
+                f"COALESCE({table_row}.project_name, ''), COALESCE({table_row}.author, '')")
+
+    @staticmethod
+    def _summary_trigger_sql(table: str, type_expr: str) -> list:
+        new_key = ReviewService._summary_key('NEW', type_expr)
+        old_key = ReviewService._summary_key('OLD', type_expr)
+        increment = f'''
+            INSERT INTO review_summary (review_type, project_name, author, review_count)
+            VALUES ({new_key}, 1)
+            ON CONFLICT (review_type, project_name, author) DO UPDATE SET review_count = review_count + 1;
+        '''
+        decrement = f'''
+            UPDATE review_summary SET review_count = review_count - 1
+            WHERE (review_type, project_name, author) = ({old_key});
+            DELETE FROM review_summary
+            WHERE (review_type, project_name, author) = ({old_key}) AND review_count <= 0;
+        '''
+        statements = [
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_insert AFTER INSERT ON {table} "
+            f"BEGIN {increment} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_delete AFTER DELETE ON {table} "
+            f"BEGIN {decrement} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_update "
+            f"AFTER UPDATE OF project_name, author{', review_type' if 'review_type' in type_expr else ''} ON {table} "
+            f"BEGIN {decrement} {increment} END",
+        ]
+        if table == 'version_tracker':
+            # INSERT OR REPLACE 删除冲突记录时不会触发 DELETE 触发器，需要在插入前扣除被替换的记录
+            replaced = (f"SELECT {ReviewService._summary_key('version_tracker', type_expr)} FROM version_tracker "
+                        f"WHERE project_name = NEW.project_name AND version_hash = NEW.version_hash")
+            statements.append(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_version_tracker_summary_replace BEFORE INSERT ON version_tracker
+                WHEN EXISTS (SELECT 1 FROM version_tracker
+                             WHERE project_name = NEW.project_name AND version_hash = NEW.version_hash)
+                BEGIN
+                    UPDATE review_summary SET review_count = review_count - 1
+                    WHERE (review_type, project_name, author) = ({replaced});
+                    DELETE FROM review_summary
+                    WHERE (review_type, project_name, author) = ({replaced}) AND review_count <= 0;
+                END
+            ''')
+        return statements
+
+    @staticmethod
+    def _fill_summary(cursor):
+        for table, type_expr in ReviewService._SUMMARY_SOURCES:
+            key = ReviewService._summary_key(table, type_expr)
+            cursor.execute(f'''
+                INSERT INTO review_summary (review_type, project_name, author, review_count)
+                SELECT {key}, COUNT(*) FROM {table} GROUP BY 1, 2, 3
+                ON CONFLICT (review_type, project_name, author) DO UPDATE SET review_count = review_count + excluded.review_count
+            ''')
+
+    @staticmethod
+    def rebuild_summary():
+        """按审查记录重新生成汇总表（手工修改过数据库后使用）"""
+        try:
+            with get_connection(ReviewService.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('DELETE FROM review_summary')
+                ReviewService._fill_summary(cursor)
                 conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error rebuilding review summary: {e}")
+
+    @staticmethod
+    def _summary_where(review_types: list = None):
+        if not review_types:
+            return '', []
+        return f" WHERE review_type IN ({','.join(['?'] * len(review_types))})", list(review_types)
+
+    @staticmethod
+    def get_distinct_authors(review_types: list = None) -> list:
+        """获取有审查记录的作者列表（已排序）"""
+        where, params = ReviewService._summary_where(review_types)
+        try:
+            with get_connection(ReviewService.DB_FILE) as conn:
+                rows = conn.execute(f"SELECT DISTINCT author FROM review_summary{where} ORDER BY author",
+                                    params).fetchall()
+                return [row[0] for row in rows if row[0]]
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error getting authors: {e}")
+            return []
+
+    @staticmethod
+    def get_distinct_projects(review_types: list = None) -> list:
+        """获取有审查记录的项目列表（已排序）"""
+        where, params = ReviewService._summary_where(review_types)
+        try:
+            with get_connection(ReviewService.DB_FILE) as conn:
+                rows = conn.execute(f"SELECT DISTINCT project_name FROM review_summary{where} ORDER BY project_name",
+                                    params).fetchall()
+                return [row[0] for row in rows if row[0]]
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error getting projects: {e}")
+            return []
+
+    @staticmethod
+    def get_review_counts(review_types: list = None) -> dict:
+        """按审查类型统计记录数，如 {'mr': 10, 'push': 20, 'svn': 5}"""
+        where, params = ReviewService._summary_where(review_types)
+        try:
+            with get_connection(ReviewService.DB_FILE) as conn:
+                rows = conn.execute(f"SELECT review_type, SUM(review_count) FROM review_summary{where} "
+                                    f"GROUP BY review_type", params).fetchall()
+                counts = {review_type: 0 for review_type in review_types or []}
+                counts.update({review_type: count for review_type, count in rows})
+                return counts
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error getting review counts: {e}")
+            return {review_type: 0 for review_type in review_types or []}
+
+    @staticmethod
+    def _mr_values(entity: MergeRequestReviewEntity) -> dict:
+        return {
+            'project_name': entity.project_name, 'author': entity.author,
+            'source_branch': entity.source_branch, 'target_branch': entity.target_branch,
+            'updated_at': entity.updated_at, 'commit_messages': entity.commit_messages, 'score': entity.score,
+            'url': entity.url, 'review_result': entity.review_result,
+            'additions': entity.additions, 'deletions': entity.deletions,
+        }
+
+    @staticmethod
+    def insert_mr_review_log(entity: MergeRequestReviewEntity):
+        """插入合并请求审核日志（在 ReviewWriteBuffer.batch() 范围内时批量写入）"""
+        try:
+            ReviewWriteBuffer.write('mr_review_log', ReviewService._mr_values(entity))
         except sqlite3.DatabaseError as e:
             print(f"Error inserting review log: {e}")
 
@@ -84,17 +306,8 @@ class ReviewService:
     def insert_mr_review_log_with_details(entity: MergeRequestReviewEntity, file_details=None):
         """插入合并请求审核日志，支持结构化diff存储"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                                INSERT INTO mr_review_log (project_name,author, source_branch, target_branch, updated_at, commit_messages, score, url,review_result, additions, deletions, file_details)
-                                VALUES (?,?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''',
-                               (entity.project_name, entity.author, entity.source_branch,
-                                entity.target_branch,
-                                entity.updated_at, entity.commit_messages, entity.score,
-                                entity.url, entity.review_result, entity.additions, entity.deletions, file_details))
-                conn.commit()
+            ReviewWriteBuffer.write('mr_review_log',
+                                    dict(ReviewService._mr_values(entity), file_details=file_details))
         except sqlite3.DatabaseError as e:
             print(f"Error inserting review log: {e}")
 
@@ -103,7 +316,7 @@ class ReviewService:
                            updated_at_lte: int = None) -> pd.DataFrame:
         """获取符合条件的合并请求审核日志"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
+            with get_connection(ReviewService.DB_FILE) as conn:
                 query = """
                             SELECT project_name, author, source_branch, target_branch, updated_at, commit_messages, score, url, review_result, additions, deletions
                             FROM mr_review_log
@@ -130,25 +343,24 @@ class ReviewService:
                     params.append(updated_at_lte)
                 query += " ORDER BY updated_at DESC"
                 df = pd.read_sql_query(sql=query, con=conn, params=params)
-            return df
+            return BlobStore.resolve_dataframe(df)
         except sqlite3.DatabaseError as e:
             print(f"Error retrieving review logs: {e}")
             return pd.DataFrame()
 
+    @staticmethod
+    def _push_values(entity: PushReviewEntity) -> dict:
+        return {
+            'project_name': entity.project_name, 'author': entity.author, 'branch': entity.branch,
+            'updated_at': entity.updated_at, 'commit_messages': entity.commit_messages, 'score': entity.score,
+            'review_result': entity.review_result, 'additions': entity.additions, 'deletions': entity.deletions,
+        }
+
     @staticmethod
     def insert_push_review_log(entity: PushReviewEntity):
-        """插入推送审核日志"""
+        """插入推送审核日志（在 ReviewWriteBuffer.batch() 范围内时批量写入）"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                                INSERT INTO push_review_log (project_name,author, branch, updated_at, commit_messages, score,review_result, additions, deletions)
-                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''',
-                               (entity.project_name, entity.author, entity.branch,
-                                entity.updated_at, entity.commit_messages, entity.score,
-                                entity.review_result, entity.additions, entity.deletions))
-                conn.commit()
+            ReviewWriteBuffer.write('push_review_log', ReviewService._push_values(entity))
         except sqlite3.DatabaseError as e:
             print(f"Error inserting review log: {e}")
 
@@ -156,16 +368,8 @@ class ReviewService:
     def insert_push_review_log_with_details(entity: PushReviewEntity, file_details=None):
         """插入推送审核日志，支持结构化diff存储"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                                INSERT INTO push_review_log (project_name,author, branch, updated_at, commit_messages, score,review_result, additions, deletions, file_details)
-                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''',
-                               (entity.project_name, entity.author, entity.branch,
-                                entity.updated_at, entity.commit_messages, entity.score,
-                                entity.review_result, entity.additions, entity.deletions, file_details))
-                conn.commit()
+            ReviewWriteBuffer.write('push_review_log',
+                                    dict(ReviewService._push_values(entity), file_details=file_details))
         except sqlite3.DatabaseError as e:
             print(f"Error inserting review log: {e}")
 
@@ -174,7 +378,7 @@ class ReviewService:
                              updated_at_lte: int = None) -> pd.DataFrame:
         """获取符合条件的推送审核日志"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
+            with get_connection(ReviewService.DB_FILE) as conn:
                 # 基础查询
                 query = """
                     SELECT project_name, author, branch, updated_at, commit_messages, score, review_result, additions, deletions
@@ -209,7 +413,7 @@ class ReviewService:
 
                 # 执行查询
                 df = pd.read_sql_query(sql=query, con=conn, params=params)
-                return df
+            return BlobStore.resolve_dataframe(df)
         except sqlite3.DatabaseError as e:
             print(f"Error retrieving push review logs: {e}")
             return pd.DataFrame()
@@ -220,7 +424,7 @@ class ReviewService:
                                  review_types: list = None) -> pd.DataFrame:
         """获取符合条件的版本跟踪审核日志（包括SVN、GitHub、GitLab）"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
+            with get_connection(ReviewService.DB_FILE) as conn:
                 # 基础查询
                 query = """
                     SELECT project_name, author, branch, reviewed_at as updated_at, 
@@ -261,7 +465,7 @@ class ReviewService:
 
                 # 执行查询
                 df = pd.read_sql_query(sql=query, con=conn, params=params)
-                return df
+            return BlobStore.resolve_dataframe(df)
         except sqlite3.DatabaseError as e:
             print(f"Error retrieving version tracking logs: {e}")
             return pd.DataFrame()
@@ -270,7 +474,7 @@ class ReviewService:
     def get_review_type_stats() -> dict:
         """获取不同审查类型的统计信息"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
+            with get_connection(ReviewService.DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # 统计各类型数量
@@ -313,113 +517,169 @@ class ReviewService:
             print(f"Error getting review type stats: {e}")
             return {}
 
+    # 列表视图使用的统一字段：(输出字段, mr_review_log, push_review_log, version_tracker)
+    _SUMMARY_COLUMNS = [
+        ('id', 'id', 'id', 'id'),
+        ('type', "'mr'", "'push'", 'review_type'),
+        ('project', 'project_name', 'project_name', 'project_name'),
+        ('author', 'author', 'author', 'author'),
+        ('timestamp', 'updated_at', 'updated_at', 'reviewed_at'),
+        ('score', 'score', 'score', 'score'),
+        ('additions', 'additions', 'additions', 'additions_count'),
+        ('deletions', 'deletions', 'deletions', 'deletions_count'),
+        ('url', 'url', 'NULL', 'NULL'),
+        ('branch_info', "source_branch || ' → ' || target_branch", 'branch', 'branch'),
+        ('commit_messages', 'commit_messages', 'commit_messages', 'commit_message'),
+        ('commit_sha', 'NULL', 'NULL', 'commit_sha'),
+        ('version_hash', 'NULL', 'NULL', 'version_hash'),
+        ('commit_date', 'NULL', 'NULL', 'commit_date'),
+        ('created_at', 'NULL', 'NULL', 'created_at'),
+    ]
+    # 体积较大的字段，只在详情或显式要求时读取
+    _BLOB_COLUMNS = [
+        ('review_result', 'review_result', 'review_result', 'review_result'),
+        ('file_details', 'file_details', 'file_details', 'file_details'),
+        ('file_paths', 'NULL', 'NULL', 'file_paths'),
+    ]
+    _REVIEW_TABLES = [
+        # (表名, 字段序号, 时间列)
+        ('mr_review_log', 1, 'updated_at'),
+        ('push_review_log', 2, 'updated_at'),
+        ('version_tracker', 3, 'reviewed_at'),
+    ]
+
+    @staticmethod
+    def _to_timestamp(value, end_of_day: bool = False):
+        """datetime/date/日期字符串/时间戳统一转换为秒级时间戳；只有日期的结束时间包含当天全天"""
+        if value is None or value == '':
+            return None
+        if isinstance(value, (int, float)):
+            return int(value)
+        if isinstance(value, str):
+            date_only = len(value.strip()) <= 10
+            value = datetime.fromisoformat(value.strip())
+        else:
+            date_only = not isinstance(value, datetime)
+            if date_only:
+                value = datetime(value.year, value.month, value.day)
+        timestamp = int(value.timestamp())
+        return timestamp + 86399 if end_of_day and date_only else timestamp
+
     @staticmethod
-    def get_review_statistics(review_type=None, start_date=None, end_date=None, 
-                            authors=None, projects=None, score_range=None):
+    def _build_review_query(review_type=None, start_date=None, end_date=None, authors=None, projects=None,
+                            score_range=None, include_blobs: bool = False, search: bool = False):
         """
-        获取审查统计数据
+        生成三张审查表的 UNION ALL 查询，过滤条件下推到每个子查询以便使用索引
+
+        search 为 True 时只选取全文搜索命中的记录（由调用方以 search_hits CTE 提供），并输出 doc_id 列
+        score_range 不排除评分缺失（NULL 或 0）的记录：这些记录的评分由调用方从审查结果中提取后再按范围筛选
+        """
+        columns = ReviewService._SUMMARY_COLUMNS + (ReviewService._BLOB_COLUMNS if include_blobs else [])
+        start_ts = ReviewService._to_timestamp(start_date)
+        end_ts = ReviewService._to_timestamp(end_date, end_of_day=True)
+
+        subqueries, params = [], []
+        for table, column_index, time_column in ReviewService._REVIEW_TABLES:
+            if table == 'mr_review_log' and review_type not in (None, 'mr'):
+                continue
+            if table == 'push_review_log' and review_type not in (None, 'push'):
+                continue
+            if table == 'version_tracker' and review_type in ('mr', 'push'):
+                continue
+
+            select = ', '.join(f"{column[column_index]} AS {column[0]}" for column in columns)
+            conditions = []
+            if search:
+                # 全文索引的文档编号为 id * 4 + 表编号（即字段序号）
+                select += f", id * 4 + {column_index} AS doc_id"
+                conditions.append(f"id IN (SELECT doc_id / 4 FROM search_hits WHERE doc_id % 4 = {column_index})")
+            if table == 'version_tracker' and review_type:
+                conditions.append("review_type = ?")
+                params.append(review_type)
+            if authors:
+                conditions.append(f"author IN ({','.join(['?'] * len(authors))})")
+                params.extend(authors)
+            if projects:
+                conditions.append(f"project_name IN ({','.join(['?'] * len(projects))})")
+                params.extend(projects)
+            if start_ts is not None:
+                conditions.append(f"{time_column} >= ?")
+                params.append(start_ts)
+            if end_ts is not None:
+                conditions.append(f"{time_column} <= ?")
+                params.append(end_ts)
+            if score_range:
+                conditions.append("(score BETWEEN ? AND ? OR score IS NULL OR score <= 0)")
+                params.extend([score_range[0], score_range[1]])
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+            subqueries.append(f"SELECT {select} FROM {table}{where}")
+
+        return ' UNION ALL '.join(subqueries), params
+
+    @staticmethod
+    def get_review_statistics(review_type=None, start_date=None, end_date=None,
+                            authors=None, projects=None, score_range=None,
+                            include_blobs: bool = True, limit: int = None, offset: int = 0,
+                            cursor: str = None):
+        """
+        获取审查统计数据（按时间倒序），过滤、排序和分页都在SQL中完成
         
         Args:
             review_type: 审查类型 ('mr', 'push', 'svn', 'github')
-            start_date: 开始日期
-            end_date: 结束日期  
+            start_date: 开始日期（datetime、date、'YYYY-MM-DD' 或时间戳）
+            end_date: 结束日期，只有日期时包含当天全天
             authors: 作者列表
             projects: 项目列表
             score_range: 分数范围 [min, max]
+            include_blobs: 是否返回 review_result/file_details/file_paths，列表视图传 False，
+                           需要时再通过 get_review_detail 按 id 获取
+            limit: 每页条数，None 表示不分页
+            offset: 偏移量分页
+            cursor: 游标分页，传入上一页返回的 next_cursor，优先于 offset
         
         Returns:
-            dict: 包含success状态和data数据的字典
+            dict: 包含success状态、data数据、total_count总数和next_cursor的字典
         """
         try:
-            data = []            
-            if review_type == 'mr' or review_type is None:
-                # 获取MR审查记录
-                mr_logs_df = ReviewService.get_mr_review_logs(
-                    authors=authors,
-                    project_names=projects,
-                    updated_at_gte=int(start_date.timestamp()) if start_date else None,
-                    updated_at_lte=int(end_date.timestamp()) if end_date else None
-                )
-                for _, log in mr_logs_df.iterrows():
-                    # 应用分数过滤
-                    if score_range and (log['score'] < score_range[0] or log['score'] > score_range[1]):
-                        continue
-                        
-                    data.append({
-                        'type': 'mr',
-                        'project': log['project_name'],
-                        'author': log['author'],
-                        'timestamp': log['updated_at'],
-                        'score': log['score'],
-                        'additions': log.get('additions', 0),
-                        'deletions': log.get('deletions', 0),
-                        'url': log.get('url', ''),
-                        'branch_info': f"{log['source_branch']} → {log['target_branch']}",
-                        'commit_messages': log['commit_messages'],
-                        'review_result': log['review_result']
-                    })
-            
-            if review_type == 'push' or review_type is None:
-                # 获取Push审查记录
-                push_logs_df = ReviewService.get_push_review_logs(
-                    authors=authors,
-                    project_names=projects,
-                    updated_at_gte=int(start_date.timestamp()) if start_date else None,
-                    updated_at_lte=int(end_date.timestamp()) if end_date else None
-                )
-                for _, log in push_logs_df.iterrows():
-                    # 应用分数过滤
-                    if score_range and (log['score'] < score_range[0] or log['score'] > score_range[1]):
-                        continue
-                        
-                    data.append({
-                        'type': 'push',
-                        'project': log['project_name'],
-                        'author': log['author'],
-                        'timestamp': log['updated_at'],
-                        'score': log['score'],
-                        'additions': log.get('additions', 0),
-                        'deletions': log.get('deletions', 0),
-                        'branch_info': log['branch'],
-                        'commit_messages': log['commit_messages'],
-                        'review_result': log['review_result']
-                    })            
-            if review_type in ['svn', 'github'] or review_type is None:
-                # 获取版本跟踪审查记录
-                version_logs_df = ReviewService.get_version_tracking_logs(
-                    authors=authors,
-                    project_names=projects,
-                    updated_at_gte=int(start_date.timestamp()) if start_date else None,
-                    updated_at_lte=int(end_date.timestamp()) if end_date else None,
-                    review_types=[review_type] if review_type else None
-                )
-                for _, log in version_logs_df.iterrows():
-                    # 应用分数过滤
-                    if score_range and (log['score'] < score_range[0] or log['score'] > score_range[1]):
-                        continue
-                        
-                    data.append({
-                        'type': log['review_type'],
-                        'project': log['project_name'],
-                        'author': log['author'],
-                        'timestamp': log['updated_at'],
-                        'score': log['score'],
-                        'additions': log.get('additions_count', 0),
-                        'deletions': log.get('deletions_count', 0),
-                        'branch_info': log.get('branch', ''),
-                        'commit_messages': log.get('commit_message', ''),
-                        'review_result': log.get('review_result', ''),
-                        'commit_sha': log.get('commit_sha', ''),
-                        'commit_date': log.get('commit_date', ''),
-                        'created_at': log.get('created_at', log.get('updated_at', 0)),
-                        'file_details': log.get('file_details', ''),
-                        'file_paths': log.get('file_paths', '')
-                    })
-            
+            query, params = ReviewService._build_review_query(
+                review_type, start_date, end_date, authors, projects, score_range, include_blobs)
+            if not query:
+                return {'success': True, 'data': [], 'total_count': 0, 'next_cursor': None}
+
+            sql = f"SELECT * FROM ({query}) AS records"
+            page_params = list(params)
+            if cursor:
+                # 游标为上一页最后一条记录的 (timestamp, type, id)
+                cursor_ts, cursor_type, cursor_id = cursor.split(':', 2)
+                sql += " WHERE (timestamp, type, id) < (?, ?, ?)"
+                page_params.extend([int(cursor_ts), cursor_type, int(cursor_id)])
+            sql += " ORDER BY timestamp DESC, type DESC, id DESC"
+            if limit:
+                sql += " LIMIT ? OFFSET ?"
+                page_params.extend([int(limit), 0 if cursor else int(offset or 0)])
+
+            with get_connection(ReviewService.DB_FILE) as conn:
+                conn_cursor = conn.execute(sql, page_params)
+                names = [description[0] for description in conn_cursor.description]
+                data = [dict(zip(names, row)) for row in conn_cursor.fetchall()]
+                if limit:
+                    total_count = conn.execute(f"SELECT COUNT(*) FROM ({query}) AS records", params).fetchone()[0]
+                else:
+                    total_count = len(data)
+
+            if include_blobs:
+                BlobStore.resolve_records(data)
+
+            next_cursor = None
+            if limit and len(data) == int(limit):
+                last = data[-1]
+                next_cursor = f"{last['timestamp']}:{last['type']}:{last['id']}"
+
             return {
                 'success': True,
                 'data': data,
-                'total_count': len(data)
+                'total_count': total_count,
+                'next_cursor': next_cursor
             }
             
         except Exception as e:
@@ -430,6 +690,164 @@ class ReviewService:
                 'data': []
             }
 
+    @staticmethod
+    def search(query: str, review_type=None, start_date=None, end_date=None, authors=None, projects=None,
+               score_range=None, limit: int = 20, offset: int = 0, highlight=('**', '**')):
+        """
+        全文搜索审查结果、提交说明和文件路径，按相关度排序（相同时按时间倒序）
+
+        Args:
+            query: 搜索词，空格分隔的多个词需要同时出现，不区分大小写，支持中文子串
+            review_type/start_date/end_date/authors/projects/score_range: 与 get_review_statistics 相同的过滤条件
+            limit: 每页条数，None 表示返回全部命中记录
+            offset: 偏移量分页
+            highlight: 高亮标记 (前缀, 后缀)，返回的每条记录带 snippet 摘要；None 表示不生成摘要
+
+        Returns:
+            dict: 包含success状态、data数据（摘要字段 + rank + snippet）和total_count总数的字典
+        """
+        from biz.utils.review_search import ReviewSearch
+        try:
+            if not ReviewSearch.is_available():
+                return {'success': False, 'error': '当前数据库不支持全文搜索', 'data': []}
+            hits, hit_params = ReviewSearch.hits_sql(query)
+            if not hits:
+                return {'success': True, 'data': [], 'total_count': 0}
+            query_sql, params = ReviewService._build_review_query(
+                review_type, start_date, end_date, authors, projects, score_range, search=True)
+            if not query_sql:
+                return {'success': True, 'data': [], 'total_count': 0}
+
+            # 先索引尚未处理的新记录，保证搜索结果完整
+            ReviewSearch.sync()
+            sql = (f"WITH search_hits AS ({hits}) "
+                   f"SELECT records.*, search_hits.rank AS rank FROM ({query_sql}) AS records "
+                   f"JOIN search_hits ON search_hits.doc_id = records.doc_id "
+                   f"ORDER BY search_hits.rank, records.timestamp DESC, records.doc_id DESC")
+            page_params = hit_params + params
+            if limit:
+                sql += " LIMIT ? OFFSET ?"
+                page_params += [int(limit), int(offset or 0)]
+
+            with get_connection(ReviewService.DB_FILE) as conn:
+                conn_cursor = conn.execute(sql, page_params)
+                names = [description[0] for description in conn_cursor.description]
+                data = [dict(zip(names, row)) for row in conn_cursor.fetchall()]
+                if limit:
+                    total_count = conn.execute(f"WITH search_hits AS ({hits}) SELECT COUNT(*) FROM ({query_sql}) AS records",
+                                               hit_params + params).fetchone()[0]
+                else:
+                    total_count = len(data)
+
+            if highlight:
+                snippets = ReviewSearch.snippets(query, [record['doc_id'] for record in data], highlight)
+                for record in data:
+                    record['snippet'] = snippets.get(record['doc_id'], '')
+            return {'success': True, 'data': data, 'total_count': total_count}
+
+        except Exception as e:
+            logger.error(f"Error searching reviews: {e}")
+            return {'success': False, 'error': str(e), 'data': []}
+
+    @staticmethod
+    def get_archived_statistics(review_type=None, start_date=None, end_date=None,
+                                authors=None, projects=None, score_range=None) -> list:
+        """
+        读取已归档（已从数据库删除）的审查记录，字段与 get_review_statistics 返回的数据一致，
+        并带有 archived=True 标记；归档中保存了原文，因此包含审查结果等大字段
+        """
+        from biz.utils.review_archive import ReviewArchive
+        start_ts = ReviewService._to_timestamp(start_date)
+        end_ts = ReviewService._to_timestamp(end_date, end_of_day=True)
+        columns = ReviewService._SUMMARY_COLUMNS + ReviewService._BLOB_COLUMNS
+        data = []
+        for table, column_index, _ in ReviewService._REVIEW_TABLES:
+            if (table == 'mr_review_log' and review_type not in (None, 'mr')) or \
+                    (table == 'push_review_log' and review_type not in (None, 'push')) or \
+                    (table == 'version_tracker' and review_type in ('mr', 'push')):
+                continue
+            for row in ReviewArchive.load(table, start_ts, end_ts, authors, projects):
+                if table == 'version_tracker' and review_type and row.get('review_type') != review_type:
+                    continue
+                # 与 _build_review_query 相同，评分缺失的记录留给调用方提取评分后筛选
+                score = row.get('score')
+                if score_range and score and score > 0 and not (score_range[0] <= score <= score_range[1]):
+                    continue
+                record = {column[0]: ReviewService._archived_value(column[column_index], row) for column in columns}
+                record['archived'] = True
+                data.append(record)
+        return sorted(data, key=lambda record: record['timestamp'] or 0, reverse=True)
+
+    @staticmethod
+    def _archived_value(expression: str, row: dict):
+        """按 _SUMMARY_COLUMNS 中的 SQL 表达式从归档记录取值"""
+        if expression == 'NULL':
+            return None
+        if expression.startswith("'"):
+            return expression.strip("'")
+        if '||' in expression:
+            return f"{row.get('source_branch')} → {row.get('target_branch')}"
+        return row.get(expression)
+
+    @staticmethod
+    def _detail_table(review_type: str) -> Tuple[str, int]:
+        """审查类型对应的 (表名, 字段序号)"""
+        if review_type == 'mr':
+            return 'mr_review_log', 1
+        if review_type == 'push':
+            return 'push_review_log', 2
+        return 'version_tracker', 3
+
+    @staticmethod
+    def get_review_details(keys: Iterable[Tuple[str, int]], batch_size: int = 500) -> Dict[Tuple[str, int], dict]:
+        """
+        批量获取审查记录的大字段（review_result/file_details/file_paths），用于导出和补全评分等需要原文的场景
+
+        :param keys: (审查类型, id) 列表，审查类型即列表数据中的 type 字段
+        :return: {(审查类型, id): {字段: 值}}，已删除的记录不在结果中
+        """
+        ids_by_table = {}
+        for review_type, review_id in keys:
+            table, column_index = ReviewService._detail_table(review_type)
+            ids_by_table.setdefault((table, column_index), {})[int(review_id)] = review_type
+        details = {}
+        try:
+            with get_connection(ReviewService.DB_FILE) as conn:
+                for (table, column_index), types_by_id in ids_by_table.items():
+                    select = ', '.join(f"{column[column_index]} AS {column[0]}" for column in ReviewService._BLOB_COLUMNS)
+                    ids = list(types_by_id)
+                    for start in range(0, len(ids), batch_size):
+                        chunk = ids[start:start + batch_size]
+                        cursor = conn.execute(f"SELECT id, {select} FROM {table} "
+                                              f"WHERE id IN ({','.join(['?'] * len(chunk))})", chunk)
+                        names = [description[0] for description in cursor.description]
+                        for row in cursor.fetchall():
+                            record = dict(zip(names, row))
+                            details[(types_by_id[record['id']], record.pop('id'))] = record
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error getting review details: {e}")
+            return {}
+        BlobStore.resolve_records(list(details.values()))
+        return details
+
+    @staticmethod
+    def get_review_detail(review_type: str, review_id: int) -> dict:
+        """按 id 获取单条审查记录的完整数据（包含审查结果和文件详情等大字段）"""
+        table, column_index = ReviewService._detail_table(review_type)
+        columns = ReviewService._SUMMARY_COLUMNS + ReviewService._BLOB_COLUMNS
+        select = ', '.join(f"{column[column_index]} AS {column[0]}" for column in columns)
+        try:
+            with get_connection(ReviewService.DB_FILE) as conn:
+                cursor = conn.execute(f"SELECT {select} FROM {table} WHERE id = ?", (int(review_id),))
+                row = cursor.fetchone()
+                if not row:
+                    return {}
+                detail = dict(zip([description[0] for description in cursor.description], row))
+            return BlobStore.resolve_records([detail])[0]
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error getting review detail {review_type} {review_id}: {e}")
+            return {}
+
     @staticmethod
     def retry_review(review_type, identifier):
         """
@@ -439,10 +857,10 @@ class ReviewService:
         :param identifier: 唯一标识（如id/commit_sha/version_hash）
         :return: 提交结果确认
         """
-        from biz.utils.queue import handle_queue
+        from biz.utils.queue import handle_queue, PRIORITY_RETRY
         
-        # 使用队列异步执行重新审查
-        handle_queue(ReviewService._async_retry_review, review_type, identifier)
+        # 使用队列异步执行重新审查，重新评审优先级最低
+        handle_queue(ReviewService._async_retry_review, review_type, identifier, priority=PRIORITY_RETRY)
         
         return {
             "success": True, 
@@ -452,6 +870,7 @@ class ReviewService:
         }
 
     @staticmethod
+    @ReviewWriteBuffer.batched
     def _async_retry_review(review_type, identifier):
         """
         异步执行重新AI评审的内部方法
@@ -472,7 +891,7 @@ class ReviewService:
         import time
         
         try:
-            conn = sqlite3.connect(ReviewService.DB_FILE)
+            conn = open_connection(ReviewService.DB_FILE)
             cursor = conn.cursor()
             
             if review_type == 'mr':
@@ -486,6 +905,7 @@ class ReviewService:
                 (id_, project_name, author, source_branch, target_branch, updated_at, 
                  commit_messages, score, url, review_result, additions, deletions, file_details) = row
                 
+                file_details = BlobStore.resolve(file_details)
                 if not file_details:
                     logger.error(f"MR记录 {identifier} 未存储结构化diff，无法重新AI审查")
                     return
@@ -501,7 +921,7 @@ class ReviewService:
                 # 更新数据库
                 cursor.execute(
                     "UPDATE mr_review_log SET review_result=?, score=?, updated_at=? WHERE id=?", 
-                    (new_review_result, new_score, reviewed_at, id_)
+                    (BlobStore.put(cursor, new_review_result), new_score, reviewed_at, id_)
                 )
                 conn.commit()
                 
@@ -539,6 +959,7 @@ class ReviewService:
                 (id_, project_name, author, branch, updated_at, commit_messages, 
                  score, review_result, additions, deletions, file_details) = row
                 
+                file_details = BlobStore.resolve(file_details)
                 if not file_details:
                     logger.error(f"Push记录 {identifier} 未存储结构化diff，无法重新AI审查")
                     return
@@ -554,7 +975,7 @@ class ReviewService:
                 # 更新数据库
                 cursor.execute(
                     "UPDATE push_review_log SET review_result=?, score=?, updated_at=? WHERE id=?", 
-                    (new_review_result, new_score, reviewed_at, id_)
+                    (BlobStore.put(cursor, new_review_result), new_score, reviewed_at, id_)
                 )
                 conn.commit()
                 
@@ -581,8 +1002,13 @@ class ReviewService:
                     logger.error(f"Push {identifier} 推送通知失败: {e}")
                 
             elif review_type in ['svn', 'github']:
-                cursor.execute("SELECT * FROM version_tracker WHERE version_hash=? OR commit_sha=? OR rowid=?", 
-                              (identifier, identifier, identifier))
+                # 只有纯数字的标识才按记录 id 匹配：MySQL 会把 '3fa...' 这样的哈希按前缀数字转换后与 id 比较
+                sql = "SELECT * FROM version_tracker WHERE version_hash=? OR commit_sha=?"
+                params = [identifier, identifier]
+                if str(identifier).isdigit():
+                    sql += " OR id=?"
+                    params.append(int(identifier))
+                cursor.execute(sql, params)
                 row = cursor.fetchone()
                 if not row:
                     logger.error(f"未找到版本追踪审查记录: {identifier}")
@@ -594,6 +1020,7 @@ class ReviewService:
                  commit_date, additions_count, deletions_count, file_details) = row
                 
                 # 执行AI审查
+                file_details = BlobStore.resolve(file_details)
                 try:
                     diff_struct = json.loads(file_details) if file_details else {}
                 except Exception:
@@ -608,7 +1035,7 @@ class ReviewService:
                 # 更新数据库
                 cursor.execute(
                     "UPDATE version_tracker SET review_result=?, score=?, reviewed_at=? WHERE version_hash=?", 
-                    (new_review_result, new_score, new_reviewed_at, version_hash)
+                    (BlobStore.put(cursor, new_review_result), new_score, new_reviewed_at, version_hash)
                 )
                 conn.commit()
                 
@@ -649,7 +1076,7 @@ class ReviewService:
     def upgrade_db_add_file_details():
         """升级数据库，为mr_review_log和push_review_log表增加file_details字段"""
         try:
-            with sqlite3.connect(ReviewService.DB_FILE) as conn:
+            with get_connection(ReviewService.DB_FILE) as conn:
                 cursor = conn.cursor()
                 for table in ["mr_review_log", "push_review_log"]:
                     cursor.execute(f"PRAGMA table_info({table})")
@@ -0,0 +1,56 @@
+from unittest import TestCase, main
+
+from biz.service.review_service import ReviewService
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.db_pool import get_connection
+from biz.utils.version_tracker import VersionTracker
+
+
+class TestReviewSummary(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        ReviewService.init_db()
+
+    def test_summary_follows_writes(self):
+        with get_connection(self.db_file) as conn:
+            conn.execute("INSERT INTO mr_review_log (project_name, author) VALUES ('a', 'alice')")
+            conn.execute("INSERT INTO push_review_log (project_name, author) VALUES ('b', 'bob')")
+        # 同一版本重复记录只计一次
+        VersionTracker.record_version_review('c', [{'id': 'r1'}], author='carol', review_type='svn')
+        VersionTracker.record_version_review('c', [{'id': 'r1'}], author='carol', review_type='svn')
+
+        self.assertEqual(ReviewService.get_review_counts(['mr', 'push', 'svn', 'github']),
+                         {'mr': 1, 'push': 1, 'svn': 1, 'github': 0})
+        self.assertEqual(ReviewService.get_distinct_authors(['push', 'svn']), ['bob', 'carol'])
+        self.assertEqual(ReviewService.get_distinct_projects(), ['a', 'b', 'c'])
+
+        with get_connection(self.db_file) as conn:
+            conn.execute("DELETE FROM mr_review_log")
+        self.assertEqual(ReviewService.get_distinct_authors(), ['bob', 'carol'])
+
+    def test_review_details_by_type_and_id(self):
+        with get_connection(self.db_file) as conn:
+            conn.execute("INSERT INTO push_review_log (project_name, author, review_result) VALUES ('b', 'bob', '总分: 80')")
+        VersionTracker.record_version_review('c', [{'id': 'r1'}], author='carol', review_type='svn',
+                                             review_result='OK')
+        page = ReviewService.get_review_statistics(include_blobs=False, limit=10)['data']
+        self.assertNotIn('review_result', page[0])
+
+        details = ReviewService.get_review_details([(record['type'], record['id']) for record in page] + [('mr', 99)])
+        self.assertEqual(details[('push', 1)]['review_result'], '总分: 80')
+        self.assertEqual(details[('svn', 1)]['review_result'], 'OK')
+        self.assertEqual(len(details), 2)
+
+
+    def test_score_range_keeps_unscored_rows(self):
+        with get_connection(self.db_file) as conn:
+            for author, score in (('a', 80), ('b', 30), ('c', 0), ('d', None)):
+                conn.execute("INSERT INTO push_review_log (project_name, author, score) VALUES ('p', ?, ?)",
+                             (author, score))
+        # 评分缺失的记录保留，由页面从审查结果提取评分后再筛选
+        data = ReviewService.get_review_statistics(score_range=(50, 100), include_blobs=False)['data']
+        self.assertEqual(sorted(record['author'] for record in data), ['a', 'c', 'd'])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,53 @@
+import io
+import json
 import os
+import queue
 import subprocess
+import tempfile
+import threading
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional, Tuple
+from types import SimpleNamespace
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 import re
 from urllib.parse import urlparse
 from biz.utils.log import logger
+from biz.utils.default_config import get_env_bool, get_env_with_default, get_env_int
+from biz.utils.svn_cache import SVNCache
+
+# get_commit_changes 支持的diff获取模式
+DIFF_MODE_SEQUENTIAL = 'sequential'  # 逐个文件串行获取
+DIFF_MODE_PARALLEL = 'parallel'      # 逐个文件并发获取
+DIFF_MODE_SINGLE = 'single'          # 单次 svn diff -c 获取整个提交，再按文件切分
 
 
 class SVNHandler:
     """SVN版本控制处理器"""
+
+    # 远程URL -> 仓库根URL，定时检查每次新建处理器时无需重复执行 svn info
+    _repo_root_urls: Dict[str, str] = {}
     
-    def __init__(self, svn_remote_url: str, svn_local_path: str, svn_username: str = None, svn_password: str = None):
+    def __init__(self, svn_remote_url: str, svn_local_path: str, svn_username: str = None, svn_password: str = None,
+                 diff_mode: str = None, diff_concurrency: int = None, remote_only: bool = None):
         """
         初始化SVN处理器
         :param svn_remote_url: SVN远程仓库URL
         :param svn_local_path: SVN仓库本地路径
         :param svn_username: SVN用户名
         :param svn_password: SVN密码
+        :param diff_mode: diff获取模式（sequential/parallel/single），默认读取 SVN_DIFF_MODE
+        :param diff_concurrency: parallel 模式下的最大并发数，默认读取 SVN_DIFF_CONCURRENCY
+        :param remote_only: 远程模式，提交日志、diff和文件内容都直接按URL获取，不签出也不更新工作副本，
+                            默认读取 SVN_REMOTE_ONLY（默认关闭）
         """
         self.svn_remote_url = svn_remote_url.rstrip('/')
         self.svn_local_path = svn_local_path
         self.svn_username = svn_username
         self.svn_password = svn_password
+        self.diff_mode = diff_mode or get_env_with_default('SVN_DIFF_MODE', DIFF_MODE_PARALLEL)
+        self.diff_concurrency = max(1, int(diff_concurrency or get_env_int('SVN_DIFF_CONCURRENCY', 4)))
+        self.remote_only = get_env_bool('SVN_REMOTE_ONLY', False) if remote_only is None else bool(remote_only)
         
         self._prepare_working_copy()
         # 获取仓库根URL
@@ -30,8 +55,11 @@ class SVNHandler:
 
     def _prepare_working_copy(self):
         """
-        准备SVN工作副本，如果不存在则签出
+        准备SVN工作副本，如果不存在则签出；远程模式下不签出
         """
+        if self.remote_only:
+            logger.info(f"远程模式，不准备工作副本: {self.svn_remote_url}")
+            return
         if not os.path.exists(self.svn_local_path):
             logger.info(f"本地路径 {self.svn_local_path} 不存在，创建目录...")
             os.makedirs(self.svn_local_path)
@@ -48,11 +76,13 @@ class SVNHandler:
 
     def _get_repo_root_url(self) -> str:
         """
-        获取SVN仓库的根URL
+        获取SVN仓库的根URL，直接查询远程URL，不依赖工作副本；同一远程URL在进程内只查询一次
         :return: 仓库根URL
         """
-        command = ['svn', 'info', '--show-item', 'repos-root-url']
-        stdout, stderr, returncode = self._run_svn_command(command, cwd=self.svn_local_path)
+        if self.svn_remote_url in SVNHandler._repo_root_urls:
+            return SVNHandler._repo_root_urls[self.svn_remote_url]
+        command = ['svn', 'info', '--show-item', 'repos-root-url', self.svn_remote_url]
+        stdout, stderr, returncode = self._run_svn_command(command, cwd=None)
         
         if returncode != 0:
             logger.error(f"获取仓库根URL失败: {stderr}")
@@ -62,78 +92,49 @@ class SVNHandler:
         
         repo_root_url = stdout.strip()
         logger.info(f"仓库根URL: {repo_root_url}")
+        SVNHandler._repo_root_urls[self.svn_remote_url] = repo_root_url
         return repo_root_url
     
-    def _run_svn_command(self, command: List[str], cwd: Optional[str] = None) -> Tuple[str, str, int]:
+    def _add_common_args(self, command: List[str], cwd: Optional[str] = None) -> List[str]:
+        """为SVN命令添加认证和非交互参数"""
+        # 添加认证参数
+        if self.svn_username and self.svn_password:
+            command.extend(['--username', self.svn_username, '--password', self.svn_password])
+        
+        # 添加非交互模式和信任服务器证书
+        command.extend(['--non-interactive', '--trust-server-cert-failures=unknown-ca,cn-mismatch,expired,not-yet-valid,other'])
+        
+        logger.info(f"执行SVN命令: {' '.join(command)} in {cwd or 'default cwd'}")
+        return command
+
+    def _run_svn_command(self, command: List[str], cwd: Optional[str] = None,
+                         binary: bool = False) -> Tuple[Union[str, bytes], str, int]:
         """
-        执行SVN命令
+        执行SVN命令：每次调用只启动一个 svn 进程，以二进制方式读取输出后解码一次
         :param command: SVN命令列表
         :param cwd: 命令执行的当前工作目录
+        :param binary: 为True时返回未解码的stdout，由调用方直接解析（如固定为UTF-8的 --xml 输出）
         :return: (stdout, stderr, returncode)
         """
         try:
-            # 添加认证参数
-            if self.svn_username and self.svn_password:
-                command.extend(['--username', self.svn_username, '--password', self.svn_password])
-            
-            # 添加非交互模式和信任服务器证书
-            command.extend(['--non-interactive', '--trust-server-cert-failures=unknown-ca,cn-mismatch,expired,not-yet-valid,other'])
-            
-            logger.info(f"执行SVN命令: {' '.join(command)} in {cwd or 'default cwd'}")
-            
-            # 尝试多种编码方式执行命令
-            encodings_to_try = ['utf-8', 'gbk', 'cp936', 'latin1']
-            
-            for encoding in encodings_to_try:
-                try:
-                    result = subprocess.run(
-                        command,
-                        cwd=cwd,
-                        capture_output=True,
-                        text=True,
-                        encoding=encoding,
-                        errors='replace'  # 遇到无法解码的字符时替换为 �
-                    )
-                    
-                    # 如果成功执行，返回结果
-                    return result.stdout, result.stderr, result.returncode
-                    
-                except UnicodeDecodeError:
-                    logger.warning(f"使用 {encoding} 编码执行SVN命令失败，尝试下一种编码...")
-                    continue
-                except Exception as e:
-                    logger.error(f"执行SVN命令时发生异常 (编码: {encoding}): {e}")
-                    continue
+            self._add_common_args(command, cwd)
+            result = subprocess.run(command, cwd=cwd, capture_output=True)
             
-            # 如果所有编码都失败，尝试使用二进制模式
-            logger.warning("所有文本编码都失败，尝试二进制模式...")
-            try:
-                result = subprocess.run(
-                    command,
-                    cwd=cwd,
-                    capture_output=True,
-                    text=False  # 二进制模式
-                )
-                
-                # 尝试解码输出
-                stdout = self._safe_decode(result.stdout)
-                stderr = self._safe_decode(result.stderr)
-                
-                return stdout, stderr, result.returncode
-                
-            except Exception as e:
-                logger.error(f"二进制模式执行SVN命令也失败: {e}")
-                return "", str(e), -1
+            # 输出编码取决于文件内容（UTF-8/GBK等），由 _safe_decode 按文件分段解码，不再按编码重复执行命令
+            stdout = result.stdout if binary else self._safe_decode(result.stdout)
+            return stdout, self._safe_decode(result.stderr), result.returncode
         
         except Exception as e:
             logger.error(f"执行SVN命令失败: {e}")
-            return "", str(e), -1
+            return b"" if binary else "", str(e), -1
     
     def update_working_copy(self) -> bool:
         """
-        更新SVN工作副本
+        更新SVN工作副本；远程模式下没有工作副本，直接返回
         :return: 更新是否成功
         """
+        if self.remote_only:
+            return True
         stdout, stderr, returncode = self._run_svn_command(['svn', 'update', '--ignore-externals'], cwd=self.svn_local_path)
         
         if returncode != 0:
@@ -298,7 +299,7 @@ class SVNHandler:
     
     def get_recent_commits(self, hours: int = 24, limit: int = 100) -> List[Dict]:
         """
-        获取最近的提交记录
+        获取最近的提交记录，已缓存的版本不再从服务器获取日志
         :param hours: 最近多少小时的提交
         :param limit: 限制提交数量
         :return: 提交记录列表
@@ -313,59 +314,200 @@ class SVNHandler:
             'svn', 'log', self.svn_remote_url,
             '--xml',
             '-r', f'{{{start_time_str}}}:{{{end_time_str}}}',
-            '-l', str(limit),
-            '-v'
+            '-l', str(limit)
         ]
+        # 缓存中最新日志条目的时间早于查询范围时，范围内不会有已缓存的版本，直接获取完整日志（同时写入缓存），
+        # 省去一次 -q 查询
+        latest = SVNCache.get(self.svn_repo_root_url, 'log', 'latest')
+        if latest is None or latest[:19] < start_time_str[:19]:
+            return list(self._stream_log(command + ['-v']))
         
+        # 先用 -q 只获取时间范围内的版本号（不含变更路径，数据量很小），已缓存的版本直接读取缓存
+        revisions = [commit['revision'] for commit in self._stream_log(command + ['-q'])]
+        commits = {}
+        for revision in revisions:
+            cached = SVNCache.get(self.svn_repo_root_url, 'log', revision)
+            if cached is not None:
+                commits[revision] = json.loads(cached)
+        missing = [int(revision) for revision in revisions if revision not in commits]
+        if missing:
+            logger.info(f"SVN日志缓存命中 {len(commits)} 个版本，获取其余 {len(missing)} 个版本")
+            command = ['svn', 'log', self.svn_remote_url, '--xml', '-r', f'{min(missing)}:{max(missing)}', '-v']
+            for commit in self._stream_log(command):
+                if int(commit['revision']) in missing:
+                    commits[commit['revision']] = commit
+        return [commits[revision] for revision in revisions if revision in commits]
+
+    def get_head_revision(self) -> Optional[int]:
+        """
+        获取仓库当前的HEAD版本号
+        :return: 版本号，失败时返回None
+        """
+        command = ['svn', 'info', '--show-item', 'revision', self.svn_remote_url]
         stdout, stderr, returncode = self._run_svn_command(command, cwd=None)
-        
-        if returncode != 0:
-            logger.error(f"获取SVN日志失败: {stderr}")
-            return []
-        
-        return self._parse_log_xml(stdout)
-    
-    def _parse_log_xml(self, xml_content: str) -> List[Dict]:
+        if returncode != 0 or not stdout.strip().isdigit():
+            logger.error(f"获取HEAD版本号失败: {stderr}")
+            return None
+        return int(stdout.strip())
+
+    def get_commits_since(self, start_revision: str, page_size: int = 100) -> Iterator[Dict]:
+        """
+        从 start_revision（含）到开始时的HEAD按版本号升序获取提交，直到追上HEAD
+        每次 svn log 最多获取 page_size 个提交，提交在日志下载过程中逐个返回，
+        调用方按顺序处理即可随时把检查点推进到已处理的最后一个版本，中断后从下一个版本继续，不重不漏
+        :param start_revision: 起始版本号，也可以是 svn 支持的 {日期}
+        :param page_size: 每次 svn log 的提交数量
+        :return: 提交记录的迭代器，获取失败时停止
+        """
+        head = self.get_head_revision()
+        if head is None:
+            return
+        start = str(start_revision)
+        page_size = max(1, int(page_size))
+        while not (start.isdigit() and int(start) > head):
+            command = [
+                'svn', 'log', self.svn_remote_url,
+                '--xml',
+                '-r', f'{start}:{head}',
+                '-l', str(page_size),
+                '-v'
+            ]
+            count, last_revision = 0, None
+            for commit in self._stream_log(command):
+                count, last_revision = count + 1, commit['revision']
+                yield commit
+            # 不足一页说明已追上HEAD（或获取失败，下次从已处理的版本继续）
+            if count < page_size:
+                return
+            start = str(int(last_revision) + 1)
+
+    # 已解析但调用方尚未取走的提交数上限，超过后读取线程暂停，svn 进程随管道写满而等待
+    LOG_QUEUE_SIZE = 256
+
+    def _stream_log(self, command: List[str]) -> Iterator[Dict]:
+        """
+        执行 svn log --xml 并边下载边解析：后台线程从管道增量解析日志，每解析出一个提交即返回给调用方，
+        调用方审查提交的同时日志继续下载（最多预先缓冲 LOG_QUEUE_SIZE 个提交）；
+        已解析的元素随即清除，内存占用与日志大小无关。获取或解析失败时记录错误，在已返回的提交之后结束。
+        调用方提前停止迭代（break/close）时终止 svn 进程并结束读取线程。
+        带 -v 的完整日志条目同时按版本写入 SVNCache
+        """
+        commits = queue.Queue(maxsize=self.LOG_QUEUE_SIZE)
+        end = object()
+        stopped = threading.Event()
+        state = SimpleNamespace(process=None)
+        verbose = '-v' in command
+
+        def put(item) -> bool:
+            # 队列已满时定期检查调用方是否已停止，避免读取线程永远阻塞
+            while not stopped.is_set():
+                try:
+                    commits.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read():
+            try:
+                with tempfile.TemporaryFile() as stderr:
+                    # stderr 写入临时文件，避免管道写满阻塞 svn 进程
+                    process = subprocess.Popen(self._add_common_args(command), stdout=subprocess.PIPE, stderr=stderr)
+                    state.process = process
+                    if stopped.is_set():
+                        process.terminate()
+                    parse_error, latest = None, ''
+                    try:
+                        # read1 有多少返回多少，不等待凑满 iterparse 请求的块大小
+                        for commit in self._iter_log_xml(SimpleNamespace(read=process.stdout.read1)):
+                            if verbose:
+                                # 带变更路径的完整日志条目按版本缓存
+                                SVNCache.put(json.dumps(commit, ensure_ascii=False),
+                                             self.svn_repo_root_url, 'log', commit['revision'])
+                                latest = max(latest, commit['date'] or '')
+                            if not put(commit):
+                                break
+                    except ET.ParseError as e:
+                        # svn 出错时输出的XML不完整，以 svn 的错误信息为准
+                        parse_error = e
+                    finally:
+                        process.stdout.close()
+                        if latest:
+                            self._update_latest_cached_log(latest)
+                    if process.wait() != 0:
+                        if not stopped.is_set():
+                            stderr.seek(0)
+                            logger.error(f"获取SVN日志失败: {self._safe_decode(stderr.read())}")
+                    elif parse_error is not None and not stopped.is_set():
+                        logger.error(f"解析SVN日志XML失败: {parse_error}")
+            except Exception as e:
+                logger.error(f"执行SVN命令失败: {e}")
+            finally:
+                put(end)
+
+        threading.Thread(target=read, name='svn-log-reader', daemon=True).start()
+        try:
+            while True:
+                commit = commits.get()
+                if commit is end:
+                    return
+                yield commit
+        finally:
+            # 调用方提前结束（GeneratorExit）时终止 svn 进程，并清空队列释放读取线程
+            stopped.set()
+            if state.process is not None and state.process.poll() is None:
+                try:
+                    state.process.terminate()
+                except OSError:
+                    pass
+            while True:
+                try:
+                    commits.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _update_latest_cached_log(self, date: str):
+        """记录缓存中最新日志条目的提交时间，get_recent_commits 据此判断查询范围内是否可能有缓存"""
+        current = SVNCache.get(self.svn_repo_root_url, 'log', 'latest')
+        if current is None or date > current:
+            SVNCache.put(date, self.svn_repo_root_url, 'log', 'latest')
+
+    @staticmethod
+    def _iter_log_xml(source) -> Iterator[Dict]:
+        """
+        增量解析SVN log的XML输出，每读完一个 logentry 返回一条提交记录并清除已解析的元素
+        :param source: 文件对象（如 svn 进程的 stdout），编码由XML声明指定
+        :return: 提交记录的迭代器
+        """
+        root = None
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if root is None:
+                root = element
+            if event != 'end' or element.tag != 'logentry':
+                continue
+            yield {
+                'revision': element.get('revision'),
+                'author': element.findtext('author', 'unknown'),
+                'date': element.findtext('date', ''),
+                'message': (element.findtext('msg') or '').strip(),
+                'paths': [{'action': path.get('action'), 'path': path.text}
+                          for path in element.iterfind('paths/path')]
+            }
+            root.clear()
+
+    def _parse_log_xml(self, xml_content: Union[str, bytes]) -> List[Dict]:
         """
-        解析SVN log的XML输出
+        解析完整的SVN log XML输出
         :param xml_content: XML内容
         :return: 解析后的提交记录
         """
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode('utf-8')
         commits = []
-        
         try:
-            root = ET.fromstring(xml_content)
-            
-            for logentry in root.findall('logentry'):
-                revision = logentry.get('revision')
-                author = logentry.find('author').text if logentry.find('author') is not None else 'unknown'
-                date = logentry.find('date').text if logentry.find('date') is not None else ''
-                message = logentry.find('msg').text if logentry.find('msg') is not None else ''
-                
-                paths = []
-                paths_element = logentry.find('paths')
-                if paths_element is not None:
-                    for path in paths_element.findall('path'):
-                        action = path.get('action')
-                        file_path = path.text
-                        paths.append({
-                            'action': action,
-                            'path': file_path
-                        })
-                
-                commit_info = {
-                    'revision': revision,
-                    'author': author,
-                    'date': date,
-                    'message': message.strip() if message else '',
-                    'paths': paths
-                }
-                
-                commits.append(commit_info)
-                
+            commits.extend(self._iter_log_xml(io.BytesIO(xml_content)))
         except ET.ParseError as e:
             logger.error(f"解析SVN日志XML失败: {e}")
-        
         return commits
     
     def get_file_diff(self, file_path: str, revision1: str, revision2: str) -> str:
@@ -376,6 +518,13 @@ class SVNHandler:
         :param revision2: 新版本号
         :return: 差异内容
         """
+        # 两个版本号都确定时结果不会变化，可以缓存
+        cacheable = str(revision1).isdigit() and str(revision2).isdigit()
+        if cacheable:
+            cached = SVNCache.get(self.svn_repo_root_url, 'diff', file_path, revision1, revision2)
+            if cached is not None:
+                return cached
+        
         target_url = f"{self.svn_repo_root_url}{file_path}"
         command = [
             'svn', 'diff',
@@ -389,6 +538,8 @@ class SVNHandler:
             logger.error(f"获取文件差异失败 ({target_url}): {stderr}")
             return ""
         
+        if cacheable:
+            SVNCache.put(stdout, self.svn_repo_root_url, 'diff', file_path, revision1, revision2)
         return stdout
     
     def get_commit_changes(self, commit: Dict) -> List[Dict]:
@@ -400,20 +551,35 @@ class SVNHandler:
         changes = []
         revision = commit['revision']
         prev_revision = str(int(revision) - 1)
-        
-        for path_info in commit['paths']:
-            file_path = path_info['path']
-            action = path_info['action']
-            
-            if action == 'D' or not self._is_supported_file(file_path):
-                continue
-            
-            diff_content = ""
-            if action == 'A':
-                diff_content = self._get_file_content(file_path, revision)
-            elif action == 'M':
-                diff_content = self.get_file_diff(file_path, prev_revision, revision)
-            
+
+        # 只有新增和修改的受支持文件需要获取内容
+        targets = [
+            (path_info['path'], path_info['action'])
+            for path_info in commit['paths']
+            if path_info['action'] in ('A', 'M') and self._is_supported_file(path_info['path'])
+        ]
+        if not targets:
+            return changes
+
+        diff_map = {}
+        if self.diff_mode == DIFF_MODE_SINGLE:
+            diff_map = self._get_revision_diff_map(revision)
+            # 新增文件在其他模式下取 svn cat 全文，这里从新增diff还原为相同格式，保证各模式的审查输入一致
+            for file_path, action in targets:
+                if action == 'A' and file_path in diff_map:
+                    content = self._added_content_from_diff(diff_map[file_path])
+                    if content is None:
+                        del diff_map[file_path]
+                    else:
+                        diff_map[file_path] = self._format_added_content(content)
+
+        # single 模式下未能切分出的文件（或其他模式下的全部文件）逐个获取
+        missing = [target for target in targets if target[0] not in diff_map]
+        if missing:
+            diff_map.update(self._fetch_file_diffs(missing, revision, prev_revision))
+
+        for file_path, action in targets:
+            diff_content = diff_map.get(file_path, "")
             if diff_content:
                 change = {
                     'new_path': os.path.basename(file_path),
@@ -424,9 +590,125 @@ class SVNHandler:
                     'deletions': self._count_deletions(diff_content)
                 }
                 changes.append(change)
-        
+
         return changes
-    
+
+    def _fetch_file_diff(self, file_path: str, action: str, revision: str, prev_revision: str) -> str:
+        """
+        获取单个文件在指定提交中的变更内容（新增文件取全文，修改文件取diff）
+        """
+        if action == 'A':
+            return self._get_file_content(file_path, revision)
+        return self.get_file_diff(file_path, prev_revision, revision)
+
+    def _fetch_file_diffs(self, targets: List[Tuple[str, str]], revision: str, prev_revision: str) -> Dict[str, str]:
+        """
+        按文件获取变更内容，parallel 模式下使用线程池并发执行，并发数受 diff_concurrency 限制
+        :param targets: (文件路径, 操作类型) 列表
+        :return: {文件路径: 变更内容}
+        """
+        if self.diff_mode == DIFF_MODE_SEQUENTIAL or self.diff_concurrency <= 1 or len(targets) <= 1:
+            return {
+                file_path: self._fetch_file_diff(file_path, action, revision, prev_revision)
+                for file_path, action in targets
+            }
+
+        with ThreadPoolExecutor(max_workers=min(self.diff_concurrency, len(targets))) as executor:
+            results = executor.map(
+                lambda target: self._fetch_file_diff(target[0], target[1], revision, prev_revision),
+                targets
+            )
+            return {file_path: diff for (file_path, _), diff in zip(targets, results)}
+
+    def _get_revision_diff_map(self, revision: str) -> Dict[str, str]:
+        """
+        通过一次 svn diff -c 获取整个提交的diff，并按文件切分
+        :param revision: 版本号
+        :return: {文件路径(从仓库根开始): diff内容}，失败时返回空字典
+        """
+        stdout = SVNCache.get(self.svn_repo_root_url, 'diff-c', revision)
+        if stdout is None:
+            # 与按文件获取的 svn diff 一致，保留属性变更
+            command = [
+                'svn', 'diff',
+                '-c', revision,
+                self.svn_repo_root_url
+            ]
+
+            stdout, stderr, returncode = self._run_svn_command(command, cwd=None)
+
+            if returncode != 0:
+                logger.warning(f"单次获取 r{revision} 的diff失败，回退为按文件获取: {stderr}")
+                return {}
+            SVNCache.put(stdout, self.svn_repo_root_url, 'diff-c', revision)
+
+        return self._split_diff_by_file(stdout)
+
+    @staticmethod
+    def _split_diff_by_file(diff_content: str) -> Dict[str, str]:
+        """
+        将 svn diff 的输出按 "Index: " 段落切分为单文件diff
+        旧版 svn 只有属性变更的文件没有 "Index: " 行，以 "Property changes on: " 开始新的段落
+        :param diff_content: 相对于仓库根URL的diff输出
+        :return: {文件路径(以/开头): diff内容}
+        """
+        file_diffs = {}
+        current_path = None
+        current_lines = []
+
+        for line in diff_content.splitlines(keepends=True):
+            path = None
+            if line.startswith('Index: '):
+                path = line[len('Index: '):]
+            elif line.startswith('Property changes on: '):
+                path = line[len('Property changes on: '):]
+            if path is not None:
+                path = '/' + path.strip().lstrip('/')
+            if path is not None and (line.startswith('Index: ') or path != current_path):
+                if current_path is not None:
+                    file_diffs[current_path] = file_diffs.get(current_path, '') + ''.join(current_lines)
+                current_path = path
+                current_lines = []
+            if current_path is not None:
+                current_lines.append(line)
+
+        if current_path is not None:
+            file_diffs[current_path] = file_diffs.get(current_path, '') + ''.join(current_lines)
+
+        return file_diffs
+
+    @staticmethod
+    def _added_content_from_diff(file_diff: str) -> Optional[str]:
+        """
+        从新增文件的diff段落还原文件全文（与 svn cat 的输出相同，不含属性变更），
+        无法还原（如二进制文件）时返回 None
+        """
+        lines = []
+        in_hunk = False
+        no_newline = False
+        for line in file_diff.split('\n'):
+            if line.startswith('@@'):
+                in_hunk = True
+            elif line.startswith('Property changes on: '):
+                break
+            elif line.startswith('Cannot display: '):
+                return None
+            elif in_hunk and line.startswith('+'):
+                lines.append(line[1:])
+            elif in_hunk and line.startswith('\\'):
+                no_newline = True
+            elif in_hunk and line:
+                # 新增文件的diff只应包含新增行
+                return None
+        if not lines:
+            return ''
+        return '\n'.join(lines) + ('' if no_newline else '\n')
+
+    @staticmethod
+    def _format_added_content(content: str) -> str:
+        """新增文件的全文按行加上 + 前缀作为变更内容"""
+        return '\n'.join(f"+{line}" for line in content.split('\n'))
+
     def _get_file_content(self, file_path: str, revision: str) -> str:
         """
         获取指定版本的文件内容
@@ -434,27 +716,29 @@ class SVNHandler:
         :param revision: 版本号
         :return: 文件内容
         """
-        target_url = f"{self.svn_repo_root_url}{file_path}"
-        command = [
-            'svn', 'cat',
-            '-r', revision,
-            target_url
-        ]
-        
-        stdout, stderr, returncode = self._run_svn_command(command, cwd=None)
-        
-        if returncode != 0:
-            logger.error(f"获取文件内容失败 ({target_url}): {stderr}")
-            return ""        
-        lines = stdout.split('\n')
-        diff_lines = [f"+{line}" for line in lines]
-        return '\n'.join(diff_lines)
+        cacheable = str(revision).isdigit()
+        stdout = SVNCache.get(self.svn_repo_root_url, 'cat', file_path, revision) if cacheable else None
+        if stdout is None:
+            target_url = f"{self.svn_repo_root_url}{file_path}"
+            command = [
+                'svn', 'cat',
+                '-r', revision,
+                target_url
+            ]
+            
+            stdout, stderr, returncode = self._run_svn_command(command, cwd=None)
+            
+            if returncode != 0:
+                logger.error(f"获取文件内容失败 ({target_url}): {stderr}")
+                return ""
+            if cacheable:
+                SVNCache.put(stdout, self.svn_repo_root_url, 'cat', file_path, revision)
+        return self._format_added_content(stdout)
     
     def _is_supported_file(self, file_path: str) -> bool:
         """
         检查文件类型是否受支持
         """
-        from biz.utils.default_config import get_env_with_default
         supported_extensions = get_env_with_default('SUPPORTED_EXTENSIONS').split(',')
         return any(file_path.endswith(ext) for ext in supported_extensions)
     
@@ -470,29 +754,42 @@ class SVNHandler:
         """
         return len(re.findall(r'^-(?!--)', diff_content, re.MULTILINE))
     
+    # svn diff 输出中每个文件以 "Index: " 行开头，不同文件可能使用不同编码
+    _SECTION_START = re.compile(rb'^(?=Index: )', re.MULTILINE)
+    # 旧编码回退：UTF-8 解码后非 ASCII 字符中替换字符超过该比例，才认为整段不是 UTF-8
+    _LEGACY_ENCODINGS = ('gbk',)
+    _REPLACEMENT_RATIO = 0.5
+
     def _safe_decode(self, binary_data: bytes) -> str:
         """
-        安全解码二进制数据，尝试多种编码
+        安全解码二进制数据：按文件分段解码，某个文件的编码不影响其他文件
         :param binary_data: 二进制数据
         :return: 解码后的字符串
         """
         if not binary_data:
             return ""
-        
-        encodings_to_try = ['utf-8', 'gbk', 'cp936', 'latin1', 'utf-16']
-        
-        for encoding in encodings_to_try:
+        return ''.join(self._decode_section(section)
+                       for section in self._SECTION_START.split(binary_data) if section)
+
+    def _decode_section(self, data: bytes) -> str:
+        """
+        解码一段输出：优先 UTF-8，个别非法字节替换为 U+FFFD 而不是整段改用其他编码；
+        只有替换字符占多数（整段是 GBK 等旧编码）时才尝试旧编码
+        """
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+        text = data.decode('utf-8', errors='replace')
+        non_ascii = sum(1 for char in text if ord(char) > 127)
+        if text.count('\ufffd') <= non_ascii * self._REPLACEMENT_RATIO:
+            return text
+        for encoding in self._LEGACY_ENCODINGS:
             try:
-                return binary_data.decode(encoding)
+                return data.decode(encoding)
             except UnicodeDecodeError:
                 continue
-        
-        # 如果所有编码都失败，使用 utf-8 并替换错误字符
-        try:
-            return binary_data.decode('utf-8', errors='replace')
-        except Exception:
-            # 最后的手段：转换为字符串表示
-            return str(binary_data)
+        return text
 
     def _clean_svn_database(self) -> bool:
         """
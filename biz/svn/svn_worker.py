@@ -1,7 +1,10 @@
 import os
 import json
+import threading
+import time
 import traceback
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
 from typing import List, Dict
 
 from biz.entity.review_entity import SvnReviewEntity
@@ -11,6 +14,7 @@ from biz.utils.code_reviewer import CodeReviewer
 from biz.utils.im import notifier
 from biz.utils.log import logger
 from biz.utils.config_manager import ConfigManager
+from biz.utils.write_buffer import ReviewWriteBuffer
 
 # === SVN增量检查集成 ===
 from biz.utils.svn_checkpoint import SVNCheckpointManager
@@ -97,12 +101,47 @@ def is_revision_recently_processed(repo_name: str, revision: str) -> bool:
 # === 简单的revision缓存 END ===
 
 
-def handle_multiple_svn_repositories(repositories_config: str = None, check_hours: int = None, check_limit: int = 100, trigger_type: str = "scheduled"):
+def acquire_svn_repo_lock(repo_name: str = "global"):
+    """为特定仓库获取互斥锁，成功返回文件对象，失败返回None（跨平台实现）"""
+    import portalocker
+    
+    # 为每个仓库创建独立的锁文件
+    safe_repo_name = "".join(c for c in repo_name if c.isalnum() or c in ('-', '_')).lower()
+    lockfile_path = f"log/svn_check_{safe_repo_name}.lock"
+    
+    try:
+        os.makedirs(os.path.dirname(lockfile_path), exist_ok=True)
+        lockfile = open(lockfile_path, "w")
+        try:
+            portalocker.lock(lockfile, portalocker.LOCK_EX | portalocker.LOCK_NB)
+            return lockfile
+        except portalocker.exceptions.LockException:
+            lockfile.close()
+            return None
+    except Exception:
+        return None
+
+
+def release_svn_repo_lock(lockfile):
+    """释放SVN仓库互斥锁（跨平台实现）"""
+    import portalocker
+    try:
+        portalocker.unlock(lockfile)
+        lockfile.close()
+    except Exception:
+        pass
+
+
+def handle_multiple_svn_repositories(repositories_config: str = None, check_hours: int = None, check_limit: int = 100, trigger_type: str = "scheduled") -> List[Dict]:
     """
-    处理多个SVN仓库的变更
+    并发处理多个SVN仓库的变更
+    并发数由 SVN_REPO_CONCURRENCY 控制，单个仓库的最长检查时间由 SVN_REPO_TIMEOUT 或仓库配置中的 check_timeout 控制；
+    超时后通知该仓库在处理完当前提交后停止（已处理的提交会更新检查点，剩余提交下次继续），随后释放仓库锁
     :param repositories_config: SVN仓库配置JSON字符串，如果为None则从环境变量读取
     :param check_hours: 检查最近多少小时的变更，如果为None则使用各仓库的配置
+    :return: 每个仓库的检查结果列表，包含 name、status、duration 等字段
     """
+    results = []
     try:
         # 解析仓库配置
         if repositories_config is None:
@@ -149,45 +188,129 @@ def handle_multiple_svn_repositories(repositories_config: str = None, check_hour
                 end = min(len(repositories_config), e.pos + 10)
                 context = repositories_config[start:end]
                 logger.error(f"错误上下文: {repr(context)}")
-            return
+            return results
         
         if not repositories:
             logger.info("没有配置SVN仓库")
-            return
-        
-        logger.info(f"开始检查 {len(repositories)} 个SVN仓库")
-        
-        # 处理每个仓库
-        for repo_config in repositories:
-            try:
-                repo_name = repo_config.get('name', 'unknown')
-                remote_url = repo_config.get('remote_url')
-                local_path = repo_config.get('local_path')
-                username = repo_config.get('username')
-                password = repo_config.get('password')
-                repo_check_hours = check_hours or repo_config.get('check_hours', 24)
-                # 使用仓库特定的check_limit，如果没有则使用全局默认值
-                repo_check_limit = repo_config.get('check_limit', check_limit)
-                
-                if not remote_url or not local_path:
-                    logger.error(f"仓库 {repo_name} 配置不完整，跳过")
+            return results
+        
+        max_workers = max(1, get_config_int('SVN_REPO_CONCURRENCY', 4))
+        default_timeout = get_config_int('SVN_REPO_TIMEOUT', 3600)
+        logger.info(f"开始检查 {len(repositories)} 个SVN仓库，并发数: {max_workers}")
+        
+        # 记录每个仓库实际开始检查的时间，超时从开始执行时计算而不是从提交时计算；由各扫描线程写入，读写都需要加锁
+        started_at = {}
+        started_lock = threading.Lock()
+        cancel_events = {index: threading.Event() for index in range(len(repositories))}
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='svn-scan')
+        futures = {}
+        for index, repo_config in enumerate(repositories):
+            future = executor.submit(_scan_svn_repository, index, repo_config, check_hours, check_limit,
+                                     trigger_type, started_at, started_lock, cancel_events[index])
+            futures[future] = (index, repo_config)
+        
+        results_by_index = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, repo_config = futures[future]
+                if index in results_by_index:
+                    # 已按超时上报的仓库不覆盖结果
                     continue
-                
-                logger.info(f"开始检查仓库: {repo_name}")
-                handle_svn_changes(remote_url, local_path, username, password, repo_check_hours, repo_check_limit, repo_name, trigger_type, repo_config)
-                
-            except Exception as e:
-                error_message = f'处理仓库 {repo_config.get("name", "unknown")} 时出现错误: {str(e)}\n{traceback.format_exc()}'
-                logger.error(error_message)
-                notifier.send_notification(content=error_message)
+                with started_lock:
+                    repo_started_at = started_at.get(index)
+                try:
+                    results_by_index[index] = future.result()
+                except Exception as e:
+                    results_by_index[index] = _scan_result(repo_config, 'failed', repo_started_at, str(e))
+            
+            # 检查正在执行的仓库是否超时；线程无法被强制终止，超时后通知其在当前提交处理完后停止
+            now = time.time()
+            with started_lock:
+                started_snapshot = dict(started_at)
+            for future in pending:
+                index, repo_config = futures[future]
+                repo_timeout = int(repo_config.get('check_timeout', default_timeout) or 0)
+                if index in results_by_index or cancel_events[index].is_set():
+                    continue
+                if repo_timeout > 0 and index in started_snapshot and now - started_snapshot[index] > repo_timeout:
+                    cancel_events[index].set()
+                    message = f'检查超过 {repo_timeout} 秒未完成，处理完当前提交后停止，剩余提交下次检查'
+                    logger.error(f"仓库 {repo_config.get('name', 'unknown')} {message}")
+                    results_by_index[index] = _scan_result(repo_config, 'timeout', started_snapshot[index], message)
+            # 已取消的仓库不再等待其结果（最多等到当前提交处理完）
+            pending = {future for future in pending if not cancel_events[futures[future][0]].is_set()}
+        
+        # 已取消的扫描线程会在处理完当前提交后退出并释放仓库锁，这里不阻塞等待
+        executor.shutdown(wait=False)
+        results = [results_by_index[index] for index in sorted(results_by_index)]
+        return results
                 
     except Exception as e:
         error_message = f'多仓库SVN变更检测出现未知错误: {str(e)}\n{traceback.format_exc()}'
         notifier.send_notification(content=error_message)
         logger.error('多仓库SVN变更检测出现未知错误: %s', error_message)
+        return results
 
 
-def handle_svn_changes(svn_remote_url: str, svn_local_path: str, svn_username: str = None, svn_password: str = None, check_hours: int = 24, check_limit: int = 100, repo_name: str = None, trigger_type: str = "scheduled", repo_config: dict = None):
+def _scan_result(repo_config: dict, status: str, started_at: float = None, message: str = '', **extra) -> Dict:
+    """构造单个仓库的检查结果"""
+    result = {
+        'name': repo_config.get('name', 'unknown'),
+        'status': status,
+        'duration': time.time() - started_at if started_at else 0.0,
+        'message': message,
+    }
+    result.update(extra)
+    return result
+
+
+def _scan_svn_repository(index: int, repo_config: dict, check_hours: int, check_limit: int,
+                         trigger_type: str, started_at: Dict, started_lock: threading.Lock,
+                         cancel_event: threading.Event = None) -> Dict:
+    """
+    在线程池中检查单个仓库，检查前获取仓库级互斥锁，与单仓库定时任务和手动触发互斥
+    """
+    scan_started_at = time.time()
+    with started_lock:
+        started_at[index] = scan_started_at
+    repo_name = repo_config.get('name', 'unknown')
+    remote_url = repo_config.get('remote_url')
+    local_path = repo_config.get('local_path')
+    username = repo_config.get('username')
+    password = repo_config.get('password')
+    repo_check_hours = check_hours or repo_config.get('check_hours', 24)
+    # 使用仓库特定的check_limit，如果没有则使用全局默认值
+    repo_check_limit = repo_config.get('check_limit', check_limit)
+    
+    if not remote_url or not local_path:
+        logger.error(f"仓库 {repo_name} 配置不完整，跳过")
+        return _scan_result(repo_config, 'invalid', scan_started_at, '配置不完整')
+    
+    lock = acquire_svn_repo_lock(repo_name)
+    if not lock:
+        logger.warning(f"仓库 {repo_name} 已有检查任务正在执行，跳过本次检查。")
+        return _scan_result(repo_config, 'skipped', scan_started_at, '已有检查任务正在执行')
+    
+    try:
+        logger.info(f"开始检查仓库: {repo_name}")
+        summary = handle_svn_changes(remote_url, local_path, username, password, repo_check_hours, repo_check_limit,
+                                     repo_name, trigger_type, repo_config, cancel_event=cancel_event)
+        status = 'success' if summary.get('success') else 'failed'
+        return _scan_result(repo_config, status, scan_started_at, summary.get('message', ''),
+                            commit_count=summary.get('commit_count', 0),
+                            processed_count=summary.get('processed_count', 0))
+    except Exception as e:
+        error_message = f'处理仓库 {repo_name} 时出现错误: {str(e)}\n{traceback.format_exc()}'
+        logger.error(error_message)
+        notifier.send_notification(content=error_message)
+        return _scan_result(repo_config, 'failed', scan_started_at, str(e))
+    finally:
+        release_svn_repo_lock(lock)
+
+
+def handle_svn_changes(svn_remote_url: str, svn_local_path: str, svn_username: str = None, svn_password: str = None, check_hours: int = 24, check_limit: int = 100, repo_name: str = None, trigger_type: str = "scheduled", repo_config: dict = None, cancel_event: threading.Event = None) -> Dict:
     """
     处理SVN变更事件 - 支持增量检查
     :param svn_remote_url: SVN远程仓库URL
@@ -195,88 +318,113 @@ def handle_svn_changes(svn_remote_url: str, svn_local_path: str, svn_username: s
     :param svn_username: SVN用户名
     :param svn_password: SVN密码
     :param check_hours: 检查最近多少小时的变更（仅在手动触发时使用）
-    :param check_limit: 限制检查的提交数量
+    :param check_limit: 限制检查的提交数量（定时增量检查时为每页的提交数量）
     :param repo_name: 仓库名称
+    :param cancel_event: 取消标记，每处理完一个提交检查一次，设置后停止处理剩余提交（已处理的提交仍会更新检查点）
+    :return: 检查摘要 {'success', 'commit_count', 'processed_count', 'message'}
     """
     try:
         display_name = repo_name or os.path.basename(svn_local_path)
         logger.info(f'开始检查SVN变更，仓库: {display_name}，远程URL: {svn_remote_url}')
         
-        # 创建SVN处理器
-        svn_handler = SVNHandler(svn_remote_url, svn_local_path, svn_username, svn_password)
+        # 创建SVN处理器（仓库配置中的 diff_mode / diff_concurrency 优先于全局配置）
+        repo_settings = repo_config or {}
+        svn_handler = SVNHandler(svn_remote_url, svn_local_path, svn_username, svn_password,
+                                 diff_mode=repo_settings.get('diff_mode'),
+                                 diff_concurrency=repo_settings.get('diff_concurrency'),
+                                 remote_only=repo_settings.get('remote_only'))
         
-        # 更新工作副本
-        if not svn_handler.update_working_copy():
+        # 更新工作副本（远程模式下日志、diff和文件内容都按URL获取，不需要更新）
+        if not svn_handler.remote_only and not svn_handler.update_working_copy():
             logger.error(f'仓库 {display_name} SVN工作副本更新失败')
-            return
+            return {'success': False, 'commit_count': 0, 'processed_count': 0, 'message': 'SVN工作副本更新失败'}
         
         # === 增量检查逻辑 ===
-        # 定时任务自动使用增量检查，手动触发使用固定时间窗口
+        # 定时任务按检查点中的revision增量检查，手动触发使用固定时间窗口
         if trigger_type == "scheduled":
-            # 定时任务使用增量检查
             # 初始化检查点管理器
             SVNCheckpointManager.init_db()
             
-            # 获取上次检查时间
-            last_check_time = SVNCheckpointManager.get_last_check_time(display_name)
-            current_time = int(datetime.now().timestamp())
-            
-            # 计算实际的检查时间范围（小时）
-            actual_check_hours = (current_time - last_check_time) / 3600
-            
-            logger.info(f'仓库 {display_name} 使用增量检查，上次检查: {datetime.fromtimestamp(last_check_time)}, 检查范围: {actual_check_hours:.1f} 小时')
-            
-            # 获取最近的提交（基于上次检查时间）
-            recent_commits = svn_handler.get_recent_commits(hours=actual_check_hours, limit=check_limit)
+            last_revision = SVNCheckpointManager.get_last_revision(display_name)
+            if last_revision is not None:
+                # 从上次处理的下一个revision开始，每次获取 check_limit 个提交直到追上HEAD
+                start_revision = str(last_revision + 1)
+                logger.info(f'仓库 {display_name} 使用增量检查，从 r{start_revision} 开始')
+            else:
+                # 首次检查还没有revision记录，从上次检查时间（默认24小时前）开始
+                last_check_time = SVNCheckpointManager.get_last_check_time(display_name)
+                start_revision = '{' + datetime.fromtimestamp(last_check_time, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') + '}'
+                logger.info(f'仓库 {display_name} 首次增量检查，从 {datetime.fromtimestamp(last_check_time)} 开始')
+            recent_commits = svn_handler.get_commits_since(start_revision, page_size=check_limit)
         else:
             # 手动触发使用固定时间窗口
             logger.info(f'仓库 {display_name} 使用固定时间窗口检查，检查范围: {check_hours} 小时')
             recent_commits = svn_handler.get_recent_commits(hours=check_hours, limit=check_limit)
         # === 增量检查逻辑 END ===
         
-        if not recent_commits:
-            logger.info(f'仓库 {display_name} 没有发现最近的SVN提交')
-            
-            # 即使没有新提交，也要更新检查点（定时任务）
-            if trigger_type == "scheduled":
-                SVNCheckpointManager.update_checkpoint(display_name)
-            
-            return
-        
-        logger.info(f'仓库 {display_name} 发现 {len(recent_commits)} 个最近的提交')
-        
         # 记录处理的最新revision（用于更新检查点）
         latest_revision = None
+        commit_count = 0
         processed_count = 0
-        
-        # 处理每个提交
-        for commit in recent_commits:
-            revision = commit.get('revision', '')
-            
-            # === 简单的revision重复检查 ===
-            if revision and is_revision_recently_processed(display_name, revision):
-                logger.info(f'SVN r{revision} 最近已处理，跳过')
-                continue
-            # === 简单的revision重复检查 END ===
+        cancelled = False
+        
+        # 提交在日志下载过程中逐个处理；审查记录批量写入，更新检查点之前全部提交
+        with ReviewWriteBuffer.batch():
+            for commit in recent_commits:
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    logger.warning(f'仓库 {display_name} 检查已超时取消，停止处理剩余提交')
+                    break
+                commit_count += 1
+                revision = commit.get('revision', '')
+
+                # 记录最新的revision（跳过的提交同样推进检查点）
+                if revision and (not latest_revision or int(revision) > int(latest_revision)):
+                    latest_revision = revision
+
+                # === 简单的revision重复检查 ===
+                if revision and is_revision_recently_processed(display_name, revision):
+                    logger.info(f'SVN r{revision} 最近已处理，跳过')
+                # === 简单的revision重复检查 END ===
+                else:
+                    process_svn_commit(svn_handler, commit, svn_local_path, display_name, trigger_type, repo_config)
+                    processed_count += 1
+
+                # 每处理 check_limit 个提交更新一次检查点（定时任务），中断后从下一个revision继续
+                if trigger_type == "scheduled" and check_limit and commit_count % check_limit == 0:
+                    ReviewWriteBuffer.flush()
+                    SVNCheckpointManager.update_checkpoint(display_name, latest_revision)
+        
+        if cancelled:
+            # 只推进到已处理的提交，剩余提交下次检查时继续
+            if trigger_type == "scheduled" and latest_revision:
+                SVNCheckpointManager.update_checkpoint(display_name, latest_revision)
+            return {'success': False, 'commit_count': commit_count, 'processed_count': processed_count,
+                    'message': '检查超时取消，剩余提交下次检查'}
+
+        if not commit_count:
+            logger.info(f'仓库 {display_name} 没有发现最近的SVN提交')
             
-            process_svn_commit(svn_handler, commit, svn_local_path, display_name, trigger_type, repo_config)
-            processed_count += 1
+            # 即使没有新提交，也要更新检查时间（定时任务）
+            if trigger_type == "scheduled":
+                SVNCheckpointManager.update_checkpoint(display_name)
             
-            # 记录最新的revision
-            if revision and (not latest_revision or int(revision) > int(latest_revision)):
-                latest_revision = revision
+            return {'success': True, 'commit_count': 0, 'processed_count': 0, 'message': '没有发现新的提交'}
         
-        logger.info(f'仓库 {display_name} 实际处理了 {processed_count} 个提交')
+        logger.info(f'仓库 {display_name} 发现 {commit_count} 个提交，实际处理了 {processed_count} 个提交')
         
         # 更新检查点（定时任务）
         if trigger_type == "scheduled":
             SVNCheckpointManager.update_checkpoint(display_name, latest_revision)
+        
+        return {'success': True, 'commit_count': commit_count, 'processed_count': processed_count, 'message': ''}
             
     except Exception as e:
         display_name = repo_name or os.path.basename(svn_local_path)
         error_message = f'仓库 {display_name} SVN变更检测出现未知错误: {str(e)}\n{traceback.format_exc()}'
         notifier.send_notification(content=error_message)
         logger.error('SVN变更检测出现未知错误: %s', error_message)
+        return {'success': False, 'commit_count': 0, 'processed_count': 0, 'message': str(e)}
 
 
 def process_svn_commit(svn_handler: SVNHandler, commit: Dict, svn_path: str, repo_name: str = None, trigger_type: str = "scheduled", repo_config: dict = None):
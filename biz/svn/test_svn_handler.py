@@ -0,0 +1,254 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import TestCase, main
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from biz.svn.svn_handler import SVNHandler
+from biz.utils.svn_cache import SVNCache
+
+
+def _log_xml(revisions):
+    entries = ''.join(
+        f'<logentry revision="{rev}"><author>alice</author><date>2024-01-01T00:00:00.000000Z</date>'
+        f'<paths><path action="M" kind="file">/trunk/a.py</path></paths><msg>r{rev}</msg></logentry>'
+        for rev in revisions)
+    return f'<?xml version="1.0" encoding="UTF-8"?><log>{entries}</log>'
+
+
+class TestSVNHandler(TestCase):
+    def setUp(self):
+        """不访问真实仓库：跳过工作副本准备，svn 命令由 _fake_svn 模拟"""
+        self.patches = [patch.object(SVNHandler, '_prepare_working_copy'),
+                        patch.object(SVNHandler, '_get_repo_root_url', return_value='https://svn.example.com/repo'),
+                        patch.object(SVNHandler, '_run_svn_command', side_effect=self._fake_svn),
+                        patch.object(SVNHandler, '_stream_log',
+                                     side_effect=lambda command: iter(self._parse(self._fake_svn(command)[0])))]
+        for svn_patch in self.patches:
+            svn_patch.start()
+        self.commands = []
+        self.handler = SVNHandler('https://svn.example.com/repo/trunk', '/tmp/unused')
+
+    def tearDown(self):
+        for svn_patch in self.patches:
+            svn_patch.stop()
+
+    def _parse(self, xml_content):
+        return self.handler._parse_log_xml(xml_content)
+
+    def _fake_svn(self, command, cwd=None, binary=False):
+        self.commands.append(command)
+        if command[1] == 'info':
+            return '25\n', '', 0
+        if command[1] == 'log':
+            revision_range = command[command.index('-r') + 1]
+            limit = int(command[command.index('-l') + 1]) if '-l' in command else None
+            # 按日期查询时返回全部版本
+            start, end = (0, 25) if revision_range.startswith('{') else map(int, revision_range.split(':'))
+            revisions = [rev for rev in (3, 10, 11, 12, 20, 25) if start <= rev <= end][:limit]
+            return _log_xml(revisions).encode('utf-8'), '', 0
+        if command[1] in ('diff', 'cat'):
+            return f'{command[1]} {command[-1]}\n', '', 0
+        return '', 'unexpected command', 1
+
+    def test_commits_since_pages_until_head(self):
+        commits = list(self.handler.get_commits_since('4', page_size=2))
+        self.assertEqual([commit['revision'] for commit in commits], ['10', '11', '12', '20', '25'])
+        self.assertEqual(commits[0], {'revision': '10', 'author': 'alice', 'date': '2024-01-01T00:00:00.000000Z',
+                                      'message': 'r10', 'paths': [{'action': 'M', 'path': '/trunk/a.py'}]})
+        # 下一页从上一页最后一个版本的下一个开始，终点固定为开始时的HEAD
+        self.assertEqual([command[command.index('-r') + 1] for command in self.commands if command[1] == 'log'],
+                         ['4:25', '12:25', '21:25'])
+
+    def test_diff_and_content_are_cached(self):
+        cache_dir = tempfile.mkdtemp()
+        with patch.dict(os.environ, {'SVN_CACHE_DIR': cache_dir, 'SVN_CACHE_ENABLED': '1'}):
+            for _ in range(2):
+                self.assertEqual(self.handler.get_file_diff('/trunk/a.py', '9', '10'),
+                                 'diff https://svn.example.com/repo/trunk/a.py\n')
+                self.assertEqual(self.handler._get_file_content('/trunk/b.py', '10'),
+                                 '+cat https://svn.example.com/repo/trunk/b.py\n+')
+            # 版本号不确定时不使用缓存
+            self.handler.get_file_diff('/trunk/a.py', '9', 'HEAD')
+            self.handler.get_file_diff('/trunk/a.py', '9', 'HEAD')
+        shutil.rmtree(cache_dir)
+        self.assertEqual([command[1] for command in self.commands], ['diff', 'cat', 'diff', 'diff'])
+
+    def test_recent_commits_skip_revision_list_on_cold_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        with patch.dict(os.environ, {'SVN_CACHE_DIR': cache_dir, 'SVN_CACHE_ENABLED': '1'}):
+            # 没有缓存时直接获取完整日志
+            self.assertEqual(len(self.handler.get_recent_commits()), 6)
+            self.assertEqual([command[-1] for command in self.commands], ['-v'])
+
+            # 缓存中有查询范围内的日志时先列出版本号，只获取未缓存的版本
+            self.commands.clear()
+            repo = 'https://svn.example.com/repo'
+            SVNCache.put(datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000000Z'), repo, 'log', 'latest')
+            for revision in ('3', '10'):
+                SVNCache.put(json.dumps({'revision': revision}), repo, 'log', revision)
+            commits = self.handler.get_recent_commits()
+        self.assertEqual([commit['revision'] for commit in commits], ['3', '10', '11', '12', '20', '25'])
+        self.assertEqual([command[command.index('-r') + 1] for command in self.commands][1:], ['11:25'])
+        self.assertEqual(self.commands[0][-1], '-q')
+
+    def test_commits_since_head_is_up_to_date(self):
+        self.assertEqual(list(self.handler.get_commits_since('26')), [])
+        self.assertEqual([command[1] for command in self.commands], ['info'])
+
+
+
+class TestDiffModes(TestCase):
+    MODIFIED = ('Index: trunk/a.py\n===================================================================\n'
+                '--- trunk/a.py\t(revision 9)\n+++ trunk/a.py\t(revision 10)\n'
+                '@@ -1 +1 @@\n-a = 1\n+a = 2\n')
+    ADDED = ('Index: trunk/new.py\n===================================================================\n'
+             '--- trunk/new.py\t(nonexistent)\n+++ trunk/new.py\t(revision 10)\n'
+             '@@ -0,0 +1,2 @@\n+x = 1\n+print(x)\n\\ No newline at end of file\n'
+             '\nProperty changes on: trunk/new.py\n___________________________________________________________________\n'
+             'Added: svn:eol-style\n## -0,0 +1 ##\n+native\n')
+
+    def _fake_svn(self, command, cwd=None, binary=False):
+        if command[1] == 'diff' and command[2] == '-c':
+            return self.MODIFIED + self.ADDED, '', 0
+        if command[1] == 'diff':
+            return self.MODIFIED, '', 0
+        if command[1] == 'cat':
+            return 'x = 1\nprint(x)', '', 0
+        return '', 'unexpected command', 1
+
+    def test_single_mode_matches_per_file_modes(self):
+        commit = {'revision': '10', 'paths': [{'action': 'M', 'path': '/trunk/a.py'},
+                                              {'action': 'A', 'path': '/trunk/new.py'}]}
+        changes = {}
+        with patch.object(SVNHandler, '_prepare_working_copy'), \
+                patch.object(SVNHandler, '_get_repo_root_url', return_value='https://svn.example.com/repo'), \
+                patch.object(SVNHandler, '_run_svn_command', side_effect=self._fake_svn), \
+                patch.dict(os.environ, {'SVN_CACHE_ENABLED': '0'}):
+            for mode in ('sequential', 'parallel', 'single'):
+                handler = SVNHandler('https://svn.example.com/repo/trunk', '/tmp/unused', diff_mode=mode)
+                changes[mode] = handler.get_commit_changes(commit)
+        self.assertEqual(changes['single'], changes['sequential'])
+        self.assertEqual(changes['parallel'], changes['sequential'])
+        self.assertEqual(changes['single'][1]['diff'], '+x = 1\n+print(x)')
+
+
+class TestRemoteOnly(TestCase):
+    def setUp(self):
+        self.commands = []
+        self.local_path = os.path.join(tempfile.mkdtemp(), 'wc')
+        self.patches = [patch.object(SVNHandler, '_run_svn_command', side_effect=self._fake_svn),
+                        patch.dict(SVNHandler._repo_root_urls, clear=True)]
+        for svn_patch in self.patches:
+            svn_patch.start()
+
+    def tearDown(self):
+        for svn_patch in self.patches:
+            svn_patch.stop()
+        shutil.rmtree(os.path.dirname(self.local_path))
+
+    def _fake_svn(self, command, cwd=None, binary=False):
+        self.commands.append((command, cwd))
+        if command[1] == 'checkout':
+            os.makedirs(os.path.join(cwd, '.svn'))
+        if command[1] == 'info':
+            return 'https://svn.example.com/repo\n', '', 0
+        return '', '', 0
+
+    def test_remote_only_skips_working_copy(self):
+        handler = SVNHandler('https://svn.example.com/repo/trunk', self.local_path, remote_only=True)
+        self.assertEqual(handler.svn_repo_root_url, 'https://svn.example.com/repo')
+        self.assertTrue(handler.update_working_copy())
+        # 只按URL查询了仓库根，没有签出或更新
+        self.assertEqual(self.commands, [(['svn', 'info', '--show-item', 'repos-root-url',
+                                           'https://svn.example.com/repo/trunk'], None)])
+        self.assertFalse(os.path.exists(self.local_path))
+
+    def test_full_checkout_when_disabled(self):
+        SVNHandler('https://svn.example.com/repo/trunk', self.local_path, remote_only=False)
+        self.assertEqual(self.commands[0][0],
+                         ['svn', 'checkout', '--ignore-externals', 'https://svn.example.com/repo/trunk', '.'])
+
+
+class TestRunSVNCommand(TestCase):
+    def test_single_process_decoded_once(self):
+        with patch.object(SVNHandler, '_prepare_working_copy'), \
+                patch.object(SVNHandler, '_get_repo_root_url', return_value=''):
+            handler = SVNHandler('https://svn.example.com/repo', '/tmp/unused')
+        # 以 python 代替 svn 输出 GBK 编码的内容，追加的 svn 参数只会进入 sys.argv
+        script = "import sys; sys.stdout.buffer.write('中文注释'.encode('gbk'))"
+        with patch('biz.svn.svn_handler.subprocess.run', wraps=subprocess.run) as run:
+            self.assertEqual(handler._run_svn_command([sys.executable, '-c', script]), ('中文注释', '', 0))
+            self.assertEqual(handler._run_svn_command([sys.executable, '-c', script], binary=True)[0],
+                             '中文注释'.encode('gbk'))
+        self.assertEqual(run.call_count, 2)
+
+    def test_decode_mixed_encodings(self):
+        with patch.object(SVNHandler, '_prepare_working_copy'), \
+                patch.object(SVNHandler, '_get_repo_root_url', return_value=''):
+            handler = SVNHandler('https://svn.example.com/repo', '/tmp/unused')
+        utf8_part = 'Index: a.py\n+# 中文注释\n'
+        gbk_part = 'Index: b.py\n+# 旧编码文件\n'
+        data = utf8_part.encode('utf-8') + gbk_part.encode('gbk')
+        # 每个文件按各自的编码解码
+        self.assertEqual(handler._safe_decode(data), utf8_part + gbk_part)
+        # 个别非法字节只替换该字节，其余 UTF-8 内容保持不变
+        self.assertEqual(handler._safe_decode('中文注释'.encode('utf-8') + b'\xff'), '中文注释\ufffd')
+
+    def test_stream_log_yields_entries_before_exit(self):
+        with patch.object(SVNHandler, '_prepare_working_copy'), \
+                patch.object(SVNHandler, '_get_repo_root_url', return_value=''):
+            handler = SVNHandler('https://svn.example.com/repo', '/tmp/unused')
+        # 输出第一条记录后等待标记文件出现，第一条记录应在进程结束前返回
+        flag = os.path.join(tempfile.mkdtemp(), 'continue')
+        xml = _log_xml([1, 2])
+        split = xml.index('<logentry revision="2"')
+        script = (f"import os, sys, time\n"
+                  f"sys.stdout.write({xml[:split]!r}); sys.stdout.flush()\n"
+                  f"while not os.path.exists({flag!r}): time.sleep(0.01)\n"
+                  f"sys.stdout.write({xml[split:]!r})\n")
+        commits = handler._stream_log([sys.executable, '-c', script])
+        self.assertEqual(next(commits)['revision'], '1')
+        open(flag, 'w').close()
+        self.assertEqual([commit['revision'] for commit in commits], ['2'])
+
+        # svn 出错时在已返回的记录之后结束
+        failing = f"import sys; sys.stdout.write({xml[:split]!r}); sys.exit(1)"
+        self.assertEqual([c['revision'] for c in handler._stream_log([sys.executable, '-c', failing])], ['1'])
+
+
+    def test_stream_log_stops_process_when_consumer_stops(self):
+        with patch.object(SVNHandler, '_prepare_working_copy'), \
+                patch.object(SVNHandler, '_get_repo_root_url', return_value=''):
+            handler = SVNHandler('https://svn.example.com/repo', '/tmp/unused')
+        # 输出的记录超过队列容量后一直不退出，调用方停止迭代后进程和读取线程都应结束
+        xml = _log_xml(range(1, 6))
+        script = (f"import sys, time\n"
+                  f"sys.stdout.write({xml[:xml.rindex('</log>')]!r}); sys.stdout.flush()\n"
+                  f"time.sleep(60)\n")
+        processes, real_popen = [], subprocess.Popen
+
+        def spawn(*args, **kwargs):
+            processes.append(real_popen(*args, **kwargs))
+            return processes[-1]
+
+        with patch.object(SVNHandler, 'LOG_QUEUE_SIZE', 2), \
+                patch('biz.svn.svn_handler.subprocess.Popen', side_effect=spawn):
+            commits = handler._stream_log([sys.executable, '-c', script])
+            self.assertEqual(next(commits)['revision'], '1')
+            commits.close()
+        self.assertNotEqual(processes[0].wait(timeout=10), 0)
+        for thread in threading.enumerate():
+            if thread.name == 'svn-log-reader':
+                thread.join(timeout=10)
+                self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    main()
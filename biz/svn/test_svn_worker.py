@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.svn import svn_worker
+
+
+class TestMultipleRepositories(TestCase):
+    def setUp(self):
+        """仓库锁文件写在相对路径 log/ 下，切换到临时目录，避免在工作区留下锁文件"""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
+
+    def test_timeout_cancels_scan_and_releases_lock(self):
+        finished = threading.Event()
+
+        def slow_scan(*args, cancel_event=None, **kwargs):
+            # 模拟逐个处理提交，每个提交之间检查取消标记
+            while not cancel_event.is_set():
+                time.sleep(0.05)
+            finished.set()
+            return {'success': False, 'commit_count': 1, 'processed_count': 1, 'message': ''}
+
+        repositories = json.dumps([{'name': 'timeout-test', 'remote_url': 'svn://example/repo',
+                                    'local_path': '/tmp/unused', 'check_timeout': 1}])
+        with patch.object(svn_worker, 'handle_svn_changes', side_effect=slow_scan):
+            results = svn_worker.handle_multiple_svn_repositories(repositories)
+            self.assertTrue(finished.wait(5))
+        self.assertEqual([result['status'] for result in results], ['timeout'])
+        # 扫描线程退出后仓库锁已释放
+        for _ in range(50):
+            lock = svn_worker.acquire_svn_repo_lock('timeout-test')
+            if lock:
+                break
+            time.sleep(0.1)
+        self.assertIsNotNone(lock)
+        svn_worker.release_svn_repo_lock(lock)
+
+
+if __name__ == '__main__':
+    main()
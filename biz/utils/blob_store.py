@@ -0,0 +1,240 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from biz.utils.db_pool import get_connection
+from biz.utils.default_config import get_env_bool, get_env_int
+from biz.utils.log import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class BlobStore:
+    """
+    大字段存储 - 审查结果、文件详情等大文本压缩后按内容哈希存入 review_blobs 表，
+    审查记录中只保存 "blob:<sha256>" 引用：
+    - 审查记录表保持紧凑，列表和统计查询不再把大字段读入页缓存
+    - 内容相同的文本（重复推送、复用的审查结果）只存一份
+    - 只有详情页、重新审查等真正需要原文时才读取并解压
+
+    安装了 zstandard 时使用 zstd 压缩，否则使用 zlib；读取时按记录的压缩算法解压。
+    旧数据中的内联文本可以直接读取，可用 scripts/migrate_review_blobs.py 迁移
+    """
+    DB_FILE = "data/data.db"
+    REF_PREFIX = "blob:"
+    _REF_RE = re.compile(r'^blob:[0-9a-f]{64}$')
+
+    # 解压结果缓存，避免界面刷新时重复解压同一条审查结果
+    _cache: "OrderedDict[str, str]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    _CACHE_SIZE = 128
+    _initialized_pid = None
+
+    @staticmethod
+    def init_db():
+        """初始化大字段存储表"""
+        try:
+            with get_connection(BlobStore.DB_FILE) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS review_blobs (
+                        hash TEXT PRIMARY KEY,
+                        codec TEXT NOT NULL,
+                        size INTEGER DEFAULT 0,
+                        data BLOB NOT NULL,
+                        created_at INTEGER
+                    )
+                ''')
+                conn.commit()
+            BlobStore._initialized_pid = os.getpid()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Blob store database initialization failed: {e}")
+
+    @staticmethod
+    def is_ref(value) -> bool:
+        return isinstance(value, str) and bool(BlobStore._REF_RE.match(value))
+
+    @staticmethod
+    def _compress(raw: bytes):
+        if zstandard is not None:
+            return 'zstd', zstandard.ZstdCompressor(level=get_env_int('BLOB_ZSTD_LEVEL', 6)).compress(raw)
+        return 'zlib', zlib.compress(raw, 6)
+
+    @staticmethod
+    def _decompress(codec: str, data: bytes) -> bytes:
+        if codec == 'zlib':
+            return zlib.decompress(data)
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("读取 zstd 压缩的数据需要安装 zstandard: pip install zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        if codec == 'raw':
+            return data
+        raise ValueError(f"未知的压缩算法: {codec}")
+
+    @staticmethod
+    def put(cursor, text: Optional[str]) -> Optional[str]:
+        """
+        保存文本并返回应写入审查记录的值：超过 BLOB_MIN_SIZE 字节时返回引用，否则原样返回
+        使用调用方的 cursor，使大字段与审查记录在同一个事务中写入
+
+        :param cursor: 审查记录所在数据库的 cursor
+        :param text: 审查结果、文件详情等文本
+        """
+        if not text or not isinstance(text, str) or BlobStore.is_ref(text):
+            return text
+        if not get_env_bool('BLOB_STORAGE_ENABLED', True):
+            return text
+        raw = text.encode('utf-8')
+        if len(raw) < get_env_int('BLOB_MIN_SIZE', 1024):
+            return text
+
+        if BlobStore._initialized_pid != os.getpid():
+            # 只使用 VersionTracker 等、未经过 ReviewService.init_db 的进程
+            BlobStore.init_db()
+        digest = hashlib.sha256(raw).hexdigest()
+        # 用 UPDATE 判断是否已存在：同时获取写锁，避免与 gc 并发时刚复用的内容被删除
+        cursor.execute('UPDATE review_blobs SET created_at = ? WHERE hash = ?', (int(time.time()), digest))
+        if cursor.rowcount == 0:
+            codec, data = BlobStore._compress(raw)
+            if len(data) >= len(raw):
+                codec, data = 'raw', raw
+            cursor.execute('''
+                INSERT OR IGNORE INTO review_blobs (hash, codec, size, data, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (digest, codec, len(raw), sqlite3.Binary(data), int(time.time())))
+        return BlobStore.REF_PREFIX + digest
+
+    @staticmethod
+    def resolve(value: Optional[str]) -> Optional[str]:
+        """将引用还原为原文，非引用的值原样返回"""
+        if not BlobStore.is_ref(value):
+            return value
+        return BlobStore.resolve_many([value]).get(value, '')
+
+    @staticmethod
+    def resolve_many(values: Iterable[Optional[str]]) -> Dict[str, str]:
+        """批量还原引用，返回 {引用: 原文}；读取失败的引用对应空字符串"""
+        refs = {value for value in values if BlobStore.is_ref(value)}
+        resolved = {}
+        with BlobStore._cache_lock:
+            for ref in list(refs):
+                if ref in BlobStore._cache:
+                    BlobStore._cache.move_to_end(ref)
+                    resolved[ref] = BlobStore._cache[ref]
+                    refs.discard(ref)
+        if not refs:
+            return resolved
+
+        hashes = [ref[len(BlobStore.REF_PREFIX):] for ref in refs]
+        try:
+            with get_connection(BlobStore.DB_FILE) as conn:
+                rows = []
+                # 分批查询，避免超过 SQLite 的参数个数上限
+                for start in range(0, len(hashes), 500):
+                    batch = hashes[start:start + 500]
+                    rows.extend(conn.execute(
+                        f"SELECT hash, codec, data FROM review_blobs WHERE hash IN ({','.join(['?'] * len(batch))})",
+                        batch).fetchall())
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error reading review blobs: {e}")
+            rows = []
+
+        for digest, codec, data in rows:
+            ref = BlobStore.REF_PREFIX + digest
+            try:
+                resolved[ref] = BlobStore._decompress(codec, bytes(data)).decode('utf-8')
+            except Exception as e:
+                logger.error(f"Error decompressing review blob {digest[:12]}: {e}")
+                continue
+            with BlobStore._cache_lock:
+                BlobStore._cache[ref] = resolved[ref]
+                while len(BlobStore._cache) > BlobStore._CACHE_SIZE:
+                    BlobStore._cache.popitem(last=False)
+
+        for ref in refs:
+            if ref not in resolved:
+                logger.warning(f"Review blob not found: {ref}")
+                resolved[ref] = ''
+        return resolved
+
+    @staticmethod
+    def resolve_records(records: List[Dict], columns: Iterable[str] = ('review_result', 'file_details')) -> List[Dict]:
+        """就地还原记录列表中指定字段的引用"""
+        columns = list(columns)
+        resolved = BlobStore.resolve_many(record.get(column) for record in records for column in columns)
+        if resolved:
+            for record in records:
+                for column in columns:
+                    if record.get(column) in resolved:
+                        record[column] = resolved[record[column]]
+        return records
+
+    @staticmethod
+    def resolve_dataframe(df, columns: Iterable[str] = ('review_result', 'file_details')):
+        """就地还原 DataFrame 中指定列的引用"""
+        columns = [column for column in columns if column in df.columns]
+        if df.empty or not columns:
+            return df
+        resolved = BlobStore.resolve_many(value for column in columns for value in df[column])
+        if resolved:
+            for column in columns:
+                df[column] = df[column].map(lambda value: resolved.get(value, value) if isinstance(value, str) else value)
+        return df
+
+    # 保存引用的字段：表名 -> 字段列表
+    REF_COLUMNS = {
+        'mr_review_log': ['review_result', 'file_details'],
+        'push_review_log': ['review_result', 'file_details'],
+        'version_tracker': ['review_result', 'file_details'],
+    }
+
+    @staticmethod
+    def migrate(table: str, batch_size: int = 500) -> int:
+        """
+        将表中已有的内联大字段迁移到 review_blobs，返回迁移的字段数
+        按 id 分批处理，每批一个事务，可以在服务运行时执行
+        """
+        columns = BlobStore.REF_COLUMNS[table]
+        min_size = get_env_int('BLOB_MIN_SIZE', 1024)
+        condition = ' OR '.join(f"(length(CAST({column} AS BLOB)) >= {int(min_size)} AND {column} NOT LIKE 'blob:%')"
+                                for column in columns)
+        migrated, last_id = 0, 0
+        while True:
+            with get_connection(BlobStore.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT id, {', '.join(columns)} FROM {table} WHERE id > ? AND ({condition}) "
+                               f"ORDER BY id LIMIT ?", (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    return migrated
+                for row in rows:
+                    values = [BlobStore.put(cursor, value) for value in row[1:]]
+                    migrated += sum(1 for old, new in zip(row[1:], values) if old != new)
+                    cursor.execute(f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                                   (*values, row[0]))
+                conn.commit()
+                last_id = rows[-1][0]
+
+    @staticmethod
+    def gc() -> int:
+        """删除已没有审查记录引用的大字段（审查记录被清理后调用），返回删除数量"""
+        references = ' UNION '.join(
+            f"SELECT substr({column}, {len(BlobStore.REF_PREFIX) + 1}) FROM {table} WHERE {column} LIKE 'blob:%'"
+            for table, columns in BlobStore.REF_COLUMNS.items() for column in columns)
+        try:
+            with get_connection(BlobStore.DB_FILE) as conn:
+                cursor = conn.execute(f"DELETE FROM review_blobs WHERE hash NOT IN ({references})")
+                conn.commit()
+                return cursor.rowcount
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error cleaning up review blobs: {e}")
+            return 0
@@ -1,4 +1,7 @@
+import ast
+import json
 import re
+from typing import Dict, List, Optional, Tuple
 
 
 class GitDiffParser:
@@ -44,3 +47,40 @@ class GitDiffParser:
         if self.new_code is None:
             self.parse_diff()
         return self.new_code
+
+
+def parse_changes_text(changes_text: str) -> Optional[Tuple[List[Dict], Optional[Dict], bool]]:
+    """
+    解析传给 CodeReviewer 的变更文本
+    支持 str(changes) 形式的列表、JSON列表以及SVN结构化diff JSON（{"files": [...], "commits": [...]}）
+
+    :return: (文件变更列表, 结构化diff中除files外的字段, 原文本是否为JSON)，无法解析时返回 None
+    """
+    is_json = True
+    try:
+        data = json.loads(changes_text)
+    except (ValueError, TypeError):
+        is_json = False
+        try:
+            data = ast.literal_eval(changes_text)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+
+    envelope = None
+    if isinstance(data, dict):
+        envelope = {key: value for key, value in data.items() if key != 'files'}
+        data = data.get('files')
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        return None
+    return data, envelope, is_json
+
+
+def format_changes_text(files: List[Dict], envelope: Optional[Dict] = None, is_json: bool = False) -> str:
+    """
+    将文件变更列表按 parse_changes_text 解析前的格式重新序列化
+    """
+    if envelope is not None:
+        return json.dumps({'files': files, **envelope}, ensure_ascii=False, indent=2)
+    if is_json:
+        return json.dumps(files, ensure_ascii=False)
+    return str(files)
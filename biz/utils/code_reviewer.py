@@ -1,14 +1,19 @@
 import abc
+import asyncio
 import os
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 import yaml
 from jinja2 import Template
 
+from biz.llm.client.base import run_coroutine
 from biz.llm.factory import Factory
+from biz.llm.rate_limiter import RateLimiter
+from biz.utils.code_parser import parse_changes_text, format_changes_text
 from biz.utils.log import logger
-from biz.utils.token_util import count_tokens, truncate_text_by_tokens
+from biz.utils.review_cache import ReviewCache
+from biz.utils.token_util import count_tokens, count_tokens_batch, is_within_token_limit, truncate_text_by_tokens
 from biz.utils.default_config import get_env_with_default, get_env_int
 
 
@@ -118,7 +123,8 @@ class BaseReviewer(abc.ABC):
 
     def __init__(self, prompt_key: str):
         self.client = Factory().getClient()
-        self.prompts = self._load_prompts(prompt_key, get_env_with_default("REVIEW_STYLE"))
+        self.style = get_env_with_default("REVIEW_STYLE")
+        self.prompts = self._load_prompts(prompt_key, self.style)
 
     def _load_prompts(self, prompt_key: str, style="professional") -> Dict[str, Any]:
         """加载提示词配置"""
@@ -146,7 +152,16 @@ class BaseReviewer(abc.ABC):
     def call_llm(self, messages: List[Dict[str, Any]]) -> str:
         """调用 LLM 进行代码审核"""
         logger.info(f"向 AI 发送代码 Review 请求, messages: {messages}")
-        review_result = self.client.completions(messages=messages)
+        with RateLimiter.limit(messages):
+            review_result = self.client.completions(messages=messages)
+        logger.info(f"收到 AI 返回结果: {review_result}")
+        return review_result
+
+    async def acall_llm(self, messages: List[Dict[str, Any]]) -> str:
+        """异步调用 LLM 进行代码审核，便于在同一个工作进程中并发发起多个请求"""
+        logger.info(f"向 AI 发送代码 Review 请求（异步）, messages: {messages}")
+        async with RateLimiter.alimit(messages):
+            review_result = await self.client.acompletions(messages=messages)
         logger.info(f"收到 AI 返回结果: {review_result}")
         return review_result
 
@@ -164,44 +179,168 @@ class CodeReviewer(BaseReviewer):
 
     def review_and_strip_code(self, changes_text: str, commits_text: str = "") -> str:
         """
-        Review判断changes_text超出取前REVIEW_MAX_TOKENS个token，超出则截断changes_text，
+        Review changes_text，超出REVIEW_MAX_TOKENS时按文件拆分成多个批次并发审查后合并结果，
         调用review_code方法，返回review_result，如果review_result是markdown格式，则去掉头尾的```
         :param changes_text:
-        :param commits_text:        :return:
+        :param commits_text:
+        :return:
         """
-        # 如果超长，取前REVIEW_MAX_TOKENS个token
-        review_max_tokens = get_env_int("REVIEW_MAX_TOKENS")
         # 如果changes为空,打印日志
         if not changes_text:
             logger.info("代码为空, diffs_text = %", str(changes_text))
             return "代码为空"
-
-        # 计算tokens数量，如果超过REVIEW_MAX_TOKENS，截断changes_text
-        #tokens_count = count_tokens(changes_text)
-        #if tokens_count > review_max_tokens:
-        #    changes_text = truncate_text_by_tokens(changes_text, review_max_tokens)
-        #logger.debug(f"Reviewing code with {tokens_count} tokens, truncated to {len(changes_text)} characters if necessary.")
         logger.debug(f"commits_text with {commits_text} ")
 
-        # 调用review_code方法
-        review_result = self.review_code(changes_text, commits_text).strip()
+        # 相同diff内容（如cherry-pick、rebase后重新推送）直接复用缓存的审查结果
+        cache_key = None
+        if ReviewCache.is_enabled():
+            cache_key = ReviewCache.build_key(changes_text, self._prompt_template(), self.style, self._model_name())
+            cached_result = ReviewCache.get(cache_key)
+            if cached_result:
+                logger.info(f"命中审查结果缓存 {cache_key[:8]}...，跳过大模型调用")
+                return cached_result
+
+        # 计算tokens数量，如果超过REVIEW_MAX_TOKENS，分批审查
+        review_max_tokens = get_env_int("REVIEW_MAX_TOKENS")
+        if review_max_tokens > 0 and not is_within_token_limit(changes_text, review_max_tokens):
+            logger.info(f"变更内容超过 REVIEW_MAX_TOKENS={review_max_tokens}，按文件分批审查")
+            review_result = self._review_in_chunks(changes_text, commits_text, review_max_tokens)
+        else:
+            review_result = self._review_once(changes_text, commits_text)
+
+        if review_result and cache_key:
+            ReviewCache.put(cache_key, review_result, self._model_name())
+        return review_result
+
+    def _review_once(self, changes_text: str, commits_text: str = "") -> str:
+        """单次调用大模型审查，失败时返回None"""
+        return self._strip_review_result(self.review_code(changes_text, commits_text))
+
+    async def _areview_once(self, changes_text: str, commits_text: str = "") -> str:
+        """_review_once 的异步版本"""
+        return self._strip_review_result(await self.areview_code(changes_text, commits_text))
+
+    @staticmethod
+    def _strip_review_result(review_result: str) -> str:
+        review_result = (review_result or "").strip()
         # 检查是否是API错误消息
         if is_api_error_message(review_result):
             logger.error(f"检测到API错误，跳过写入审查结果: {review_result[:100]}...")
             return None  # 返回None表示应该跳过写入
-        
+
         # 验证审查结果
         if not review_result:
             logger.warning("AI返回的审查结果为空")
             return None  # 返回None表示应该跳过写入
-            
+
         if review_result.startswith("```markdown") and review_result.endswith("```"):
-            return review_result[11:-3].strip()
+            review_result = review_result[11:-3].strip()
         return review_result
 
+    def _review_in_chunks(self, changes_text: str, commits_text: str, max_tokens: int) -> str:
+        """
+        Map-Reduce 审查：按文件把变更打包成不超过 max_tokens 的批次，并发审查后合并为一份结果，
+        总耗时取决于最慢的批次而不是变更总量
+        """
+        parsed = parse_changes_text(changes_text)
+        if parsed is None:
+            # 无法识别为文件列表时退化为截断
+            logger.warning("无法按文件拆分变更内容，截断至 REVIEW_MAX_TOKENS 后审查")
+            return self._review_once(truncate_text_by_tokens(changes_text, max_tokens), commits_text)
+
+        files, envelope, is_json = parsed
+        batches = self._pack_files(files, max_tokens)
+        if len(batches) == 1:
+            return self._review_once(format_changes_text(batches[0][0], envelope, is_json), commits_text)
+
+        total = len(batches)
+        concurrency = max(1, min(get_env_int("REVIEW_CHUNK_CONCURRENCY", 4), total))
+        logger.info(f"变更拆分为 {total} 个批次，并发数 {concurrency}")
+
+        async def review_batches() -> List[str]:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def review_batch(index: int) -> str:
+                batch_files, _ = batches[index]
+                note = f"（本次提交较大，以下为第 {index + 1}/{total} 部分文件）\n"
+                async with semaphore:
+                    return await self._areview_once(note + format_changes_text(batch_files, envelope, is_json),
+                                                    commits_text)
+
+            return await asyncio.gather(*(review_batch(index) for index in range(total)))
+
+        # 在常驻的后台事件循环中执行，异步客户端和连接池在多次审查之间复用
+        results = run_coroutine(review_batches())
+
+        if any(not result for result in results):
+            logger.error(f"分批审查中有 {sum(1 for r in results if not r)}/{total} 个批次失败，跳过写入审查结果")
+            return None
+        return self._merge_chunk_results(batches, results)
+
+    @staticmethod
+    def _pack_files(files: List[Dict], max_tokens: int) -> List[Tuple[List[Dict], int]]:
+        """按原始顺序贪心装箱，返回 [(文件列表, token数)]；单个文件超限时截断其diff"""
+        batches = []
+        current, current_tokens = [], 0
+        for item, item_tokens in zip(files, count_tokens_batch([str(item) for item in files])):
+            if item_tokens > max_tokens:
+                diff_key = 'diff_content' if 'diff_content' in item else 'diff'
+                diff = str(item.get(diff_key, ''))
+                overhead = count_tokens(str({**item, diff_key: ''}))
+                # 序列化时的转义会放大diff的token数，按比例折算出diff可保留的token数
+                diff_budget = (max_tokens - overhead) * count_tokens(diff) // max(1, item_tokens - overhead)
+                item = {**item, diff_key: truncate_text_by_tokens(diff, max(1, diff_budget))}
+                item_tokens = count_tokens(str(item))
+                logger.info(f"文件 {CodeReviewer._file_name(item)} 的diff超出单批次上限，已截断")
+            if current and current_tokens + item_tokens > max_tokens:
+                batches.append((current, current_tokens))
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += item_tokens
+        if current:
+            batches.append((current, current_tokens))
+        return batches
+
+    @staticmethod
+    def _file_name(item: Dict) -> str:
+        return str(item.get('file_path') or item.get('new_path') or item.get('full_path') or '')
+
+    def _merge_chunk_results(self, batches: List[Tuple[List[Dict], int]], results: List[str]) -> str:
+        """合并各批次结果，总分按有评分批次的token数加权平均，保证结果中只有一个“总分”"""
+        sections = []
+        weighted_score, total_weight = 0, 0
+        for index, ((batch_files, batch_tokens), result) in enumerate(zip(batches, results), start=1):
+            # 没有解析出总分的批次（如调用失败）不计入加权平均，避免拉低合并后的分数
+            if re.search(r"总分[:：]\s*\d+", result or ""):
+                weighted_score += self.parse_review_score(result) * batch_tokens
+                total_weight += batch_tokens
+            # 各批次的“总分”改名，避免 parse_review_score 取到某个批次的分数
+            result = re.sub(r"总分([:：])", r"本部分得分\1", result)
+            file_names = "、".join(self._file_name(item) for item in batch_files)
+            sections.append(f"## 第 {index}/{len(batches)} 部分（{file_names}）\n\n{result}")
+
+        final_score = round(weighted_score / total_weight) if total_weight else 0
+        return "\n\n".join(sections) + f"\n\n---\n\n总分:{final_score}分"
+
+    def _prompt_template(self) -> str:
+        """渲染后的系统提示词和用户提示词模板，作为缓存键的一部分"""
+        return self.prompts["system_message"]["content"] + "\n" + self.prompts["user_message"]["content"]
+
+    def _model_name(self) -> str:
+        """当前使用的供应商和模型名称"""
+        provider = get_env_with_default("LLM_PROVIDER")
+        return f"{provider}:{getattr(self.client, 'default_model', '')}"
+
     def review_code(self, diffs_text: str, commits_text: str = "") -> str:
         """Review 代码并返回结果"""
-        messages = [
+        return self.call_llm(self._build_messages(diffs_text, commits_text))
+
+    async def areview_code(self, diffs_text: str, commits_text: str = "") -> str:
+        """异步 Review 代码并返回结果"""
+        return await self.acall_llm(self._build_messages(diffs_text, commits_text))
+
+    def _build_messages(self, diffs_text: str, commits_text: str = "") -> List[Dict[str, Any]]:
+        return [
             self.prompts["system_message"],
             {
                 "role": "user",
@@ -210,7 +349,6 @@ class CodeReviewer(BaseReviewer):
                 ),
             },
         ]
-        return self.call_llm(messages)
 
     @staticmethod
     def parse_review_score(review_text: str) -> int:
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from biz.utils.db_pool import close_all_connections
+
+
+def db_file_owners() -> List[type]:
+    """
+    所有通过类属性 DB_FILE 指定 SQLite 数据库文件的类
+    新增使用 DB_FILE 的类时需要加入这里，基准测试和单元测试据此把整个应用切换到临时数据库
+    """
+    # 延迟导入：这些模块都依赖 db_pool，放在函数内避免循环导入
+    from biz.llm.rate_limiter import RateLimiter
+    from biz.service.review_service import ReviewService
+    from biz.utils.blob_store import BlobStore
+    from biz.utils.review_archive import ReviewArchive
+    from biz.utils.review_cache import ReviewCache
+    from biz.utils.review_rollup import ReviewRollup
+    from biz.utils.review_search import ReviewSearch
+    from biz.utils.svn_checkpoint import SVNCheckpointManager
+    from biz.utils.version_tracker import VersionTracker
+    from biz.utils.write_buffer import ReviewWriteBuffer
+    return [ReviewService, VersionTracker, ReviewCache, ReviewRollup, BlobStore, ReviewWriteBuffer,
+            SVNCheckpointManager, RateLimiter, ReviewSearch, ReviewArchive]
+
+
+@contextmanager
+def use_db_file(db_file: str) -> Iterator[str]:
+    """在上下文内把所有 DB_FILE 指向 db_file，退出时恢复原值"""
+    owners = db_file_owners()
+    previous = [owner.DB_FILE for owner in owners]
+    for owner in owners:
+        owner.DB_FILE = db_file
+    try:
+        yield db_file
+    finally:
+        for owner, value in zip(owners, previous):
+            owner.DB_FILE = value
+
+
+class TempDatabaseMixin:
+    """
+    单元测试混入类：每个用例使用临时目录下的 test.db，所有 DB_FILE 指向它，避免影响 data/data.db
+    用法：class TestXxx(TempDatabaseMixin, TestCase)，setUp 中先调用 super().setUp() 再初始化需要的表；
+    用例结束后关闭连接、恢复 DB_FILE 并删除临时目录（self.tmp_dir 也可存放其他临时文件）
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.db_file = os.path.join(self.tmp_dir, 'test.db')
+        db_context = use_db_file(self.db_file)
+        db_context.__enter__()
+        self.addCleanup(db_context.__exit__, None, None, None)
+        self.addCleanup(close_all_connections)
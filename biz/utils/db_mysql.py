@@ -0,0 +1,582 @@
+import queue
+import re
+import sqlite3
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import pymysql
+from pymysql.constants import CLIENT
+
+from biz.utils.default_config import get_env_int, get_env_with_default
+from biz.utils.log import logger
+
+# 各模块中的 SQL 按 SQLite 语法编写（? 占位符、INSERT OR REPLACE、ON CONFLICT ... excluded 等），
+# 使用 MySQL 时由 MySQLCursor 在执行前转换；表结构和触发器语法差异较大，不做转换，统一由本模块的 TABLES/触发器维护
+_SKIPPED_RE = re.compile(r'^\s*(PRAGMA|ANALYZE|VACUUM|ALTER\s+TABLE|DROP\s+TRIGGER|'
+                         r'CREATE\s+(TABLE|INDEX|UNIQUE\s+INDEX|TRIGGER))\b', re.IGNORECASE)
+_BEGIN_WRITE_RE = re.compile(r'^\s*BEGIN\s+IMMEDIATE\s*;?\s*$', re.IGNORECASE)
+_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\?|%")
+_REWRITES = [
+    (re.compile(r'\bINSERT\s+OR\s+REPLACE\s+INTO\b', re.IGNORECASE), 'REPLACE INTO'),
+    (re.compile(r'\bINSERT\s+OR\s+IGNORE\s+INTO\b', re.IGNORECASE), 'INSERT IGNORE INTO'),
+    (re.compile(r'\bON\s+CONFLICT\s*\([^)]*\)\s*DO\s+UPDATE\s+SET\b', re.IGNORECASE), 'ON DUPLICATE KEY UPDATE'),
+    (re.compile(r'\bexcluded\.(\w+)', re.IGNORECASE), r'VALUES(\1)'),
+    (re.compile(r'\bAS\s+BLOB\)', re.IGNORECASE), 'AS BINARY)'),
+]
+
+
+def translate_sql(sql: str, has_params: bool = True) -> Optional[str]:
+    """
+    将 SQLite 语法的语句转换为 MySQL 语句；建表、PRAGMA 等不适用于 MySQL 的语句返回 None
+
+    :param has_params: 是否带参数执行；PyMySQL 只在带参数时按 % 格式化语句，此时需要把字面量 % 转义为 %%
+    """
+    if _SKIPPED_RE.match(sql):
+        return None
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+
+    def replace(match):
+        token = match.group(0)
+        if token == '?':
+            return '%s'
+        return token.replace('%', '%%') if has_params else token
+
+    return _TOKEN_RE.sub(replace, sql)
+
+
+@contextmanager
+def _mapped_errors():
+    """将 PyMySQL 的异常转换为 sqlite3 的同类异常，调用方按原来的方式捕获 sqlite3.DatabaseError"""
+    try:
+        yield
+    except pymysql.err.IntegrityError as e:
+        raise sqlite3.IntegrityError(str(e)) from e
+    except (pymysql.err.OperationalError, pymysql.err.InternalError) as e:
+        raise sqlite3.OperationalError(str(e)) from e
+    except pymysql.err.Error as e:
+        raise sqlite3.DatabaseError(str(e)) from e
+
+
+def _params(params):
+    if not params:
+        return None
+    if isinstance(params, dict):
+        return params
+    return [bytes(value) if isinstance(value, memoryview) else value for value in params]
+
+
+class MySQLCursor:
+    """提供与 sqlite3.Cursor 相同用法的 MySQL cursor"""
+
+    def __init__(self, connection: 'MySQLConnection', cursor):
+        self._connection = connection
+        self._cursor = cursor
+        self._skipped = False
+
+    def execute(self, sql: str, params=()):
+        self._skipped = False
+        if _BEGIN_WRITE_RE.match(sql):
+            self._connection.begin_write()
+            self._skipped = True
+            return self
+        translated = translate_sql(sql, bool(params))
+        if translated is None:
+            self._skipped = True
+            return self
+        with _mapped_errors():
+            self._cursor.execute(translated, _params(params))
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        self._skipped = False
+        translated = translate_sql(sql, True)
+        if translated is None:
+            self._skipped = True
+            return self
+        with _mapped_errors():
+            self._cursor.executemany(translated, [_params(params) for params in seq_of_params])
+        return self
+
+    @property
+    def description(self):
+        return None if self._skipped else self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return -1 if self._skipped else self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def fetchone(self):
+        return None if self._skipped else self._cursor.fetchone()
+
+    def fetchmany(self, size: int = None):
+        if self._skipped:
+            return []
+        return self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+
+    def fetchall(self):
+        return [] if self._skipped else list(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class MySQLConnection:
+    """
+    提供与 sqlite3.Connection 相同用法的 MySQL 连接：execute/executemany/cursor/commit/rollback
+    BEGIN IMMEDIATE 转换为开启事务并获取 GET_LOCK 全局写锁，提交或回滚时释放，
+    与 SQLite 一样保证限流计数、汇总表初始化等"先查询后写入"的事务在多个节点之间串行执行
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._write_locked = False
+
+    @property
+    def lock_name(self) -> str:
+        return f"ai_codereview:{get_env_with_default('MYSQL_DATABASE', 'ai_codereview')}"
+
+    def cursor(self) -> MySQLCursor:
+        return MySQLCursor(self, self._raw.cursor())
+
+    def execute(self, sql: str, params=()) -> MySQLCursor:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params) -> MySQLCursor:
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def begin_write(self):
+        timeout = max(1, get_env_int('SQLITE_BUSY_TIMEOUT', 30000) // 1000)
+        with _mapped_errors():
+            self._raw.begin()
+            with self._raw.cursor() as cursor:
+                cursor.execute('SELECT GET_LOCK(%s, %s)', (self.lock_name, timeout))
+                acquired = cursor.fetchone()[0] == 1
+        if not acquired:
+            raise sqlite3.OperationalError('database is locked')
+        self._write_locked = True
+
+    def _release_write_lock(self):
+        if self._write_locked:
+            self._write_locked = False
+            with self._raw.cursor() as cursor:
+                cursor.execute('SELECT RELEASE_LOCK(%s)', (self.lock_name,))
+
+    def commit(self):
+        with _mapped_errors():
+            try:
+                self._raw.commit()
+            finally:
+                self._release_write_lock()
+
+    def rollback(self):
+        with _mapped_errors():
+            try:
+                self._raw.rollback()
+            finally:
+                self._release_write_lock()
+
+    def is_alive(self) -> bool:
+        try:
+            self._raw.ping(reconnect=False)
+            return True
+        except pymysql.err.Error:
+            return False
+
+    def close(self):
+        try:
+            self._raw.close()
+        except pymysql.err.Error:
+            pass
+
+
+def connect() -> MySQLConnection:
+    """按 MYSQL_* 配置创建一个新连接"""
+    with _mapped_errors():
+        raw = pymysql.connect(
+            host=get_env_with_default('MYSQL_HOST', '127.0.0.1'),
+            port=get_env_int('MYSQL_PORT', 3306),
+            user=get_env_with_default('MYSQL_USER', 'root'),
+            password=get_env_with_default('MYSQL_PASSWORD', ''),
+            database=get_env_with_default('MYSQL_DATABASE', 'ai_codereview'),
+            charset='utf8mb4',
+            autocommit=False,
+            connect_timeout=get_env_int('MYSQL_CONNECT_TIMEOUT', 10),
+            # UPDATE 的 rowcount 返回匹配的行数而不是实际修改的行数，与 SQLite 一致
+            client_flag=CLIENT.FOUND_ROWS,
+        )
+        with raw.cursor() as cursor:
+            # 支持 || 字符串拼接；按本机时区换算日期，与 SQLite 的 'localtime' 一致
+            cursor.execute("SET SESSION sql_mode = CONCAT(@@SESSION.sql_mode, ',PIPES_AS_CONCAT')")
+            offset = time.strftime('%z')
+            cursor.execute('SET time_zone = %s', (f"{offset[:3]}:{offset[3:]}",))
+        raw.commit()
+    return MySQLConnection(raw)
+
+
+class MySQLPool:
+    """进程内的 MySQL 连接池，接口与 SQLitePool 相同"""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        # pandas 对非 SQLAlchemy 连接会给出提示，这里的连接已实现 read_sql_query 需要的接口
+        warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy', category=UserWarning)
+
+    def acquire(self) -> MySQLConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return connect()
+            # 空闲时被服务器断开的连接直接丢弃
+            if conn.is_alive():
+                return conn
+            conn.close()
+
+    def release(self, conn: MySQLConnection):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# MySQL 表结构：表名 -> (列定义, 主键/索引定义)
+# 列名和顺序与各模块 init_db 创建的 SQLite 表一致（部分代码按 SELECT * 的列顺序解构）
+TABLES: Dict[str, Tuple[List[Tuple[str, str]], List[str]]] = {
+    'mr_review_log': ([
+        ('id', 'BIGINT NOT NULL AUTO_INCREMENT'),
+        ('project_name', 'VARCHAR(255)'),
+        ('author', 'VARCHAR(255)'),
+        ('source_branch', 'VARCHAR(255)'),
+        ('target_branch', 'VARCHAR(255)'),
+        ('updated_at', 'BIGINT'),
+        ('commit_messages', 'MEDIUMTEXT'),
+        ('score', 'INT'),
+        ('url', 'TEXT'),
+        ('review_result', 'MEDIUMTEXT'),
+        ('additions', 'INT DEFAULT 0'),
+        ('deletions', 'INT DEFAULT 0'),
+        ('file_details', 'LONGTEXT'),
+    ], [
+        'PRIMARY KEY (id)',
+        'KEY idx_mr_review_log_updated_at (updated_at, score)',
+        'KEY idx_mr_review_log_author_updated_at (author, updated_at, score)',
+        'KEY idx_mr_review_log_project_updated_at (project_name, updated_at, score)',
+    ]),
+    'push_review_log': ([
+        ('id', 'BIGINT NOT NULL AUTO_INCREMENT'),
+        ('project_name', 'VARCHAR(255)'),
+        ('author', 'VARCHAR(255)'),
+        ('branch', 'VARCHAR(255)'),
+        ('updated_at', 'BIGINT'),
+        ('commit_messages', 'MEDIUMTEXT'),
+        ('score', 'INT'),
+        ('review_result', 'MEDIUMTEXT'),
+        ('additions', 'INT DEFAULT 0'),
+        ('deletions', 'INT DEFAULT 0'),
+        ('file_details', 'LONGTEXT'),
+    ], [
+        'PRIMARY KEY (id)',
+        'KEY idx_push_review_log_updated_at (updated_at, score)',
+        'KEY idx_push_review_log_author_updated_at (author, updated_at, score)',
+        'KEY idx_push_review_log_project_updated_at (project_name, updated_at, score)',
+    ]),
+    'version_tracker': ([
+        ('id', 'BIGINT NOT NULL AUTO_INCREMENT'),
+        ('project_name', 'VARCHAR(255) NOT NULL'),
+        ('version_hash', 'VARCHAR(64) NOT NULL'),
+        ('commit_sha', 'VARCHAR(255)'),
+        ('author', 'VARCHAR(255)'),
+        ('branch', 'VARCHAR(255)'),
+        ('file_paths', 'MEDIUMTEXT'),
+        ('changes_hash', 'VARCHAR(64)'),
+        ('review_type', 'VARCHAR(32)'),
+        ('reviewed_at', 'BIGINT'),
+        ('review_result', 'MEDIUMTEXT'),
+        ('score', 'INT'),
+        ('created_at', 'BIGINT'),
+        ('commit_message', 'TEXT'),
+        ('commit_date', 'VARCHAR(64)'),
+        ('additions_count', 'INT DEFAULT 0'),
+        ('deletions_count', 'INT DEFAULT 0'),
+        ('file_details', 'LONGTEXT'),
+    ], [
+        'PRIMARY KEY (id)',
+        'UNIQUE KEY idx_project_version (project_name, version_hash)',
+        'KEY idx_commit_sha (commit_sha)',
+        'KEY idx_changes_hash (changes_hash)',
+        'KEY idx_version_tracker_reviewed_at (reviewed_at, score)',
+        'KEY idx_version_tracker_type_reviewed_at (review_type, reviewed_at, score)',
+        'KEY idx_version_tracker_author_reviewed_at (author, reviewed_at, score)',
+        'KEY idx_version_tracker_project_reviewed_at (project_name, reviewed_at, score)',
+        'KEY idx_version_tracker_project_type (project_name, review_type)',
+    ]),
+    'svn_checkpoints': ([
+        ('id', 'BIGINT NOT NULL AUTO_INCREMENT'),
+        ('repo_name', 'VARCHAR(255) NOT NULL'),
+        ('last_check_time', 'BIGINT NOT NULL'),
+        ('last_revision', 'VARCHAR(64)'),
+        ('updated_at', 'BIGINT NOT NULL'),
+        ('created_at', 'BIGINT NOT NULL'),
+    ], [
+        'PRIMARY KEY (id)',
+        'UNIQUE KEY idx_svn_checkpoints_repo_name (repo_name)',
+    ]),
+    'review_summary': ([
+        ('review_type', 'VARCHAR(32) NOT NULL'),
+        ('project_name', 'VARCHAR(255) NOT NULL'),
+        ('author', 'VARCHAR(255) NOT NULL'),
+        ('review_count', 'INT NOT NULL DEFAULT 0'),
+    ], [
+        'PRIMARY KEY (review_type, project_name, author)',
+    ]),
+    'review_daily_rollup': ([
+        ('day', 'CHAR(10) NOT NULL'),
+        ('review_type', 'VARCHAR(32) NOT NULL'),
+        ('project_name', 'VARCHAR(255) NOT NULL'),
+        ('author', 'VARCHAR(255) NOT NULL'),
+        ('review_count', 'INT NOT NULL DEFAULT 0'),
+        ('score_sum', 'BIGINT NOT NULL DEFAULT 0'),
+        ('score_min', 'INT'),
+        ('score_max', 'INT'),
+        ('additions', 'BIGINT NOT NULL DEFAULT 0'),
+        ('deletions', 'BIGINT NOT NULL DEFAULT 0'),
+        ('scored_count', 'INT NOT NULL DEFAULT 0'),
+    ], [
+        'PRIMARY KEY (review_type, day, project_name, author)',
+    ]),
+    'review_blobs': ([
+        ('hash', 'CHAR(64) NOT NULL'),
+        ('codec', 'VARCHAR(16) NOT NULL'),
+        ('size', 'BIGINT DEFAULT 0'),
+        ('data', 'LONGBLOB NOT NULL'),
+        ('created_at', 'BIGINT'),
+    ], [
+        'PRIMARY KEY (hash)',
+    ]),
+    'write_buffer_applied': ([
+        ('op_id', 'CHAR(32) NOT NULL'),
+        ('applied_at', 'BIGINT'),
+    ], [
+        'PRIMARY KEY (op_id)',
+    ]),
+    'review_cache': ([
+        ('cache_key', 'VARCHAR(255) NOT NULL'),
+        ('review_result', 'MEDIUMTEXT NOT NULL'),
+        ('model', 'VARCHAR(255)'),
+        ('size', 'INT DEFAULT 0'),
+        ('hit_count', 'INT DEFAULT 0'),
+        ('created_at', 'BIGINT'),
+        ('last_hit_at', 'BIGINT'),
+    ], [
+        'PRIMARY KEY (cache_key)',
+        'KEY idx_review_cache_last_hit (last_hit_at)',
+    ]),
+    'review_cache_stats': ([
+        ('name', 'VARCHAR(64) NOT NULL'),
+        ('value', 'BIGINT DEFAULT 0'),
+    ], [
+        'PRIMARY KEY (name)',
+    ]),
+    'llm_rate_events': ([
+        ('provider', 'VARCHAR(64) NOT NULL'),
+        ('created_at', 'DOUBLE NOT NULL'),
+        ('tokens', 'INT DEFAULT 0'),
+    ], [
+        'KEY idx_llm_rate_events_provider_time (provider, created_at)',
+    ]),
+    'llm_in_flight': ([
+        ('slot_id', 'VARCHAR(64) NOT NULL'),
+        ('provider', 'VARCHAR(64) NOT NULL'),
+        ('pid', 'INT'),
+        ('started_at', 'DOUBLE NOT NULL'),
+    ], [
+        'PRIMARY KEY (slot_id)',
+    ]),
+}
+
+# 汇总触发器的数据来源：(表名, 审查类型表达式, 时间列, 新增行数列, 删除行数列)
+_SOURCES = [
+    ('mr_review_log', "'mr'", 'updated_at', 'additions', 'deletions'),
+    ('push_review_log', "'push'", 'updated_at', 'additions', 'deletions'),
+    ('version_tracker', "{row}.review_type", 'reviewed_at', 'additions_count', 'deletions_count'),
+]
+
+
+def create_table_sql(table: str) -> str:
+    columns, keys = TABLES[table]
+    definitions = [f"{name} {column_type}" for name, column_type in columns] + keys
+    return (f"CREATE TABLE IF NOT EXISTS {table} (\n    " + ',\n    '.join(definitions) +
+            "\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4")
+
+
+def trigger_sql() -> Dict[str, str]:
+    """
+    review_summary / review_daily_rollup 的 MySQL 触发器，逻辑与 ReviewService、ReviewRollup 中的 SQLite 触发器相同
+    区别：MySQL 的 REPLACE 替换记录时会触发 DELETE 触发器，review_summary 不需要单独处理版本追踪的替换
+    """
+    triggers = {}
+    for table, type_expr, time_column, additions_column, deletions_column in _SOURCES:
+        def summary_key(row):
+            return (f"COALESCE({type_expr.format(row=row)}, ''), "
+                    f"COALESCE({row}.project_name, ''), COALESCE({row}.author, '')")
+
+        increment = (f"INSERT INTO review_summary (review_type, project_name, author, review_count) "
+                     f"VALUES ({summary_key('NEW')}, 1) ON DUPLICATE KEY UPDATE review_count = review_count + 1")
+        decrement = (f"UPDATE review_summary SET review_count = review_count - 1 "
+                     f"WHERE (review_type, project_name, author) = ({summary_key('OLD')}); "
+                     f"DELETE FROM review_summary WHERE (review_type, project_name, author) = ({summary_key('OLD')}) "
+                     f"AND review_count <= 0")
+        triggers[f'trg_{table}_summary_insert'] = (
+            f"CREATE TRIGGER trg_{table}_summary_insert AFTER INSERT ON {table} FOR EACH ROW {increment}")
+        triggers[f'trg_{table}_summary_delete'] = (
+            f"CREATE TRIGGER trg_{table}_summary_delete AFTER DELETE ON {table} FOR EACH ROW BEGIN {decrement}; END")
+        triggers[f'trg_{table}_summary_update'] = (
+            f"CREATE TRIGGER trg_{table}_summary_update AFTER UPDATE ON {table} FOR EACH ROW BEGIN "
+            f"IF ({summary_key('OLD')}) <> ({summary_key('NEW')}) THEN {decrement}; {increment}; END IF; END")
+
+        def day(row):
+            return f"COALESCE(DATE_FORMAT(FROM_UNIXTIME({row}.{time_column}), '%Y-%m-%d'), '')"
+
+        def add_rollup(row):
+            return f'''
+            INSERT INTO review_daily_rollup (day, review_type, project_name, author, review_count,
+                                             score_sum, score_min, score_max, additions, deletions, scored_count)
+            VALUES ({day(row)}, {summary_key(row)}, 1, COALESCE({row}.score, 0), {row}.score, {row}.score,
+                    COALESCE({row}.{additions_column}, 0), COALESCE({row}.{deletions_column}, 0),
+                    CASE WHEN {row}.score IS NULL THEN 0 ELSE 1 END)
+            ON DUPLICATE KEY UPDATE
+                review_count = review_count + 1,
+                score_sum = score_sum + VALUES(score_sum),
+                scored_count = scored_count + VALUES(scored_count),
+                score_min = CASE WHEN score_min IS NULL OR VALUES(score_min) < score_min
+                                 THEN VALUES(score_min) ELSE score_min END,
+                score_max = CASE WHEN score_max IS NULL OR VALUES(score_max) > score_max
+                                 THEN VALUES(score_max) ELSE score_max END,
+                additions = additions + VALUES(additions),
+                deletions = deletions + VALUES(deletions)
+            '''
+
+        triggers[f'trg_{table}_daily_rollup'] = (
+            f"CREATE TRIGGER trg_{table}_daily_rollup AFTER INSERT ON {table} FOR EACH ROW {add_rollup('NEW')}")
+        # 重新审查原地更新评分或时间时扣除旧记录的贡献再按新值计入，与 SQLite 的 UPDATE OF 触发器相同
+        rollup_columns = ['score', time_column, 'project_name', 'author', additions_column, deletions_column]
+        if table == 'version_tracker':
+            rollup_columns.append('review_type')
+        changed = ' OR '.join(f"NOT (OLD.{column} <=> NEW.{column})" for column in rollup_columns)
+        old_rollup_key = f"({day('OLD')}, {summary_key('OLD')})"
+        triggers[f'trg_{table}_daily_rollup_update'] = f'''
+            CREATE TRIGGER trg_{table}_daily_rollup_update AFTER UPDATE ON {table} FOR EACH ROW
+            BEGIN
+                IF {changed} THEN
+                    UPDATE review_daily_rollup SET review_count = review_count - 1,
+                        score_sum = score_sum - COALESCE(OLD.score, 0),
+                        scored_count = scored_count - CASE WHEN OLD.score IS NULL THEN 0 ELSE 1 END,
+                        additions = additions - COALESCE(OLD.{additions_column}, 0),
+                        deletions = deletions - COALESCE(OLD.{deletions_column}, 0)
+                    WHERE (day, review_type, project_name, author) = {old_rollup_key};
+                    DELETE FROM review_daily_rollup
+                    WHERE (day, review_type, project_name, author) = {old_rollup_key} AND review_count <= 0;
+                    {add_rollup('NEW')};
+                END IF;
+            END
+        '''
+
+    # 按天汇总不随删除扣减，版本追踪 REPLACE 替换旧记录时需要在插入前扣除旧记录
+    triggers['trg_version_tracker_daily_rollup_replace'] = '''
+        CREATE TRIGGER trg_version_tracker_daily_rollup_replace BEFORE INSERT ON version_tracker FOR EACH ROW
+        BEGIN
+            DECLARE v_found INT DEFAULT 0;
+            DECLARE v_day CHAR(10);
+            DECLARE v_type VARCHAR(32);
+            DECLARE v_project VARCHAR(255);
+            DECLARE v_author VARCHAR(255);
+            DECLARE v_score INT;
+            DECLARE v_scored INT;
+            DECLARE v_additions INT;
+            DECLARE v_deletions INT;
+            SELECT COUNT(*) INTO v_found FROM version_tracker
+            WHERE project_name = NEW.project_name AND version_hash = NEW.version_hash;
+            IF v_found > 0 THEN
+                SELECT COALESCE(DATE_FORMAT(FROM_UNIXTIME(reviewed_at), '%Y-%m-%d'), ''), COALESCE(review_type, ''),
+                       COALESCE(project_name, ''), COALESCE(author, ''), COALESCE(score, 0),
+                       CASE WHEN score IS NULL THEN 0 ELSE 1 END,
+                       COALESCE(additions_count, 0), COALESCE(deletions_count, 0)
+                INTO v_day, v_type, v_project, v_author, v_score, v_scored, v_additions, v_deletions
+                FROM version_tracker
+                WHERE project_name = NEW.project_name AND version_hash = NEW.version_hash LIMIT 1;
+                UPDATE review_daily_rollup SET review_count = review_count - 1, score_sum = score_sum - v_score,
+                    scored_count = scored_count - v_scored,
+                    additions = additions - v_additions, deletions = deletions - v_deletions
+                WHERE review_type = v_type AND day = v_day AND project_name = v_project AND author = v_author;
+                DELETE FROM review_daily_rollup
+                WHERE review_type = v_type AND day = v_day AND project_name = v_project AND author = v_author
+                  AND review_count <= 0;
+            END IF;
+        END
+    '''
+    return triggers
+
+
+def _upgrade_daily_rollup(cursor):
+    """旧版 review_daily_rollup 补充 scored_count 列并删除旧触发器，处理方式与 ReviewRollup._upgrade 相同"""
+    cursor.execute("SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() "
+                   "AND table_name = 'review_daily_rollup' AND column_name = 'scored_count'")
+    if cursor.fetchone()[0]:
+        return
+    cursor.execute("ALTER TABLE review_daily_rollup ADD COLUMN scored_count INT NOT NULL DEFAULT 0")
+    cursor.execute("UPDATE review_daily_rollup SET scored_count = review_count")
+    for name in trigger_sql():
+        if 'daily_rollup' in name:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    logger.info("review_daily_rollup 已补充 scored_count 列")
+
+
+def ensure_schema():
+    """
+    创建缺少的表和触发器（已存在的保持不变），每个进程首次连接 MySQL 时执行
+    开启了 binlog 的 MySQL 创建触发器需要 SUPER 权限或 log_bin_trust_function_creators=1
+    """
+    try:
+        conn = connect()
+    except sqlite3.DatabaseError as e:
+        logger.error(f"连接 MySQL 失败: {e}")
+        return
+    try:
+        with conn._raw.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(create_table_sql(table))
+            _upgrade_daily_rollup(cursor)
+            cursor.execute("SELECT trigger_name FROM information_schema.triggers WHERE trigger_schema = DATABASE()")
+            existing = {row[0] for row in cursor.fetchall()}
+            for name, statement in trigger_sql().items():
+                if name in existing:
+                    continue
+                try:
+                    cursor.execute(statement)
+                except pymysql.err.OperationalError as e:
+                    # 1359: 其他节点同时创建了同名触发器
+                    if e.args[0] != 1359:
+                        raise
+        conn._raw.commit()
+    except pymysql.err.Error as e:
+        logger.error(f"MySQL 表结构初始化失败: {e}")
+    finally:
+        conn.close()
@@ -0,0 +1,153 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from biz.utils.default_config import get_env_int, get_env_with_default
+from biz.utils.log import logger
+
+
+class SQLitePool:
+    """
+    进程内的 SQLite 连接池
+    - WAL 日志模式：读写互不阻塞，webhook 工作进程、定时任务和 UI 可以同时访问
+    - busy_timeout：遇到写锁时等待而不是立即抛出 "database is locked"
+    - 连接复用：避免每次查询都重新打开数据库，连接自带的语句缓存使 SQL 只需编译一次
+    """
+
+    def __init__(self, db_file: str, size: int):
+        self.db_file = db_file
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue(maxsize=self.size)
+
+    def _create(self) -> sqlite3.Connection:
+        db_dir = os.path.dirname(self.db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        busy_timeout = get_env_int('SQLITE_BUSY_TIMEOUT', 30000)
+        # 连接会在线程之间复用（同一时间只被一个线程持有），因此关闭同线程检查
+        conn = sqlite3.connect(self.db_file, timeout=busy_timeout / 1000, check_same_thread=False,
+                               cached_statements=get_env_int('SQLITE_STATEMENT_CACHE', 256))
+        conn.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+        # WAL 模式写入数据库文件后永久生效，这里对每个新连接设置一次即可
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._create()
+
+    def release(self, conn: sqlite3.Connection):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools: Dict[Tuple[int, str], SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_db_backend() -> str:
+    """
+    审查记录的存储后端：sqlite（默认，本地文件）或 mysql（多个 API/工作节点共享同一个数据库）
+    使用 mysql 时各模块的 DB_FILE 不再生效，全部表存放在 MYSQL_DATABASE 中
+    """
+    return get_env_with_default('DB_BACKEND', 'sqlite').strip().lower()
+
+
+def _get_pool(db_file: str):
+    # fork 出的子进程不能使用父进程打开的连接，按进程号区分
+    backend = get_db_backend()
+    key = (os.getpid(), 'mysql' if backend == 'mysql' else os.path.abspath(db_file))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                if backend == 'mysql':
+                    from biz.utils import db_mysql
+                    db_mysql.ensure_schema()
+                    pool = db_mysql.MySQLPool(get_env_int('MYSQL_POOL_SIZE', 8))
+                else:
+                    pool = SQLitePool(db_file, get_env_int('SQLITE_POOL_SIZE', 8))
+                _pools[key] = pool
+    return pool
+
+
+def open_connection(db_file: str):
+    """打开一个不经过连接池的连接（需要长时间持有连接时使用），用完后由调用方关闭"""
+    if get_db_backend() == 'mysql':
+        _get_pool(db_file)
+        from biz.utils import db_mysql
+        return db_mysql.connect()
+    return sqlite3.connect(db_file)
+
+
+def table_exists(cursor, table: str) -> bool:
+    if get_db_backend() == 'mysql':
+        cursor.execute("SELECT 1 FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = ?",
+                       (table,))
+    else:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+
+def sql_local_day(expression: str) -> str:
+    """将秒级时间戳表达式转换为本地时区日期 YYYY-MM-DD 的 SQL 表达式"""
+    if get_db_backend() == 'mysql':
+        return f"DATE_FORMAT(FROM_UNIXTIME({expression}), '%Y-%m-%d')"
+    return f"date({expression}, 'unixepoch', 'localtime')"
+
+
+def sql_local_day_start(placeholder: str = '?') -> str:
+    """将本地时区日期 YYYY-MM-DD 参数转换为当天 0 点时间戳的 SQL 表达式"""
+    if get_db_backend() == 'mysql':
+        return f"UNIX_TIMESTAMP({placeholder})"
+    return f"CAST(strftime('%s', {placeholder}, 'utc') AS INTEGER)"
+
+
+@contextmanager
+def get_connection(db_file: str) -> Iterator[sqlite3.Connection]:
+    """
+    从连接池获取连接，用法与 `with sqlite3.connect(db_file) as conn` 相同：
+    正常结束时提交事务，出现异常时回滚，随后连接归还连接池
+    DB_BACKEND=mysql 时返回用法相同的 MySQL 连接（SQL 仍按 SQLite 语法编写，执行时转换）
+    """
+    pool = _get_pool(db_file)
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        try:
+            conn.rollback()
+        except sqlite3.Error as e:
+            # 回滚失败说明连接已不可用，直接丢弃
+            logger.warning(f"Database rollback failed, discarding connection: {e}")
+            conn.close()
+            raise
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
+
+
+def close_all_connections():
+    """关闭当前进程中所有空闲的数据库连接"""
+    with _pools_lock:
+        for (pid, _), pool in list(_pools.items()):
+            if pid == os.getpid():
+                pool.close_all()
@@ -0,0 +1,135 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Union
+
+from biz.utils.default_config import get_env_with_default, get_env_int
+from biz.utils.log import logger
+
+
+class PayloadSpool:
+    """
+    Webhook 原始请求体暂存区
+    API 只把原始 bytes 写入一次（本地目录或 Redis），队列任务中仅携带引用字符串，
+    由工作进程按需读取并解析，避免大 payload 在日志、序列化和进程间传递中被反复编码
+    """
+    SPOOL_DIR = "data/webhook_spool"
+    FILE_PREFIX = "file:"
+    REDIS_PREFIX = "redis:"
+    REDIS_KEY_PREFIX = "webhook_payload:"
+
+    _redis = None
+    _last_cleanup = 0
+    _cleanup_lock = threading.Lock()
+
+    @staticmethod
+    def _driver() -> str:
+        # rq 的工作进程可能运行在其他机器上，默认使用 Redis；其余驱动在本机内共享目录即可
+        default = 'redis' if get_env_with_default('QUEUE_DRIVER') == 'rq' else 'file'
+        return get_env_with_default('WEBHOOK_SPOOL_DRIVER', default) or default
+
+    @staticmethod
+    def _ttl() -> int:
+        return get_env_int('WEBHOOK_SPOOL_TTL', 86400)
+
+    @staticmethod
+    def _get_redis():
+        if PayloadSpool._redis is None:
+            from redis import Redis
+            PayloadSpool._redis = Redis(get_env_with_default('REDIS_HOST'), get_env_int('REDIS_PORT'))
+        return PayloadSpool._redis
+
+    @staticmethod
+    def save(raw_body: bytes) -> str:
+        """保存原始请求体，返回供队列任务携带的引用"""
+        payload_id = uuid.uuid4().hex
+        if PayloadSpool._driver() == 'redis':
+            PayloadSpool._get_redis().set(PayloadSpool.REDIS_KEY_PREFIX + payload_id, raw_body,
+                                          ex=PayloadSpool._ttl())
+            return PayloadSpool.REDIS_PREFIX + payload_id
+
+        os.makedirs(PayloadSpool.SPOOL_DIR, exist_ok=True)
+        path = os.path.join(PayloadSpool.SPOOL_DIR, f"{payload_id}.json")
+        # 先写临时文件再改名，工作进程不会读到写了一半的内容
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(raw_body)
+        os.replace(tmp_path, path)
+        PayloadSpool._cleanup_expired()
+        return PayloadSpool.FILE_PREFIX + payload_id
+
+    @staticmethod
+    def load(payload_ref: Union[str, dict]) -> Any:
+        """
+        根据引用读取并解析请求体；传入的已经是解析好的数据时原样返回，兼容旧任务
+        """
+        if not isinstance(payload_ref, str):
+            return payload_ref
+
+        if payload_ref.startswith(PayloadSpool.REDIS_PREFIX):
+            raw_body = PayloadSpool._get_redis().get(
+                PayloadSpool.REDIS_KEY_PREFIX + payload_ref[len(PayloadSpool.REDIS_PREFIX):])
+            if raw_body is None:
+                raise FileNotFoundError(f"Webhook payload {payload_ref} 不存在或已过期")
+        elif payload_ref.startswith(PayloadSpool.FILE_PREFIX):
+            path = os.path.join(PayloadSpool.SPOOL_DIR, f"{payload_ref[len(PayloadSpool.FILE_PREFIX):]}.json")
+            with open(path, 'rb') as f:
+                raw_body = f.read()
+        else:
+            raise ValueError(f"无法识别的 webhook payload 引用: {payload_ref}")
+        return json.loads(raw_body)
+
+    @staticmethod
+    def delete(payload_ref: Union[str, dict]):
+        """任务处理完成后删除暂存的请求体"""
+        if not isinstance(payload_ref, str):
+            return
+        try:
+            if payload_ref.startswith(PayloadSpool.REDIS_PREFIX):
+                PayloadSpool._get_redis().delete(
+                    PayloadSpool.REDIS_KEY_PREFIX + payload_ref[len(PayloadSpool.REDIS_PREFIX):])
+            elif payload_ref.startswith(PayloadSpool.FILE_PREFIX):
+                os.remove(os.path.join(PayloadSpool.SPOOL_DIR,
+                                       f"{payload_ref[len(PayloadSpool.FILE_PREFIX):]}.json"))
+        except Exception as e:
+            logger.warning(f"删除 webhook payload {payload_ref} 失败: {e}")
+
+    @staticmethod
+    def _cleanup_expired():
+        """清理超过保留时间仍未被处理的暂存文件（如工作进程异常退出），每10分钟最多执行一次"""
+        now = time.time()
+        if now - PayloadSpool._last_cleanup < 600 or not PayloadSpool._cleanup_lock.acquire(blocking=False):
+            return
+        try:
+            PayloadSpool._last_cleanup = now
+            expire_before = now - PayloadSpool._ttl()
+            with os.scandir(PayloadSpool.SPOOL_DIR) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.stat().st_mtime < expire_before:
+                        os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"清理 webhook payload 暂存目录失败: {e}")
+        finally:
+            PayloadSpool._cleanup_lock.release()
+
+
+def spooled_payload(func):
+    """
+    队列任务装饰器：第一个参数为暂存引用时先读取解析出 webhook 数据，任务成功结束后删除暂存内容；
+    任务抛出异常时保留暂存内容，供 RQ 重试或重新入队时读取，未再处理的由过期清理删除
+    """
+    @functools.wraps(func)
+    def wrapper(webhook_data, *args, **kwargs):
+        payload_ref = webhook_data
+        try:
+            webhook_data = PayloadSpool.load(payload_ref)
+        except Exception as e:
+            logger.error(f"读取 webhook payload {payload_ref} 失败: {e}")
+            return None
+        result = func(webhook_data, *args, **kwargs)
+        PayloadSpool.delete(payload_ref)
+        return result
+    return wrapper
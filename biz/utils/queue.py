@@ -1,8 +1,16 @@
+import atexit
 import os
-from multiprocessing import Process
+import queue as queue_lib
+import signal
+import threading
+import time
+from collections import deque
+from datetime import timezone
+from multiprocessing import Process, Queue as ProcessQueue
+from typing import Dict, List, Optional
 
 from redis import Redis
-from rq import Queue
+from rq import Queue, Worker
 
 from biz.utils.log import logger
 from biz.utils.default_config import get_env_with_default, get_env_int
@@ -13,14 +21,268 @@ if queue_driver == 'rq':
     queues = {}
 
 
-def handle_queue(function: callable, *args, **kwargs):
-    if queue_driver == 'rq':
-        # For git-related events, url_slug is the 4th positional argument.
-        # For other events like SVN, use a default queue.
-        queue_name = 'default'
-        if len(args) > 3 and isinstance(args[3], str):
-            queue_name = args[3]
+# 优先级通道，按优先级从高到低排列
+PRIORITY_MERGE_REQUEST = 'merge_request'  # GitLab MR / GitHub PR
+PRIORITY_PUSH = 'push'
+PRIORITY_SVN_MANUAL = 'svn_manual'  # 通过 /svn/check 手动触发的SVN检查
+PRIORITY_SVN_SCHEDULED = 'svn_scheduled'  # 定时SVN检查
+PRIORITY_RETRY = 'retry'  # 管理员触发的重新评审
+PRIORITY_LANES = [PRIORITY_MERGE_REQUEST, PRIORITY_PUSH, PRIORITY_SVN_MANUAL, PRIORITY_SVN_SCHEDULED, PRIORITY_RETRY]
+DEFAULT_PRIORITY = PRIORITY_PUSH
+DEFAULT_PRIORITY_WEIGHTS = {
+    PRIORITY_MERGE_REQUEST: 16,
+    PRIORITY_PUSH: 8,
+    PRIORITY_SVN_MANUAL: 4,
+    PRIORITY_SVN_SCHEDULED: 2,
+    PRIORITY_RETRY: 1,
+}
+RQ_QUEUE_PREFIX = 'review_'
+
+
+class QueueFullError(Exception):
+    """本地任务队列已满，调用方应返回429让上游稍后重试"""
+
+
+def _pool_worker_loop(task_queue, parent_pid: int):
+    """常驻工作进程主循环：依次执行队列中的任务，收到 None 或主进程退出后结束"""
+    # 工作进程由主进程 fork 而来，会继承 API 的信号处理器；这里恢复默认行为，
+    # 并忽略 Ctrl+C，由主进程通过投递 None 的方式通知退出，保证正在执行的任务能完成
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        try:
+            task = task_queue.get(timeout=5)
+        except queue_lib.Empty:
+            # 工作进程不是守护进程，主进程被强制结束时没有机会投递 None，发现父进程变化后自行退出
+            if os.getppid() != parent_pid:
+                break
+            continue
+        if task is None:
+            break
+        function, args, kwargs = task
+        try:
+            function(*args, **kwargs)
+        except Exception as e:
+            logger.error(f'工作进程 {os.getpid()} 执行任务 {getattr(function, "__name__", function)} 失败: {e}')
+
+
+class PriorityScheduler:
+    """
+    优先级通道调度：在有待处理任务的通道中按权重（平滑加权轮询）挑选下一个任务，
+    等待时间超过 max_wait 的任务最先执行，避免低优先级任务被饿死
+    """
+
+    def __init__(self, weights: Dict[str, int] = None, max_wait: int = None):
+        self.weights = weights or get_priority_weights()
+        self.max_wait = max_wait if max_wait is not None else get_env_int('QUEUE_PRIORITY_MAX_WAIT', 600)
+        self._credits = {lane: 0 for lane in PRIORITY_LANES}
+
+    def choose(self, oldest: Dict[str, Optional[float]], now: float = None) -> Optional[str]:
+        """
+        :param oldest: 各通道中最早入队任务的入队时间戳，空通道为 None
+        :return: 下一个应执行的通道，全部为空时返回 None
+        """
+        now = now or time.time()
+        candidates = [lane for lane in PRIORITY_LANES if oldest.get(lane) is not None]
+        if not candidates:
+            return None
+
+        starving = [lane for lane in candidates if self.max_wait and now - oldest[lane] >= self.max_wait]
+        if starving:
+            return min(starving, key=lambda lane: oldest[lane])
+
+        total = 0
+        for lane in candidates:
+            weight = max(1, self.weights.get(lane, 1))
+            self._credits[lane] += weight
+            total += weight
+        # 积分相同时优先级高的通道优先
+        chosen = max(candidates, key=lambda lane: (self._credits[lane], -PRIORITY_LANES.index(lane)))
+        self._credits[chosen] -= total
+        return chosen
+
+
+def get_priority_weights() -> Dict[str, int]:
+    """读取 QUEUE_PRIORITY_WEIGHTS（如 merge_request:16,push:8），未配置的通道使用默认权重"""
+    weights = dict(DEFAULT_PRIORITY_WEIGHTS)
+    for item in (get_env_with_default('QUEUE_PRIORITY_WEIGHTS') or '').split(','):
+        lane, _, weight = item.partition(':')
+        lane = lane.strip()
+        if lane in weights:
+            try:
+                weights[lane] = max(1, int(weight))
+            except ValueError:
+                logger.warning(f'QUEUE_PRIORITY_WEIGHTS 中 {lane} 的权重无效: {weight}')
+    return weights
+
+
+class LocalWorkerPool:
+    """
+    本地常驻进程池（QUEUE_DRIVER=pool）
+    固定数量的工作进程从一个容量为1的交接队列中取任务，避免每个 webhook 事件都新建一个 Python 进程；
+    主进程中的分发线程按优先级通道决定下一个交给工作进程的任务
+    """
+
+    def __init__(self, workers: int, max_size: int, scheduler: PriorityScheduler = None):
+        self.workers = max(1, workers)
+        self.max_size = max(1, max_size)
+        self.scheduler = scheduler or PriorityScheduler()
+        self.task_queue = None
+        self.processes = []
+        self.lanes = {lane: deque() for lane in PRIORITY_LANES}
+        self._pending = 0
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._dispatcher = None
+        self._owner_pid = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        # 交接队列只缓冲一个任务，其余任务留在各优先级通道中，等有空闲工作进程时再挑选
+        self.task_queue = ProcessQueue(maxsize=1)
+        self.processes = []
+        for index in range(self.workers):
+            # 不使用守护进程：任务中可能还要启动子进程（守护进程不允许创建子进程），退出时由 shutdown 显式关闭
+            process = Process(target=_pool_worker_loop, args=(self.task_queue, os.getpid()),
+                              name=f'review-worker-{index}')
+            process.start()
+            self.processes.append(process)
+        self.lanes = {lane: deque() for lane in PRIORITY_LANES}
+        self._pending = 0
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='review-dispatcher', daemon=True)
+        self._dispatcher.start()
+        self._owner_pid = os.getpid()
+        logger.info(f'本地进程池已启动，工作进程数: {self.workers}，队列容量: {self.max_size}')
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                oldest = {lane: tasks[0][0] if tasks else None for lane, tasks in self.lanes.items()}
+                lane = self.scheduler.choose(oldest)
+                _, task = self.lanes[lane].popleft()
+                self._pending -= 1
+                self._condition.notify_all()
+            # 阻塞直到有工作进程取走上一个任务
+            self.task_queue.put(task)
 
+    def submit(self, function: callable, *args, priority: str = None, **kwargs):
+        """按优先级通道投递任务，所有通道中待处理任务总数达到上限时抛出 QueueFullError"""
+        if self._owner_pid != os.getpid():
+            # 多线程同时提交第一个任务时只启动一次；fork 出的子进程中 _owner_pid 不同，会重新启动自己的进程池
+            with self._start_lock:
+                if self._owner_pid != os.getpid():
+                    self.start()
+        lane = priority if priority in self.lanes else DEFAULT_PRIORITY
+        with self._condition:
+            if self._pending >= self.max_size:
+                raise QueueFullError(f'本地任务队列已满（容量 {self.max_size}），请稍后重试')
+            self.lanes[lane].append((time.time(), (function, args, kwargs)))
+            self._pending += 1
+            self._condition.notify_all()
+
+    def shutdown(self, timeout: int = 300):
+        """优雅关闭：先执行完已入队的任务，再通知工作进程退出；超时仍未退出的进程将被终止"""
+        if self._owner_pid != os.getpid() or not self.processes:
+            return
+        logger.info(f'正在关闭本地进程池，等待已入队任务执行完成（最长 {timeout} 秒）...')
+        deadline = time.time() + timeout
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._dispatcher.join(timeout=max(0, deadline - time.time()))
+        for _ in self.processes:
+            try:
+                self.task_queue.put(None, timeout=max(0.1, deadline - time.time()))
+            except queue_lib.Full:
+                break
+        for process in self.processes:
+            process.join(timeout=max(0, deadline - time.time()))
+            if process.is_alive():
+                logger.warning(f'工作进程 {process.name} 未能在超时时间内退出，强制终止')
+                process.terminate()
+        self.processes = []
+        self._owner_pid = None
+        logger.info('本地进程池已关闭')
+
+
+class PriorityWorker(Worker):
+    """
+    按优先级通道取任务的 RQ Worker（QUEUE_DRIVER=rq）
+    每取完一个任务后按权重和等待时间重新排列监听的队列，非优先级通道的队列（如旧版本遗留的队列）排在最后
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.priority_scheduler = PriorityScheduler()
+
+    def reorder_queues(self, reference_queue):
+        lane_queues = {}
+        other_queues = []
+        for rq_queue in self._ordered_queues:
+            lane = rq_queue.name[len(RQ_QUEUE_PREFIX):] if rq_queue.name.startswith(RQ_QUEUE_PREFIX) else None
+            if lane in PRIORITY_LANES:
+                lane_queues[lane] = rq_queue
+            else:
+                other_queues.append(rq_queue)
+
+        oldest = {lane: self._oldest_enqueued_at(rq_queue) for lane, rq_queue in lane_queues.items()}
+        chosen = self.priority_scheduler.choose(oldest)
+        ordered = [lane_queues[chosen]] if chosen else []
+        ordered += [lane_queues[lane] for lane in PRIORITY_LANES if lane in lane_queues and lane != chosen]
+        self._ordered_queues = ordered + other_queues
+
+    @staticmethod
+    def _oldest_enqueued_at(rq_queue) -> Optional[float]:
+        job_ids = rq_queue.get_job_ids(0, 0)
+        job = rq_queue.fetch_job(job_ids[0]) if job_ids else None
+        if not job or not job.enqueued_at:
+            return None
+        enqueued_at = job.enqueued_at
+        if enqueued_at.tzinfo is None:
+            enqueued_at = enqueued_at.replace(tzinfo=timezone.utc)
+        return enqueued_at.timestamp()
+
+
+def get_rq_queue_names() -> List[str]:
+    """RQ 模式下各优先级通道对应的队列名，按优先级从高到低"""
+    return [RQ_QUEUE_PREFIX + lane for lane in PRIORITY_LANES]
+
+
+_local_pool = None
+
+
+def _get_local_pool() -> LocalWorkerPool:
+    global _local_pool
+    if _local_pool is None:
+        _local_pool = LocalWorkerPool(
+            workers=get_env_int('QUEUE_POOL_WORKERS', os.cpu_count() or 2),
+            max_size=get_env_int('QUEUE_POOL_MAX_SIZE', 100),
+        )
+        atexit.register(shutdown_queue)
+    return _local_pool
+
+
+def shutdown_queue():
+    """关闭本地进程池（仅 QUEUE_DRIVER=pool 时生效）"""
+    if _local_pool is not None:
+        _local_pool.shutdown(get_env_int('QUEUE_POOL_DRAIN_TIMEOUT', 300))
+
+
+def handle_queue(function: callable, *args, priority: str = None, **kwargs):
+    """
+    异步执行任务
+    :param priority: 优先级通道（PRIORITY_*），仅 rq 和 pool 驱动生效，默认为 push 通道
+    """
+    lane = priority if priority in PRIORITY_LANES else DEFAULT_PRIORITY
+    if queue_driver == 'rq':
+        queue_name = RQ_QUEUE_PREFIX + lane
         if queue_name not in queues:
             redis_host = get_env_with_default('REDIS_HOST')
             redis_port = get_env_int('REDIS_PORT')
@@ -28,6 +290,8 @@ def handle_queue(function: callable, *args, **kwargs):
             queues[queue_name] = Queue(queue_name, connection=Redis(redis_host, redis_port))
 
         queues[queue_name].enqueue(function, *args, **kwargs)
+    elif queue_driver == 'pool':
+        _get_local_pool().submit(function, *args, priority=lane, **kwargs)
     else:
         process = Process(target=function, args=args, kwargs=kwargs)
         process.start()
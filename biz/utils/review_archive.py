@@ -0,0 +1,176 @@
+import gzip
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_pool import get_connection, get_db_backend
+from biz.utils.default_config import get_env_int, get_env_with_default
+from biz.utils.log import logger
+
+
+class ReviewArchive:
+    """
+    审查记录保留与归档
+    - 按天汇总（review_daily_rollup）永久保留，趋势图不受清理影响
+    - 审查记录（含完整审查结果和文件详情）在数据库中保留指定天数
+    - 更早的记录按月追加到 gzip 压缩的 JSONL 文件 <归档目录>/<表名>/<YYYY-MM>.jsonl.gz 后从数据库删除，
+      界面可以按需读取归档文件
+    删除分小批进行，每批一个短事务，不长时间阻塞 webhook 写入；结束后回收未引用的大字段并执行增量 VACUUM
+    """
+    DB_FILE = "data/data.db"
+
+    # 表名 -> (时间列, 保留天数配置项)
+    TABLES = {
+        'mr_review_log': ('updated_at', 'REVIEW_RETENTION_DAYS'),
+        'push_review_log': ('updated_at', 'REVIEW_RETENTION_DAYS'),
+        'version_tracker': ('reviewed_at', 'VERSION_TRACKING_RETENTION_DAYS'),
+    }
+
+    @staticmethod
+    def get_archive_dir() -> str:
+        return get_env_with_default('REVIEW_ARCHIVE_DIR', 'data/archive')
+
+    @staticmethod
+    def get_retention_days(table: str) -> int:
+        """保留天数，0 表示永久保留"""
+        return get_env_int(ReviewArchive.TABLES[table][1], 0)
+
+    @staticmethod
+    def _archive_file(table: str, month: str) -> str:
+        return os.path.join(ReviewArchive.get_archive_dir(), table, f"{month}.jsonl.gz")
+
+    @staticmethod
+    def _write(table: str, rows: List[Dict]):
+        """按月追加写入归档文件；每次追加是一个独立的 gzip 成员，读取时自动拼接"""
+        time_column = ReviewArchive.TABLES[table][0]
+        by_month: Dict[str, List[Dict]] = {}
+        for row in rows:
+            month = datetime.fromtimestamp(row.get(time_column) or 0).strftime('%Y-%m')
+            by_month.setdefault(month, []).append(row)
+        for month, month_rows in by_month.items():
+            path = ReviewArchive._archive_file(table, month)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+                    for row in month_rows:
+                        gz.write((json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8'))
+                raw.flush()
+                # 确保归档落盘后再删除数据库中的记录
+                os.fsync(raw.fileno())
+
+    @staticmethod
+    def archive_table(table: str, days: int, batch_size: int = None) -> int:
+        """
+        归档并删除 days 天前的记录，返回处理的记录数
+        写入归档后、删除记录前进程中断时，重新执行会再次写入这些记录，读取归档时按 id 去重
+        """
+        if days <= 0:
+            return 0
+        time_column = ReviewArchive.TABLES[table][0]
+        batch_size = batch_size or get_env_int('REVIEW_ARCHIVE_BATCH_SIZE', 500)
+        cutoff = int(time.time()) - days * 24 * 3600
+        archived = 0
+        while True:
+            with get_connection(ReviewArchive.DB_FILE) as conn:
+                cursor = conn.execute(f"SELECT * FROM {table} WHERE {time_column} < ? ORDER BY {time_column} LIMIT ?",
+                                      (cutoff, batch_size))
+                columns = [description[0] for description in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            if not rows:
+                break
+
+            # 归档文件保存原文，不依赖数据库中的大字段存储
+            ReviewArchive._write(table, BlobStore.resolve_records(rows))
+            ids = [row['id'] for row in rows]
+            with get_connection(ReviewArchive.DB_FILE) as conn:
+                conn.execute(f"DELETE FROM {table} WHERE id IN ({','.join(['?'] * len(ids))})", ids)
+                conn.commit()
+            archived += len(rows)
+            # 批次之间让出写锁
+            time.sleep(0.01)
+
+        if archived:
+            logger.info(f"已归档 {table} 中 {archived} 条 {days} 天前的记录")
+        return archived
+
+    @staticmethod
+    def run() -> Dict[str, int]:
+        """按配置执行一次保留策略：归档过期记录、回收大字段、增量 VACUUM"""
+        result = {}
+        for table in ReviewArchive.TABLES:
+            try:
+                result[table] = ReviewArchive.archive_table(table, ReviewArchive.get_retention_days(table))
+            except (OSError, sqlite3.DatabaseError) as e:
+                logger.error(f"归档 {table} 失败: {e}")
+                result[table] = 0
+        if any(result.values()):
+            result['blobs'] = BlobStore.gc()
+            ReviewArchive.incremental_vacuum()
+        return result
+
+    @staticmethod
+    def incremental_vacuum():
+        """回收删除记录后的空闲页；数据库未开启增量 VACUUM 时只记录提示"""
+        if get_db_backend() != 'sqlite':
+            # 服务器数据库自行回收空闲空间
+            return
+        try:
+            with get_connection(ReviewArchive.DB_FILE) as conn:
+                mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+                if mode != 2:
+                    logger.info("数据库未开启增量 VACUUM，可执行 "
+                                "python biz/cmd/cleanup_versions.py --enable-incremental-vacuum 开启")
+                    return
+                pages = get_env_int('REVIEW_VACUUM_PAGES', 0)
+                conn.execute(f'PRAGMA incremental_vacuum({pages})' if pages else 'PRAGMA incremental_vacuum')
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"增量 VACUUM 失败: {e}")
+
+    @staticmethod
+    def enable_incremental_vacuum():
+        """将数据库切换为增量 VACUUM 模式，需要执行一次完整 VACUUM（期间锁定数据库）"""
+        if get_db_backend() != 'sqlite':
+            raise ValueError("增量 VACUUM 只适用于 SQLite 存储")
+        with get_connection(ReviewArchive.DB_FILE) as conn:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+
+    @staticmethod
+    def list_months(table: str) -> List[str]:
+        """列出已有归档的月份（YYYY-MM），按时间倒序"""
+        directory = os.path.join(ReviewArchive.get_archive_dir(), table)
+        if not os.path.isdir(directory):
+            return []
+        return sorted((name[:-len('.jsonl.gz')] for name in os.listdir(directory) if name.endswith('.jsonl.gz')),
+                      reverse=True)
+
+    @staticmethod
+    def load(table: str, start_ts: Optional[int] = None, end_ts: Optional[int] = None,
+             authors: List[str] = None, projects: List[str] = None) -> List[Dict]:
+        """读取时间范围内的归档记录（只打开范围内月份的文件）"""
+        time_column = ReviewArchive.TABLES[table][0]
+        start_month = datetime.fromtimestamp(start_ts).strftime('%Y-%m') if start_ts else None
+        end_month = datetime.fromtimestamp(end_ts).strftime('%Y-%m') if end_ts else None
+        records: Dict[int, Dict] = {}
+        for month in ReviewArchive.list_months(table):
+            if (start_month and month < start_month) or (end_month and month > end_month):
+                continue
+            try:
+                with gzip.open(ReviewArchive._archive_file(table, month), 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        row = json.loads(line)
+                        timestamp = row.get(time_column) or 0
+                        if (start_ts and timestamp < start_ts) or (end_ts and timestamp > end_ts):
+                            continue
+                        if (authors and row.get('author') not in authors) or \
+                                (projects and row.get('project_name') not in projects):
+                            continue
+                        records[row['id']] = row
+            except (OSError, EOFError, ValueError) as e:
+                logger.error(f"读取归档文件 {table}/{month} 失败: {e}")
+        return sorted(records.values(), key=lambda row: row.get(time_column) or 0, reverse=True)
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from biz.utils.code_parser import parse_changes_text
+from biz.utils.db_pool import get_connection
+from biz.utils.default_config import get_env_bool, get_env_int
+from biz.utils.log import logger
+
+
+class ReviewCache:
+    """
+    审查结果缓存 - 以规范化后的diff内容为键缓存大模型的审查结果
+    cherry-pick、rebase、重复推送等提交ID不同但diff相同的场景可以直接复用结果
+    """
+    DB_FILE = "data/data.db"
+
+    # diff 文件头中与代码内容无关、在 rebase/cherry-pick 后会变化的行
+    _HEADER_PREFIXES = ('=====', '--- ', '+++ ', 'index ')
+    _HUNK_HEADER_RE = re.compile(r'^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@')
+
+    @staticmethod
+    def init_db():
+        """初始化审查缓存表"""
+        try:
+            with get_connection(ReviewCache.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS review_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        review_result TEXT NOT NULL,
+                        model TEXT,
+                        size INTEGER DEFAULT 0,
+                        hit_count INTEGER DEFAULT 0,
+                        created_at INTEGER,
+                        last_hit_at INTEGER
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_review_cache_last_hit
+                    ON review_cache(last_hit_at)
+                ''')
+                # 命中/未命中计数在多个工作进程之间共享，因此同样存入数据库
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS review_cache_stats (
+                        name TEXT PRIMARY KEY,
+                        value INTEGER DEFAULT 0
+                    )
+                ''')
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Review cache database initialization failed: {e}")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return get_env_bool('REVIEW_CACHE_ENABLED', True)
+
+    @staticmethod
+    def normalize_diff(diff: str) -> str:
+        """
+        规范化单个文件的diff：去掉文件头、hunk行号、行尾空白和换行符差异
+        """
+        lines = []
+        # 只在文件头部（第一个hunk之前）丢弃 ---/+++ 等行，避免误删以 "-- " 开头的代码行
+        in_header = True
+        for line in diff.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+            if line.startswith(('Index: ', 'diff --git ')):
+                in_header = True
+                continue
+            if line.startswith('@@'):
+                in_header = False
+                line = ReviewCache._HUNK_HEADER_RE.sub('@@', line)
+            elif in_header and line.startswith(ReviewCache._HEADER_PREFIXES):
+                continue
+            lines.append(line.rstrip())
+        return '\n'.join(lines).strip()
+
+    @staticmethod
+    def _extract_files(changes_text: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        从传给 review_and_strip_code 的文本中提取 (文件路径, diff) 列表
+        支持 str(changes) 形式的列表和SVN的结构化diff JSON，无法识别时返回 None
+        """
+        parsed = parse_changes_text(changes_text)
+        if parsed is None:
+            return None
+        # SVN结构化diff中的提交信息（envelope）不参与缓存键
+        data, _, _ = parsed
+
+        files = []
+        for item in data:
+            path = item.get('file_path') or item.get('new_path') or item.get('full_path') or ''
+            diff = item.get('diff_content', item.get('diff', ''))
+            files.append((str(path), str(diff)))
+        return files
+
+    @staticmethod
+    def normalize_changes(changes_text: str) -> str:
+        """
+        将整个变更文本规范化为稳定的字符串，文件按路径排序
+        """
+        files = ReviewCache._extract_files(changes_text)
+        if files is None:
+            return ReviewCache.normalize_diff(changes_text)
+        return '\n'.join(
+            f"### {path}\n{ReviewCache.normalize_diff(diff)}" for path, diff in sorted(files)
+        )
+
+    @staticmethod
+    def build_key(changes_text: str, prompt_template: str, style: str, model: str) -> str:
+        """根据规范化diff、提示词模板、审查风格和模型生成缓存键"""
+        key_source = json.dumps({
+            'changes': hashlib.sha256(ReviewCache.normalize_changes(changes_text).encode('utf-8')).hexdigest(),
+            'prompt': hashlib.sha256(prompt_template.encode('utf-8')).hexdigest(),
+            'style': style or '',
+            'model': model or '',
+        }, sort_keys=True)
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _increment_stat(cursor, name: str):
+        cursor.execute('''
+            INSERT INTO review_cache_stats (name, value) VALUES (?, 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1
+        ''', (name,))
+
+    @staticmethod
+    def get(cache_key: str) -> Optional[str]:
+        """
+        查询缓存，命中时返回审查结果并更新命中统计；过期记录视为未命中
+        """
+        try:
+            max_age = get_env_int('REVIEW_CACHE_MAX_AGE_DAYS', 30) * 24 * 3600
+            now = int(time.time())
+            with get_connection(ReviewCache.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT review_result FROM review_cache
+                    WHERE cache_key = ? AND created_at >= ?
+                ''', (cache_key, now - max_age))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute('''
+                        UPDATE review_cache SET hit_count = hit_count + 1, last_hit_at = ?
+                        WHERE cache_key = ?
+                    ''', (now, cache_key))
+                    ReviewCache._increment_stat(cursor, 'hits')
+                else:
+                    ReviewCache._increment_stat(cursor, 'misses')
+                conn.commit()
+                return row[0] if row else None
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error reading review cache: {e}")
+            return None
+
+    @staticmethod
+    def put(cache_key: str, review_result: str, model: str = ""):
+        """写入缓存，并按时间和总大小淘汰旧记录"""
+        try:
+            now = int(time.time())
+            with get_connection(ReviewCache.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO review_cache
+                    (cache_key, review_result, model, size, hit_count, created_at, last_hit_at)
+                    VALUES (?, ?, ?, ?, 0, ?, ?)
+                ''', (cache_key, review_result, model, len(review_result.encode('utf-8')), now, now))
+                ReviewCache._evict(cursor, now)
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error writing review cache: {e}")
+
+    @staticmethod
+    def _evict(cursor, now: int):
+        """删除过期记录；总大小超过上限时按最近命中时间从旧到新删除"""
+        max_age = get_env_int('REVIEW_CACHE_MAX_AGE_DAYS', 30) * 24 * 3600
+        cursor.execute('DELETE FROM review_cache WHERE created_at < ?', (now - max_age,))
+
+        max_size = get_env_int('REVIEW_CACHE_MAX_SIZE_MB', 100) * 1024 * 1024
+        cursor.execute('SELECT COALESCE(SUM(size), 0) FROM review_cache')
+        overflow = cursor.fetchone()[0] - max_size
+        if overflow <= 0:
+            return
+
+        cursor.execute('SELECT cache_key, size FROM review_cache ORDER BY last_hit_at ASC')
+        stale_keys = []
+        for cache_key, size in cursor.fetchall():
+            if overflow <= 0:
+                break
+            stale_keys.append((cache_key,))
+            overflow -= size
+        cursor.executemany('DELETE FROM review_cache WHERE cache_key = ?', stale_keys)
+        logger.info(f"Review cache evicted {len(stale_keys)} entries to stay under {max_size} bytes")
+
+    @staticmethod
+    def get_stats() -> Dict:
+        """获取缓存命中统计"""
+        try:
+            with get_connection(ReviewCache.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT name, value FROM review_cache_stats')
+                counters = dict(cursor.fetchall())
+                cursor.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM review_cache')
+                entries, total_size = cursor.fetchone()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error getting review cache stats: {e}")
+            counters, entries, total_size = {}, 0, 0
+
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'entries': entries,
+            'total_size': total_size,
+        }
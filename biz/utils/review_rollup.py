@@ -0,0 +1,265 @@
+import sqlite3
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+from biz.utils.db_pool import get_connection, sql_local_day, sql_local_day_start, table_exists
+from biz.utils.log import logger
+
+
+class ReviewRollup:
+    """
+    审查记录按天汇总 - review_daily_rollup 表按 (日期, 审查类型, 项目, 作者) 保存审查数量、
+    评分合计/最低/最高、有评分的审查数和增删行数，供图表分析直接读取，无需每次加载全部审查记录
+    （平均分只按有评分的审查计算，与 pandas 的 mean() 跳过空值一致）
+
+    汇总由数据库触发器在审查记录写入或重新审查更新时同步更新（与写入在同一事务中），
+    清理旧审查记录时不扣减，保证长期趋势在原始记录过期后仍然完整
+    """
+    DB_FILE = "data/data.db"
+
+    # 数据来源：(表名, 审查类型表达式, 时间列, 新增行数列, 删除行数列)
+    SOURCES = [
+        ('mr_review_log', "'mr'", 'updated_at', 'additions', 'deletions'),
+        ('push_review_log', "'push'", 'updated_at', 'additions', 'deletions'),
+        ('version_tracker', "{row}.review_type", 'reviewed_at', 'additions_count', 'deletions_count'),
+    ]
+    GROUP_COLUMNS = ('day', 'review_type', 'project_name', 'author')
+
+    @staticmethod
+    def init_db():
+        """创建汇总表和触发器；汇总表首次创建时从已有审查记录回填"""
+        try:
+            with get_connection(ReviewRollup.DB_FILE) as conn:
+                cursor = conn.cursor()
+                # 建表、建触发器和回填放在同一个写事务中，避免期间写入的记录被漏计
+                cursor.execute('BEGIN IMMEDIATE')
+                # 查询总是按审查类型和日期范围过滤，主键以此排序，按主键聚簇存储（WITHOUT ROWID）使范围扫描无需回表
+                exists = table_exists(cursor, 'review_daily_rollup')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS review_daily_rollup (
+                        day TEXT NOT NULL,
+                        review_type TEXT NOT NULL,
+                        project_name TEXT NOT NULL,
+                        author TEXT NOT NULL,
+                        review_count INTEGER NOT NULL DEFAULT 0,
+                        score_sum INTEGER NOT NULL DEFAULT 0,
+                        score_min INTEGER,
+                        score_max INTEGER,
+                        additions INTEGER NOT NULL DEFAULT 0,
+                        deletions INTEGER NOT NULL DEFAULT 0,
+                        scored_count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (review_type, day, project_name, author)
+                    ) WITHOUT ROWID
+                ''')
+                if exists:
+                    ReviewRollup._upgrade(cursor)
+                for source in ReviewRollup.SOURCES:
+                    for statement in ReviewRollup._trigger_sql(*source):
+                        cursor.execute(statement)
+                if not exists:
+                    ReviewRollup._fill(cursor)
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Review rollup initialization failed: {e}")
+
+    @staticmethod
+    def _upgrade(cursor):
+        """
+        旧版汇总表没有 scored_count 列：补列并按审查数量填充（旧汇总无法区分空评分，保持原有平均分口径），
+        删除旧触发器以便按新结构重建；需要精确值时可用 scripts/backfill_review_rollup.py 重建
+        """
+        cursor.execute("PRAGMA table_info(review_daily_rollup)")
+        if 'scored_count' in [row[1] for row in cursor.fetchall()]:
+            return
+        cursor.execute("ALTER TABLE review_daily_rollup ADD COLUMN scored_count INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("UPDATE review_daily_rollup SET scored_count = review_count")
+        for table, *_ in ReviewRollup.SOURCES:
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_daily_rollup")
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_daily_rollup_update")
+        cursor.execute("DROP TRIGGER IF EXISTS trg_version_tracker_daily_rollup_replace")
+        logger.info("review_daily_rollup 已补充 scored_count 列")
+
+    @staticmethod
+    def _key(row: str, type_expr: str, time_column: str) -> str:
+        """汇总键：日期按服务器本地时区划分"""
+        return (f"COALESCE({sql_local_day(f'{row}.{time_column}')}, ''), "
+                f"COALESCE({type_expr.format(row=row)}, ''), "
+                f"COALESCE({row}.project_name, ''), COALESCE({row}.author, '')")
+
+    @staticmethod
+    def _trigger_sql(table: str, type_expr: str, time_column: str,
+                     additions_column: str, deletions_column: str) -> List[str]:
+        def add(row: str) -> str:
+            return f'''
+                INSERT INTO review_daily_rollup (day, review_type, project_name, author, review_count,
+                                                 score_sum, score_min, score_max, additions, deletions,
+                                                 scored_count)
+                VALUES ({ReviewRollup._key(row, type_expr, time_column)}, 1, COALESCE({row}.score, 0),
+                        {row}.score, {row}.score,
+                        COALESCE({row}.{additions_column}, 0), COALESCE({row}.{deletions_column}, 0),
+                        CASE WHEN {row}.score IS NULL THEN 0 ELSE 1 END)
+                ON CONFLICT (review_type, day, project_name, author) DO UPDATE SET
+                    review_count = review_count + 1,
+                    score_sum = score_sum + excluded.score_sum,
+                    scored_count = scored_count + excluded.scored_count,
+                    score_min = CASE WHEN score_min IS NULL OR excluded.score_min < score_min
+                                     THEN excluded.score_min ELSE score_min END,
+                    score_max = CASE WHEN score_max IS NULL OR excluded.score_max > score_max
+                                     THEN excluded.score_max ELSE score_max END,
+                    additions = additions + excluded.additions,
+                    deletions = deletions + excluded.deletions;
+            '''
+
+        old_key = ReviewRollup._key('OLD', type_expr, time_column)
+        update_columns = ['score', time_column, 'project_name', 'author', additions_column, deletions_column]
+        if table == 'version_tracker':
+            update_columns.append('review_type')
+        statements = [
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_daily_rollup AFTER INSERT ON {table} BEGIN {add('NEW')} END",
+            # 重新审查等原地更新评分或时间时，扣除旧记录的贡献再按新值计入（最低/最高分无法扣除）
+            f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_daily_rollup_update
+            AFTER UPDATE OF {', '.join(update_columns)} ON {table}
+            BEGIN
+                UPDATE review_daily_rollup SET
+                    review_count = review_count - 1,
+                    score_sum = score_sum - COALESCE(OLD.score, 0),
+                    scored_count = scored_count - CASE WHEN OLD.score IS NULL THEN 0 ELSE 1 END,
+                    additions = additions - COALESCE(OLD.{additions_column}, 0),
+                    deletions = deletions - COALESCE(OLD.{deletions_column}, 0)
+                WHERE (day, review_type, project_name, author) = ({old_key});
+                DELETE FROM review_daily_rollup
+                WHERE review_count <= 0 AND (day, review_type, project_name, author) = ({old_key});
+                {add('NEW')}
+            END
+        ''',
+        ]
+        if table == 'version_tracker':
+            # 同一版本重新审查时 INSERT OR REPLACE 会替换旧记录，先扣除旧记录的数量和合计
+            # （最低/最高分无法扣除，保留为当天出现过的最值）
+            prev_key = ReviewRollup._key('prev', type_expr, time_column)
+            statements.append(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_version_tracker_daily_rollup_replace
+                BEFORE INSERT ON version_tracker
+                WHEN EXISTS (SELECT 1 FROM version_tracker
+                             WHERE project_name = NEW.project_name AND version_hash = NEW.version_hash)
+                BEGIN
+                    UPDATE review_daily_rollup SET
+                        review_count = review_count - 1,
+                        score_sum = score_sum - (SELECT COALESCE(prev.score, 0) FROM version_tracker AS prev
+                            WHERE prev.project_name = NEW.project_name AND prev.version_hash = NEW.version_hash),
+                        scored_count = scored_count - (SELECT CASE WHEN prev.score IS NULL THEN 0 ELSE 1 END
+                            FROM version_tracker AS prev
+                            WHERE prev.project_name = NEW.project_name AND prev.version_hash = NEW.version_hash),
+                        additions = additions - (SELECT COALESCE(prev.{additions_column}, 0) FROM version_tracker AS prev
+                            WHERE prev.project_name = NEW.project_name AND prev.version_hash = NEW.version_hash),
+                        deletions = deletions - (SELECT COALESCE(prev.{deletions_column}, 0) FROM version_tracker AS prev
+                            WHERE prev.project_name = NEW.project_name AND prev.version_hash = NEW.version_hash)
+                    WHERE (day, review_type, project_name, author) = (
+                        SELECT {prev_key} FROM version_tracker AS prev
+                        WHERE prev.project_name = NEW.project_name AND prev.version_hash = NEW.version_hash);
+                    DELETE FROM review_daily_rollup WHERE review_count <= 0
+                        AND (day, review_type, project_name, author) = (
+                            SELECT {prev_key} FROM version_tracker AS prev
+                            WHERE prev.project_name = NEW.project_name AND prev.version_hash = NEW.version_hash);
+                END
+            ''')
+        return statements
+
+    @staticmethod
+    def _fill(cursor, since_day: Optional[str] = None):
+        for table, type_expr, time_column, additions_column, deletions_column in ReviewRollup.SOURCES:
+            where, params = '', []
+            if since_day:
+                # 本地时区当天 0 点对应的时间戳
+                where = f" WHERE {time_column} >= {sql_local_day_start()}"
+                params.append(since_day)
+            cursor.execute(f'''
+                INSERT INTO review_daily_rollup (day, review_type, project_name, author, review_count,
+                                                 score_sum, score_min, score_max, additions, deletions,
+                                                 scored_count)
+                SELECT {ReviewRollup._key(table, type_expr, time_column)}, COUNT(*), COALESCE(SUM(score), 0),
+                       MIN(score), MAX(score), COALESCE(SUM({additions_column}), 0), COALESCE(SUM({deletions_column}), 0),
+                       COUNT(score)
+                FROM {table}{where}
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT (review_type, day, project_name, author) DO UPDATE SET
+                    review_count = review_count + excluded.review_count,
+                    score_sum = score_sum + excluded.score_sum,
+                    scored_count = scored_count + excluded.scored_count,
+                    score_min = CASE WHEN score_min IS NULL OR excluded.score_min < score_min
+                                     THEN excluded.score_min ELSE score_min END,
+                    score_max = CASE WHEN score_max IS NULL OR excluded.score_max > score_max
+                                     THEN excluded.score_max ELSE score_max END,
+                    additions = additions + excluded.additions,
+                    deletions = deletions + excluded.deletions
+            ''', params)
+
+    @staticmethod
+    def rebuild(since_day: Optional[str] = None) -> int:
+        """
+        按现有审查记录重新生成汇总（用于旧数据库回填或手工修改数据后的校正）
+        注意：已被清理的审查记录无法恢复，重建范围内这部分历史汇总会丢失，可用 since_day 限定范围
+
+        :param since_day: 只重建该日期（YYYY-MM-DD，含）之后的汇总，None 表示全部重建
+        :return: 重建后的汇总行数
+        """
+        with get_connection(ReviewRollup.DB_FILE) as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            if since_day:
+                cursor.execute('DELETE FROM review_daily_rollup WHERE day >= ?', (since_day,))
+            else:
+                cursor.execute('DELETE FROM review_daily_rollup')
+            ReviewRollup._fill(cursor, since_day)
+            cursor.execute('SELECT COUNT(*) FROM review_daily_rollup' + (' WHERE day >= ?' if since_day else ''),
+                           (since_day,) if since_day else ())
+            count = cursor.fetchone()[0]
+            conn.commit()
+            return count
+
+    @staticmethod
+    def query(group_by: Sequence[str] = ('day',), review_types: List[str] = None,
+              start_day: str = None, end_day: str = None,
+              authors: List[str] = None, projects: List[str] = None) -> pd.DataFrame:
+        """
+        按指定维度聚合汇总数据
+
+        :param group_by: 分组维度，取值为 day/review_type/project_name/author 的组合
+        :param start_day: 开始日期 YYYY-MM-DD（含）
+        :param end_day: 结束日期 YYYY-MM-DD（含）
+        :return: 分组列 + review_count/avg_score/score_min/score_max/additions/deletions
+        """
+        group_by = [column for column in group_by if column in ReviewRollup.GROUP_COLUMNS]
+        conditions, params = [], []
+        for column, values in (('review_type', review_types), ('author', authors), ('project_name', projects)):
+            if values:
+                conditions.append(f"{column} IN ({','.join(['?'] * len(values))})")
+                params.extend(values)
+        if start_day:
+            conditions.append('day >= ?')
+            params.append(start_day)
+        if end_day:
+            conditions.append('day <= ?')
+            params.append(end_day)
+
+        select = ', '.join(group_by + [
+            'SUM(review_count) AS review_count',
+            'SUM(score_sum) * 1.0 / NULLIF(SUM(scored_count), 0) AS avg_score',
+            'MIN(score_min) AS score_min',
+            'MAX(score_max) AS score_max',
+            'SUM(additions) AS additions',
+            'SUM(deletions) AS deletions',
+        ])
+        sql = f"SELECT {select} FROM review_daily_rollup"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        if group_by:
+            sql += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+        try:
+            with get_connection(ReviewRollup.DB_FILE) as conn:
+                return pd.read_sql_query(sql=sql, con=conn, params=params)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error querying review rollup: {e}")
+            return pd.DataFrame()
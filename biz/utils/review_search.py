@@ -0,0 +1,239 @@
+import json
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_pool import get_connection, get_db_backend, table_exists
+from biz.utils.log import logger
+
+
+class ReviewSearch:
+    """
+    审查记录全文索引 - review_search（SQLite FTS5，trigram 分词）按审查结果、提交说明和文件路径建立索引，
+    支持中文等任意子串匹配，仪表盘搜索不再需要把全部记录读入内存逐列扫描
+
+    审查结果、文件详情以压缩后的 blob 引用保存，触发器无法读取原文，因此索引分两步维护：
+    - 审查记录写入/更新时，触发器在同一事务中把文档编号加入 review_search_pending 队列，删除时同步删除索引
+    - sync() 读取队列中的记录、还原原文后写入索引；批量写入提交后和每次搜索前执行，保证搜索结果完整
+
+    文档编号为 id * 4 + 表编号，按编号即可定位原记录和删除索引
+    """
+    DB_FILE = "data/data.db"
+
+    # 索引来源：(表名, 表编号, 提交说明列)，表编号与 ReviewService._REVIEW_TABLES 的顺序一致
+    SOURCES = [
+        ('mr_review_log', 1, 'commit_messages'),
+        ('push_review_log', 2, 'commit_messages'),
+        ('version_tracker', 3, 'commit_message'),
+    ]
+    # bm25 列权重：(审查结果, 提交说明, 文件路径)，提交说明和文件路径较短，命中时更相关
+    WEIGHTS = (1.0, 2.0, 2.0)
+    # trigram 分词最短可索引的字符数，更短的词按 LIKE 扫描索引内容
+    MIN_TERM_LENGTH = 3
+
+    @staticmethod
+    def init_db():
+        """创建全文索引、待索引队列和触发器；首次创建时把已有审查记录全部加入队列"""
+        if get_db_backend() != 'sqlite':
+            return
+        try:
+            with get_connection(ReviewSearch.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                exists = table_exists(cursor, 'review_search')
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS review_search
+                    USING fts5(review_result, commit_messages, file_paths, tokenize = 'trigram')
+                ''')
+                cursor.execute('CREATE TABLE IF NOT EXISTS review_search_pending (doc_id INTEGER PRIMARY KEY)')
+                for table, code, commit_column in ReviewSearch.SOURCES:
+                    for statement in ReviewSearch._trigger_sql(table, code, commit_column):
+                        cursor.execute(statement)
+                    if not exists:
+                        cursor.execute(f"INSERT OR IGNORE INTO review_search_pending (doc_id) "
+                                       f"SELECT id * 4 + {code} FROM {table}")
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            # 旧版 SQLite 没有 FTS5 或 trigram 分词时，搜索退回内存匹配
+            logger.error(f"Review search index initialization failed: {e}")
+
+    @staticmethod
+    def _trigger_sql(table: str, code: int, commit_column: str) -> List[str]:
+        file_columns = 'file_details, file_paths' if table == 'version_tracker' else 'file_details'
+        statements = [
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_search_insert AFTER INSERT ON {table}
+                BEGIN
+                    INSERT OR IGNORE INTO review_search_pending (doc_id) VALUES (NEW.id * 4 + {code});
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_search_update
+                AFTER UPDATE OF review_result, {commit_column}, {file_columns} ON {table}
+                BEGIN
+                    INSERT OR IGNORE INTO review_search_pending (doc_id) VALUES (NEW.id * 4 + {code});
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_search_delete AFTER DELETE ON {table}
+                BEGIN
+                    DELETE FROM review_search WHERE rowid = OLD.id * 4 + {code};
+                    DELETE FROM review_search_pending WHERE doc_id = OLD.id * 4 + {code};
+                END''',
+        ]
+        if table == 'version_tracker':
+            # INSERT OR REPLACE 删除旧记录时不触发 DELETE 触发器，先删除旧记录的索引
+            statements.append(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_version_tracker_search_replace BEFORE INSERT ON version_tracker
+                BEGIN
+                    DELETE FROM review_search WHERE rowid IN (
+                        SELECT prev.id * 4 + {code} FROM version_tracker AS prev
+                        WHERE prev.project_name = NEW.project_name AND prev.version_hash = NEW.version_hash);
+                END''')
+        return statements
+
+    @staticmethod
+    def is_available() -> bool:
+        """当前数据库是否支持全文搜索"""
+        if get_db_backend() != 'sqlite':
+            return False
+        try:
+            with get_connection(ReviewSearch.DB_FILE) as conn:
+                return table_exists(conn.cursor(), 'review_search')
+        except sqlite3.DatabaseError:
+            return False
+
+    @staticmethod
+    def sync(limit: int = None, batch_size: int = 200) -> int:
+        """
+        将待索引队列中的审查记录写入全文索引，返回处理的记录数
+
+        :param limit: 最多处理的记录数，None 表示处理完整个队列
+        :param batch_size: 每个事务处理的记录数
+        """
+        if get_db_backend() != 'sqlite':
+            return 0
+        synced = 0
+        try:
+            while limit is None or synced < limit:
+                size = batch_size if limit is None else min(batch_size, limit - synced)
+                with get_connection(ReviewSearch.DB_FILE) as conn:
+                    cursor = conn.cursor()
+                    # 读取记录和写入索引在同一个写事务中，期间的更新会在下一轮重新入队
+                    cursor.execute('BEGIN IMMEDIATE')
+                    doc_ids = [row[0] for row in cursor.execute(
+                        'SELECT doc_id FROM review_search_pending ORDER BY doc_id LIMIT ?', (size,))]
+                    if not doc_ids:
+                        conn.commit()
+                        break
+                    placeholders = ','.join(['?'] * len(doc_ids))
+                    documents = ReviewSearch._load_documents(cursor, doc_ids)
+                    cursor.execute(f'DELETE FROM review_search WHERE rowid IN ({placeholders})', doc_ids)
+                    cursor.executemany(
+                        'INSERT INTO review_search (rowid, review_result, commit_messages, file_paths) '
+                        'VALUES (?, ?, ?, ?)', documents)
+                    cursor.execute(f'DELETE FROM review_search_pending WHERE doc_id IN ({placeholders})', doc_ids)
+                    conn.commit()
+                synced += len(doc_ids)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error syncing review search index: {e}")
+        if synced:
+            logger.info(f"全文索引已更新 {synced} 条审查记录")
+        return synced
+
+    @staticmethod
+    def _load_documents(cursor, doc_ids: List[int]) -> List[Tuple]:
+        """读取待索引记录并还原大字段原文，已删除的记录不再索引"""
+        rows = []
+        for table, code, commit_column in ReviewSearch.SOURCES:
+            ids = [doc_id // 4 for doc_id in doc_ids if doc_id % 4 == code]
+            if not ids:
+                continue
+            paths_column = 'file_paths' if table == 'version_tracker' else 'NULL'
+            cursor.execute(f"SELECT id * 4 + {code}, review_result, {commit_column}, file_details, {paths_column} "
+                           f"FROM {table} WHERE id IN ({','.join(['?'] * len(ids))})", ids)
+            rows.extend(cursor.fetchall())
+        resolved = BlobStore.resolve_many(value for row in rows for value in (row[1], row[3]))
+        return [(doc_id, resolved.get(review_result, review_result) or '', commit_messages or '',
+                 ReviewSearch._file_paths(resolved.get(file_details, file_details), file_paths))
+                for doc_id, review_result, commit_messages, file_details, file_paths in rows]
+
+    @staticmethod
+    def _file_paths(file_details: Optional[str], file_paths: Optional[str]) -> str:
+        """从文件详情和 file_paths 中提取文件路径，每行一个"""
+        paths = []
+        for value in (file_paths, file_details):
+            if not value:
+                continue
+            try:
+                items = json.loads(value)
+            except (TypeError, ValueError):
+                continue
+            for item in items if isinstance(items, list) else []:
+                if isinstance(item, str):
+                    paths.append(item)
+                elif isinstance(item, dict):
+                    paths.extend(item[key] for key in ('new_path', 'old_path', 'path', 'file_path')
+                                 if isinstance(item.get(key), str))
+        return '\n'.join(dict.fromkeys(path for path in paths if path))
+
+    @staticmethod
+    def parse_query(query: str) -> Tuple[Optional[str], List[str]]:
+        """
+        将搜索框输入转换为 (FTS5 MATCH 表达式, 需要 LIKE 匹配的短词)，
+        空格分隔的各个词都需要出现（AND），词内的符号按字面匹配
+        """
+        terms = [term for term in (query or '').split() if term]
+        long_terms = [term for term in terms if len(term) >= ReviewSearch.MIN_TERM_LENGTH]
+        short_terms = [term for term in terms if len(term) < ReviewSearch.MIN_TERM_LENGTH]
+        match = ' AND '.join('"' + term.replace('"', '""') + '"' for term in long_terms) or None
+        return match, short_terms
+
+    @staticmethod
+    def hits_sql(query: str) -> Tuple[Optional[str], List]:
+        """生成命中文档的查询 (doc_id, rank)，rank 越小越相关；没有可搜索的词时返回 (None, [])"""
+        match, short_terms = ReviewSearch.parse_query(query)
+        conditions, params = [], []
+        if match:
+            conditions.append('review_search MATCH ?')
+            params.append(match)
+        for term in short_terms:
+            pattern = '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+            conditions.append("(review_result LIKE ? ESCAPE '\\' OR commit_messages LIKE ? ESCAPE '\\' "
+                              "OR file_paths LIKE ? ESCAPE '\\')")
+            params.extend([pattern] * 3)
+        if not conditions:
+            return None, []
+        rank = f"bm25(review_search, {', '.join(str(weight) for weight in ReviewSearch.WEIGHTS)})" if match else '0'
+        return f"SELECT rowid AS doc_id, {rank} AS rank FROM review_search WHERE {' AND '.join(conditions)}", params
+
+    @staticmethod
+    def snippets(query: str, doc_ids: Iterable[int], markers: Tuple[str, str] = ('**', '**'),
+                 tokens: int = 24) -> Dict[int, str]:
+        """生成命中文档的高亮摘要 {doc_id: 摘要}"""
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return {}
+        match, short_terms = ReviewSearch.parse_query(query)
+        placeholders = ','.join(['?'] * len(doc_ids))
+        with get_connection(ReviewSearch.DB_FILE) as conn:
+            if match:
+                rows = conn.execute(
+                    f"SELECT rowid, snippet(review_search, -1, ?, ?, '…', ?) FROM review_search "
+                    f"WHERE review_search MATCH ? AND rowid IN ({placeholders})",
+                    [markers[0], markers[1], tokens, match] + doc_ids).fetchall()
+                return {doc_id: snippet for doc_id, snippet in rows}
+            rows = conn.execute(
+                f"SELECT rowid, review_result, commit_messages, file_paths FROM review_search "
+                f"WHERE rowid IN ({placeholders})", doc_ids).fetchall()
+        # 只有短词时没有 MATCH 上下文，按第一个命中位置截取
+        return {row[0]: ReviewSearch._highlight(row[1:], short_terms, markers, tokens * 2) for row in rows}
+
+    @staticmethod
+    def _highlight(texts: Iterable[str], terms: List[str], markers: Tuple[str, str], width: int) -> str:
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        for text in texts:
+            found = pattern.search(text or '')
+            if not found:
+                continue
+            start = max(found.start() - width // 2, 0)
+            end = min(start + width, len(text))
+            fragment = pattern.sub(lambda m: f"{markers[0]}{m.group(0)}{markers[1]}", text[start:end])
+            return ('…' if start > 0 else '') + fragment + ('…' if end < len(text) else '')
+        return ''
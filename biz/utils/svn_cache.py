@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+import uuid
+import zlib
+from typing import List, Optional, Tuple
+
+from biz.utils.default_config import get_env_bool, get_env_int, get_env_with_default
+from biz.utils.log import logger
+
+
+class SVNCache:
+    """
+    SVN 本地缓存 - 已提交的 revision 不可变，按 (仓库根URL, 类型, 路径, revision) 缓存 svn log 条目、
+    文件 diff 和文件内容，手动触发、定时重扫等重复获取同一 revision 时不再访问服务器
+
+    目录结构（SVN_CACHE_DIR，默认 data/svn_cache）：
+    - objects/<sha256 前两位>/<sha256>：按内容哈希保存的 zlib 压缩文本，相同内容只存一份
+    - refs/<key 哈希前两位>/<key 哈希>：缓存键指向的内容哈希
+
+    读取时更新文件的修改时间作为最近访问时间，总大小超过 SVN_CACHE_MAX_MB 时按最近访问时间淘汰到上限的 90%。
+    文件均先写临时文件再改名，多个进程可以同时读写
+    """
+    _lock = threading.Lock()
+    # 当前进程估计的缓存总大小，首次写入时扫描目录得到
+    _size: Optional[int] = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return get_env_bool('SVN_CACHE_ENABLED', True)
+
+    @staticmethod
+    def get_dir() -> str:
+        return get_env_with_default('SVN_CACHE_DIR', 'data/svn_cache')
+
+    @staticmethod
+    def _path(kind: str, digest: str) -> str:
+        return os.path.join(SVNCache.get_dir(), kind, digest[:2], digest)
+
+    @staticmethod
+    def _ref_path(key: Tuple) -> str:
+        digest = hashlib.sha256('\0'.join(str(part) for part in key).encode('utf-8')).hexdigest()
+        return SVNCache._path('refs', digest)
+
+    @staticmethod
+    def get(*key) -> Optional[str]:
+        """
+        读取缓存，未命中时返回 None
+
+        :param key: 缓存键，如 (仓库根URL, 'diff', 文件路径, 旧版本, 新版本)
+        """
+        if not SVNCache.is_enabled():
+            return None
+        ref_path = SVNCache._ref_path(key)
+        try:
+            with open(ref_path, encoding='utf-8') as f:
+                object_path = SVNCache._path('objects', f.read().strip())
+            with open(object_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"读取SVN缓存失败: {e}")
+            return None
+        try:
+            text = zlib.decompress(data).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError) as e:
+            logger.warning(f"SVN缓存文件已损坏，删除后重新获取: {e}")
+            SVNCache._remove(ref_path, object_path)
+            return None
+        try:
+            # 更新最近访问时间
+            os.utime(ref_path)
+            os.utime(object_path)
+        except OSError:
+            pass
+        return text
+
+    @staticmethod
+    def put(value: str, *key):
+        """
+        写入缓存；只应缓存按确定 revision 获取、不会再变化的内容
+
+        :param value: 文本内容
+        :param key: 缓存键
+        """
+        if not SVNCache.is_enabled() or value is None:
+            return
+        raw = value.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        object_path = SVNCache._path('objects', digest)
+        ref_path = SVNCache._ref_path(key)
+        added = 0
+        try:
+            if os.path.exists(object_path):
+                os.utime(object_path)
+            else:
+                added += SVNCache._write(object_path, zlib.compress(raw, 6))
+            added += SVNCache._write(ref_path, digest.encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"写入SVN缓存失败: {e}")
+            return
+        SVNCache._account(added)
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    @staticmethod
+    def _remove(*paths: str):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _account(added: int):
+        """累计写入量，超过上限时淘汰"""
+        max_bytes = get_env_int('SVN_CACHE_MAX_MB', 512) * 1024 * 1024
+        with SVNCache._lock:
+            if SVNCache._size is None:
+                SVNCache._size = sum(size for _, size, _ in SVNCache._entries())
+            SVNCache._size += added
+            over = SVNCache._size > max_bytes
+        if over:
+            SVNCache.evict(max_bytes)
+
+    @staticmethod
+    def _entries() -> List[Tuple[float, int, str]]:
+        """缓存目录中的全部文件：(最近访问时间, 大小, 路径)"""
+        entries = []
+        for kind in ('refs', 'objects'):
+            root = os.path.join(SVNCache.get_dir(), kind)
+            if not os.path.isdir(root):
+                continue
+            for bucket in os.scandir(root):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @staticmethod
+    def evict(max_bytes: int = None) -> int:
+        """
+        按最近访问时间淘汰缓存，直到总大小不超过上限的 90%，返回删除的文件数
+        引用和内容分别淘汰：内容被删除的引用在读取时视为未命中
+
+        :param max_bytes: 缓存上限，默认读取 SVN_CACHE_MAX_MB
+        """
+        if max_bytes is None:
+            max_bytes = get_env_int('SVN_CACHE_MAX_MB', 512) * 1024 * 1024
+        with SVNCache._lock:
+            entries = sorted(SVNCache._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(max_bytes * 0.9)
+            removed = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                SVNCache._remove(path)
+                total -= size
+                removed += 1
+            SVNCache._size = total
+        if removed:
+            logger.info(f"SVN缓存淘汰 {removed} 个文件，当前大小 {total / 1024 / 1024:.1f} MB")
+        return removed
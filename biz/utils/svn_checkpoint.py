@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 SVN增量检查机制
-记录每个仓库的上次检查时间，只处理新的提交
+记录每个仓库最后处理的revision和上次检查时间，只处理新的提交
 """
 
 import sqlite3
@@ -10,6 +10,9 @@ import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
+
+from biz.utils.db_pool import get_connection, table_exists
 
 # 获取日志器
 logger = logging.getLogger(__name__)
@@ -23,15 +26,11 @@ class SVNCheckpointManager:
     def init_db():
         """初始化检查点表"""
         try:
-            with sqlite3.connect(SVNCheckpointManager.DB_FILE) as conn:
+            with get_connection(SVNCheckpointManager.DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # 检查表是否已存在
-                cursor.execute('''
-                    SELECT name FROM sqlite_master 
-                    WHERE type='table' AND name='svn_checkpoints'
-                ''')
-                table_exists = cursor.fetchone() is not None
+                existed = table_exists(cursor, 'svn_checkpoints')
                 
                 # 创建检查点表
                 cursor.execute('''
@@ -48,7 +47,7 @@ class SVNCheckpointManager:
                 conn.commit()
                 
                 # 只在第一次创建表时打印消息
-                if not table_exists:
+                if not existed:
                     logger.info("SVN检查点表初始化成功")
                 
         except sqlite3.DatabaseError as e:
@@ -66,7 +65,7 @@ class SVNCheckpointManager:
             上次检查的时间戳，如果没有记录则返回24小时前
         """
         try:
-            with sqlite3.connect(SVNCheckpointManager.DB_FILE) as conn:
+            with get_connection(SVNCheckpointManager.DB_FILE) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT last_check_time FROM svn_checkpoints
@@ -84,6 +83,28 @@ class SVNCheckpointManager:
             print(f"获取检查点失败: {e}")
             return int(time.time() - 24 * 3600)
     
+    @staticmethod
+    def get_last_revision(repo_name: str) -> Optional[int]:
+        """
+        获取仓库最后处理的revision
+        
+        Args:
+            repo_name: 仓库名称
+            
+        Returns:
+            revision号，没有记录时返回None（首次检查按上次检查时间开始）
+        """
+        try:
+            with get_connection(SVNCheckpointManager.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT last_revision FROM svn_checkpoints WHERE repo_name = ?', (repo_name,))
+                result = cursor.fetchone()
+        except sqlite3.DatabaseError as e:
+            print(f"获取检查点revision失败: {e}")
+            return None
+        revision = str(result[0] or '').strip().lstrip('r') if result else ''
+        return int(revision) if revision.isdigit() else None
+    
     @staticmethod
     def update_checkpoint(repo_name: str, last_revision: str = None):
         """
@@ -91,12 +112,12 @@ class SVNCheckpointManager:
         
         Args:
             repo_name: 仓库名称
-            last_revision: 最后处理的revision
+            last_revision: 最后处理的revision，为None时只更新检查时间，保留已记录的revision
         """
         try:
             current_time = int(time.time())
             
-            with sqlite3.connect(SVNCheckpointManager.DB_FILE) as conn:
+            with get_connection(SVNCheckpointManager.DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # 使用UPSERT操作
@@ -107,7 +128,7 @@ class SVNCheckpointManager:
                     ON CONFLICT(repo_name) 
                     DO UPDATE SET 
                         last_check_time=excluded.last_check_time,
-                        last_revision=excluded.last_revision,
+                        last_revision=COALESCE(excluded.last_revision, last_revision),
                         updated_at=excluded.updated_at
                 ''', (repo_name, current_time, last_revision, current_time, current_time))
                 
@@ -121,7 +142,7 @@ class SVNCheckpointManager:
     def get_all_checkpoints():
         """获取所有检查点信息"""
         try:
-            with sqlite3.connect(SVNCheckpointManager.DB_FILE) as conn:
+            with get_connection(SVNCheckpointManager.DB_FILE) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT repo_name, last_check_time, last_revision, updated_at
@@ -0,0 +1,58 @@
+from unittest import TestCase, main
+
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.db_pool import get_connection
+
+
+class TestBlobStore(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        BlobStore.init_db()
+        with get_connection(self.db_file) as conn:
+            conn.execute("CREATE TABLE mr_review_log (id INTEGER PRIMARY KEY, review_result TEXT, file_details TEXT)")
+            conn.execute("CREATE TABLE push_review_log (id INTEGER PRIMARY KEY, review_result TEXT, file_details TEXT)")
+            conn.execute("CREATE TABLE version_tracker (id INTEGER PRIMARY KEY, review_result TEXT, file_details TEXT)")
+
+    def tearDown(self):
+        BlobStore._cache.clear()
+
+    def _put(self, text):
+        with get_connection(self.db_file) as conn:
+            return BlobStore.put(conn.cursor(), text)
+
+    def test_round_trip_and_dedup(self):
+        text = "审查结果：代码结构清晰。\n" * 200
+        ref = self._put(text)
+        self.assertTrue(BlobStore.is_ref(ref))
+        self.assertEqual(self._put(text), ref)
+        with get_connection(self.db_file) as conn:
+            count, size = conn.execute("SELECT COUNT(*), SUM(length(data)) FROM review_blobs").fetchone()
+        self.assertEqual(count, 1)
+        self.assertLess(size, len(text.encode('utf-8')))
+
+        BlobStore._cache.clear()
+        self.assertEqual(BlobStore.resolve(ref), text)
+        # 短文本和旧数据中的内联文本原样返回
+        self.assertEqual(self._put("总分:90分"), "总分:90分")
+        self.assertEqual(BlobStore.resolve("总分:90分"), "总分:90分")
+
+    def test_migrate_and_gc(self):
+        text = "x" * 4096
+        with get_connection(self.db_file) as conn:
+            conn.execute("INSERT INTO mr_review_log (review_result, file_details) VALUES (?, ?)", (text, "short"))
+        self.assertEqual(BlobStore.migrate('mr_review_log'), 1)
+        with get_connection(self.db_file) as conn:
+            stored, details = conn.execute("SELECT review_result, file_details FROM mr_review_log").fetchone()
+        self.assertTrue(BlobStore.is_ref(stored))
+        self.assertEqual(details, "short")
+        self.assertEqual(BlobStore.resolve_records([{'review_result': stored}])[0]['review_result'], text)
+
+        self.assertEqual(BlobStore.gc(), 0)
+        with get_connection(self.db_file) as conn:
+            conn.execute("DELETE FROM mr_review_log")
+        self.assertEqual(BlobStore.gc(), 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+from unittest import TestCase, main
+
+from biz.utils.code_reviewer import CodeReviewer
+
+
+class TestMergeChunkResults(TestCase):
+    def setUp(self):
+        # 合并结果不依赖提示词和模型客户端，跳过 __init__
+        self.reviewer = CodeReviewer.__new__(CodeReviewer)
+
+    def test_unscored_batches_are_excluded(self):
+        batches = [([{'file_path': 'a.py'}], 100), ([{'file_path': 'b.py'}], 300), ([{'file_path': 'c.py'}], 600)]
+        results = ['总分:80分', '总分：60分', '审查失败，没有评分']
+        merged = self.reviewer._merge_chunk_results(batches, results)
+        # (80*100 + 60*300) / 400 = 65，第三批不计入
+        self.assertEqual(CodeReviewer.parse_review_score(merged), 65)
+        self.assertEqual(merged.count('总分'), 1)
+
+    def test_no_scored_batches(self):
+        merged = self.reviewer._merge_chunk_results([([{'file_path': 'a.py'}], 100)], [''])
+        self.assertEqual(CodeReviewer.parse_review_score(merged), 0)
+
+
+if __name__ == '__main__':
+    main()
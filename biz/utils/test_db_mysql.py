@@ -0,0 +1,205 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+from unittest import TestCase, main, skipUnless
+from unittest.mock import patch
+
+from biz.llm.rate_limiter import RateLimiter
+from biz.service import review_service
+from biz.service.review_service import ReviewService
+from biz.utils import db_mysql
+from biz.utils.code_reviewer import CodeReviewer
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.db_pool import close_all_connections, get_connection, open_connection
+from biz.utils.review_rollup import ReviewRollup
+from biz.utils.svn_checkpoint import SVNCheckpointManager
+from biz.utils.version_tracker import VersionTracker
+from biz.utils.write_buffer import ReviewWriteBuffer
+
+
+class TestTranslateSql(TestCase):
+    def test_placeholders_and_percent(self):
+        self.assertEqual(db_mysql.translate_sql("SELECT * FROM t WHERE a = ? AND b LIKE 'blob:%' AND c = '?'"),
+                         "SELECT * FROM t WHERE a = %s AND b LIKE 'blob:%%' AND c = '?'")
+        # 不带参数执行时 PyMySQL 不做格式化，% 保持原样
+        self.assertEqual(db_mysql.translate_sql("DELETE FROM t WHERE b LIKE 'blob:%'", has_params=False),
+                         "DELETE FROM t WHERE b LIKE 'blob:%'")
+
+    def test_sqlite_syntax(self):
+        self.assertEqual(db_mysql.translate_sql("INSERT OR REPLACE INTO t (a) VALUES (?)"),
+                         "REPLACE INTO t (a) VALUES (%s)")
+        self.assertEqual(db_mysql.translate_sql("INSERT OR IGNORE INTO t (a) VALUES (?)"),
+                         "INSERT IGNORE INTO t (a) VALUES (%s)")
+        self.assertEqual(
+            db_mysql.translate_sql("INSERT INTO t (k, v) VALUES (?, ?) ON CONFLICT(k) DO UPDATE SET v = v + excluded.v"),
+            "INSERT INTO t (k, v) VALUES (%s, %s) ON DUPLICATE KEY UPDATE v = v + VALUES(v)")
+        for statement in ("PRAGMA optimize", "CREATE TABLE IF NOT EXISTS t (a TEXT)",
+                          "CREATE INDEX IF NOT EXISTS i ON t(a)", "ALTER TABLE t ADD COLUMN b TEXT"):
+            self.assertIsNone(db_mysql.translate_sql(statement))
+
+
+class TestMySQLSchema(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        """在临时 SQLite 数据库中创建全部表，与 MySQL 表结构对照"""
+        super().setUp()
+        ReviewService.init_db()
+        ReviewService.upgrade_db_add_file_details()
+        SVNCheckpointManager.init_db()
+        RateLimiter.init_db()
+        ReviewWriteBuffer.init_db()
+
+    def test_tables_match_sqlite(self):
+        with get_connection(self.db_file) as conn:
+            # 全文索引只在 SQLite 中使用
+            tables = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+                      if not row[0].startswith('review_search')}
+            self.assertEqual(tables, set(db_mysql.TABLES))
+            for table, (columns, _) in db_mysql.TABLES.items():
+                # 列顺序需要一致：部分代码按 SELECT * 的列顺序解构
+                sqlite_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                self.assertEqual([name for name, _ in columns], sqlite_columns, table)
+
+    def test_triggers_match_sqlite(self):
+        with get_connection(self.db_file) as conn:
+            triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+                        if '_search_' not in row[0]}
+        # MySQL 的 REPLACE 会触发 DELETE 触发器，review_summary 不需要单独的替换触发器
+        triggers.discard('trg_version_tracker_summary_replace')
+        self.assertEqual(triggers, set(db_mysql.trigger_sql()))
+
+
+class _Recorder:
+    """转发给真实连接/cursor，并记录执行的 SQL"""
+
+    def __init__(self, target, statements):
+        self._target = target
+        self._statements = statements
+
+    def cursor(self):
+        return _Recorder(self._target.cursor(), self._statements)
+
+    def execute(self, sql, params=()):
+        self._statements.append(sql)
+        return _Recorder(self._target.execute(sql, params), self._statements)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+def _unaliased_derived_tables(sql: str) -> list:
+    """FROM/JOIN 之后缺少别名的子查询（MySQL 要求派生表必须有别名）"""
+    missing = []
+    for match in re.finditer(r'\b(FROM|JOIN)\s*\(', sql, re.IGNORECASE):
+        depth, pos = 0, match.end() - 1
+        while True:
+            depth += {'(': 1, ')': -1}.get(sql[pos], 0)
+            if depth == 0:
+                break
+            pos += 1
+        if not re.match(r'\s*AS\s+\w+', sql[pos + 1:], re.IGNORECASE):
+            missing.append(sql[match.start():pos + 1])
+    return missing
+
+
+class TestReviewQueriesForMySQL(TempDatabaseMixin, TestCase):
+    """在 SQLite 上执行审查查询并记录 SQL，检查转换后的语句能在 MySQL 上执行"""
+
+    def setUp(self):
+        super().setUp()
+        ReviewService.init_db()
+        self.statements = []
+        real_get_connection = review_service.get_connection
+
+        @contextmanager
+        def recording_connection(db_file):
+            with real_get_connection(db_file) as conn:
+                yield _Recorder(conn, self.statements)
+
+        for name, replacement in (('get_connection', recording_connection),
+                                  ('open_connection', lambda db_file: _Recorder(open_connection(db_file),
+                                                                                self.statements))):
+            patcher = patch.object(review_service, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertMySQLCompatible(self):
+        self.assertTrue(self.statements)
+        for sql in self.statements:
+            translated = db_mysql.translate_sql(sql)
+            self.assertIsNotNone(translated, sql)
+            # 全文索引（FTS5 虚拟表）只在 SQLite 中查询，可以使用 rowid
+            if 'review_search' not in sql:
+                self.assertNotRegex(translated, r'(?i)\browid\b')
+            self.assertEqual(_unaliased_derived_tables(translated), [], translated)
+
+    def test_statistics_and_search(self):
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='carol', review_type='svn', score=70,
+                                             review_result='空指针检查')
+        first = ReviewService.get_review_statistics(score_range=[0, 100], include_blobs=False, limit=1)
+        self.assertTrue(first['success'])
+        ReviewService.get_review_statistics(authors=['carol'], limit=1, cursor=first['next_cursor'])
+        result = ReviewService.search('空指针', limit=5)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total_count'], 1)
+        self.assertMySQLCompatible()
+
+    def test_retry_review(self):
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='carol', review_type='svn', score=70)
+        with patch.object(CodeReviewer, '__init__', return_value=None), \
+                patch.object(CodeReviewer, 'review_and_strip_code', return_value='总分:40分'), \
+                patch('biz.event.event_manager.on_svn_reviewed'):
+            ReviewService._async_retry_review('svn', VersionTracker.generate_version_hash([{'id': 'r1'}]))
+        self.assertEqual(ReviewService.get_review_statistics(review_type='svn')['data'][0]['score'], 40)
+        self.assertMySQLCompatible()
+
+
+@skipUnless(os.environ.get('MYSQL_TEST_DATABASE'), '未设置 MYSQL_TEST_DATABASE')
+class TestMySQLBackend(TestCase):
+    """
+    DB_BACKEND=mysql 的端到端测试，连接 MYSQL_HOST 等配置的服务器上的 MYSQL_TEST_DATABASE 库；
+    每个用例开始时清空其中的审查表，不要指向正在使用的数据库
+    """
+
+    def setUp(self):
+        env = patch.dict(os.environ, {'DB_BACKEND': 'mysql', 'MYSQL_DATABASE': os.environ['MYSQL_TEST_DATABASE']})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(close_all_connections)
+        with get_connection(ReviewService.DB_FILE) as conn:
+            for table in db_mysql.TABLES:
+                conn.execute(f"TRUNCATE TABLE {table}")
+
+    def test_statistics_search_and_retry(self):
+        now = int(time.time())
+        with get_connection(ReviewService.DB_FILE) as conn:
+            conn.executemany("INSERT INTO push_review_log (project_name, author, updated_at, score) VALUES (?, ?, ?, ?)",
+                             [('p', 'alice', now - 86400, 80), ('p', 'alice', now, 60)])
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='carol', review_type='svn', score=None)
+
+        first = ReviewService.get_review_statistics(limit=2)
+        self.assertTrue(first['success'], first.get('error'))
+        self.assertEqual(first['total_count'], 3)
+        self.assertEqual(len(first['data']), 2)
+        rest = ReviewService.get_review_statistics(limit=2, cursor=first['next_cursor'])
+        self.assertEqual([row['score'] for row in rest['data']], [80])
+        self.assertEqual(ReviewService.get_review_statistics(score_range=[70, 100])['total_count'], 2)
+
+        # 全文索引只在 SQLite 中使用
+        result = ReviewService.search('空指针')
+        self.assertFalse(result['success'])
+        self.assertIn('不支持', result['error'])
+
+        with patch.object(CodeReviewer, '__init__', return_value=None), \
+                patch.object(CodeReviewer, 'review_and_strip_code', return_value='总分:40分'), \
+                patch('biz.event.event_manager.on_svn_reviewed'):
+            ReviewService._async_retry_review('svn', VersionTracker.generate_version_hash([{'id': 'r1'}]))
+        svn = ReviewService.get_review_statistics(review_type='svn')['data']
+        self.assertEqual([row['score'] for row in svn], [40])
+        rollup = ReviewRollup.query(['review_type'], review_types=['svn'])
+        self.assertEqual(rollup['avg_score'].tolist(), [40])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.utils.payload_spool import PayloadSpool, spooled_payload
+
+
+class FakeRedis:
+    """只实现 PayloadSpool 用到的 set/get/delete，记录过期时间"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expires[key] = ex
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class TestPayloadSpool(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.redis = FakeRedis()
+        self.patches = [patch.object(PayloadSpool, 'SPOOL_DIR', self.tmp_dir),
+                        patch.object(PayloadSpool, '_redis', self.redis),
+                        patch.object(PayloadSpool, '_last_cleanup', 0),
+                        patch.dict(os.environ, {'WEBHOOK_SPOOL_DRIVER': 'file', 'WEBHOOK_SPOOL_TTL': '60'})]
+        for spool_patch in self.patches:
+            spool_patch.start()
+
+    def tearDown(self):
+        for spool_patch in self.patches:
+            spool_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_file_round_trip(self):
+        payload_ref = PayloadSpool.save(b'{"object_kind": "push"}')
+        self.assertTrue(payload_ref.startswith(PayloadSpool.FILE_PREFIX))
+        self.assertEqual(PayloadSpool.load(payload_ref), {'object_kind': 'push'})
+        # 旧任务直接携带解析好的数据
+        self.assertEqual(PayloadSpool.load({'a': 1}), {'a': 1})
+        PayloadSpool.delete(payload_ref)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+        with self.assertRaises(FileNotFoundError):
+            PayloadSpool.load(payload_ref)
+
+    def test_expired_files_removed(self):
+        expired = os.path.join(self.tmp_dir, 'expired.json')
+        with open(expired, 'wb') as f:
+            f.write(b'{}')
+        os.utime(expired, (time.time() - 120, time.time() - 120))
+        payload_ref = PayloadSpool.save(b'{}')
+        self.assertFalse(os.path.exists(expired))
+        self.assertEqual(PayloadSpool.load(payload_ref), {})
+
+    def test_redis_round_trip(self):
+        with patch.dict(os.environ, {'WEBHOOK_SPOOL_DRIVER': 'redis'}):
+            payload_ref = PayloadSpool.save(b'{"a": 1}')
+        self.assertTrue(payload_ref.startswith(PayloadSpool.REDIS_PREFIX))
+        key = PayloadSpool.REDIS_KEY_PREFIX + payload_ref[len(PayloadSpool.REDIS_PREFIX):]
+        self.assertEqual(self.redis.expires[key], 60)
+        self.assertEqual(PayloadSpool.load(payload_ref), {'a': 1})
+        PayloadSpool.delete(payload_ref)
+        with self.assertRaises(FileNotFoundError):
+            PayloadSpool.load(payload_ref)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_enqueue_webhook_round_trip(self):
+        import api
+        received = []
+
+        @spooled_payload
+        def handler(webhook_data, token):
+            received.append((webhook_data, token))
+
+        # 队列任务在当前进程中同步执行
+        def run_now(function, *args, priority=None, **kwargs):
+            function(*args, **kwargs)
+
+        with patch.object(api, 'handle_queue', side_effect=run_now):
+            api.enqueue_webhook(handler, json.dumps({'object_kind': 'merge_request'}).encode('utf-8'), 'token')
+        self.assertEqual(received, [({'object_kind': 'merge_request'}, 'token')])
+        # 任务结束后删除暂存内容
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+        # 入队失败时同样删除暂存内容
+        with patch.object(api, 'handle_queue', side_effect=RuntimeError('queue down')):
+            with self.assertRaises(RuntimeError):
+                api.enqueue_webhook(handler, b'{}', 'token')
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+
+    def test_failed_job_keeps_payload(self):
+        @spooled_payload
+        def handler(webhook_data):
+            raise RuntimeError('review failed')
+
+        payload_ref = PayloadSpool.save(b'{"a": 1}')
+        with self.assertRaises(RuntimeError):
+            handler(payload_ref)
+        # 重试时仍能读取暂存内容
+        self.assertEqual(PayloadSpool.load(payload_ref), {'a': 1})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import threading
+from multiprocessing import Process
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.utils.queue import LocalWorkerPool, PriorityScheduler, PRIORITY_MERGE_REQUEST, PRIORITY_PUSH, PRIORITY_RETRY
+
+
+def _touch(path):
+    open(path, 'w').close()
+
+
+def _touch_in_child(path):
+    """任务中再启动子进程，工作进程为守护进程时会失败"""
+    child = Process(target=_touch, args=(path,))
+    child.start()
+    child.join()
+
+
+class TestPriorityScheduler(TestCase):
+    def test_weighted_share(self):
+        """所有通道都有任务时，按权重比例分配执行机会"""
+        scheduler = PriorityScheduler({PRIORITY_MERGE_REQUEST: 3, PRIORITY_PUSH: 1, PRIORITY_RETRY: 1}, max_wait=0)
+        oldest = {PRIORITY_MERGE_REQUEST: 100.0, PRIORITY_PUSH: 100.0, PRIORITY_RETRY: 100.0}
+        chosen = [scheduler.choose(oldest, now=101.0) for _ in range(10)]
+        self.assertEqual(chosen[0], PRIORITY_MERGE_REQUEST)
+        self.assertEqual(chosen.count(PRIORITY_MERGE_REQUEST), 6)
+        self.assertEqual(chosen.count(PRIORITY_PUSH), 2)
+        self.assertEqual(chosen.count(PRIORITY_RETRY), 2)
+
+    def test_starvation_protection(self):
+        """等待超过 max_wait 的低优先级任务优先执行"""
+        scheduler = PriorityScheduler({PRIORITY_MERGE_REQUEST: 100, PRIORITY_RETRY: 1}, max_wait=60)
+        oldest = {PRIORITY_MERGE_REQUEST: 990.0, PRIORITY_RETRY: 900.0}
+        self.assertEqual(scheduler.choose(oldest, now=1000.0), PRIORITY_RETRY)
+
+    def test_empty_lanes(self):
+        self.assertIsNone(PriorityScheduler(max_wait=0).choose({PRIORITY_PUSH: None}))
+
+
+class TestLocalWorkerPool(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_concurrent_first_submit_starts_once(self):
+        pool = LocalWorkerPool(workers=1, max_size=10)
+        paths = [os.path.join(self.tmp_dir, str(index)) for index in range(4)]
+        with patch.object(LocalWorkerPool, 'start', autospec=True, side_effect=LocalWorkerPool.start) as start:
+            threads = [threading.Thread(target=pool.submit, args=(_touch_in_child, path)) for path in paths]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            pool.shutdown(timeout=30)
+        self.assertEqual(start.call_count, 1)
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import os
+import time
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.service.review_service import ReviewService
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.db_pool import get_connection
+from biz.utils.review_archive import ReviewArchive
+from biz.utils.review_rollup import ReviewRollup
+
+DAY = 24 * 3600
+
+
+class TestReviewArchive(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        """归档目录也放在临时目录中，避免影响 data/"""
+        super().setUp()
+        env_patch = patch.dict(os.environ, {'REVIEW_ARCHIVE_DIR': os.path.join(self.tmp_dir, 'archive'),
+                                            'REVIEW_RETENTION_DAYS': '30'})
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+        ReviewService.init_db()
+        ReviewService.upgrade_db_add_file_details()
+
+    def test_archive_old_rows(self):
+        now = int(time.time())
+        review_result = "审查结果 " * 500
+        with get_connection(self.db_file) as conn:
+            cursor = conn.cursor()
+            for author, updated_at in (('old', now - 90 * DAY), ('recent', now - DAY)):
+                cursor.execute("INSERT INTO push_review_log (project_name, author, branch, updated_at, score, "
+                               "review_result) VALUES ('p', ?, 'main', ?, 80, ?)",
+                               (author, updated_at, BlobStore.put(cursor, review_result)))
+
+        result = ReviewArchive.run()
+        self.assertEqual(result['push_review_log'], 1)
+        with get_connection(self.db_file) as conn:
+            self.assertEqual(conn.execute("SELECT author FROM push_review_log").fetchall(), [('recent',)])
+        # 按天汇总不受影响
+        self.assertEqual(ReviewRollup.query(['author'])['author'].tolist(), ['old', 'recent'])
+
+        archived = ReviewService.get_archived_statistics(review_type='push')
+        self.assertEqual(len(archived), 1)
+        self.assertEqual(archived[0]['author'], 'old')
+        self.assertEqual(archived[0]['review_result'], review_result)
+        self.assertEqual(ReviewService.get_archived_statistics(review_type='push', start_date=now - 10 * DAY), [])
+
+
+if __name__ == '__main__':
+    main()
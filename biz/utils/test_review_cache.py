@@ -0,0 +1,44 @@
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.review_cache import ReviewCache
+
+
+class TestReviewCache(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        ReviewCache.init_db()
+
+    def test_normalize_ignores_headers_and_line_numbers(self):
+        """rebase 后行号和文件头变化不影响缓存键"""
+        original = str([{'new_path': 'a.py', 'diff': '@@ -1,2 +1,3 @@\n x = 1\n+y = 2\n', 'additions': 1}])
+        rebased = str([{'new_path': 'a.py', 'diff': '@@ -10,2 +12,3 @@\n x = 1\n+y = 2  \n', 'additions': 1}])
+        self.assertEqual(ReviewCache.build_key(original, 'prompt', 'professional', 'm'),
+                         ReviewCache.build_key(rebased, 'prompt', 'professional', 'm'))
+        self.assertNotEqual(ReviewCache.build_key(original, 'prompt', 'professional', 'm'),
+                            ReviewCache.build_key(original, 'prompt', 'gentle', 'm'))
+
+    def test_svn_commit_info_not_part_of_key(self):
+        """SVN结构化diff中的提交信息不参与缓存键"""
+        svn_r1 = '{"files": [{"file_path": "/trunk/a.py", "diff_content": "+x"}], "commits": [{"revision": "1"}]}'
+        svn_r2 = '{"files": [{"file_path": "/trunk/a.py", "diff_content": "+x"}], "commits": [{"revision": "2"}]}'
+        self.assertEqual(ReviewCache.normalize_changes(svn_r1), ReviewCache.normalize_changes(svn_r2))
+
+    def test_get_put_and_stats(self):
+        self.assertIsNone(ReviewCache.get('key'))
+        ReviewCache.put('key', '总分: 90分', 'deepseek:deepseek-chat')
+        self.assertEqual(ReviewCache.get('key'), '总分: 90分')
+        stats = ReviewCache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_size_eviction(self):
+        with patch('biz.utils.review_cache.get_env_int',
+                   side_effect=lambda key, fallback=None: 0 if key == 'REVIEW_CACHE_MAX_SIZE_MB' else fallback):
+            ReviewCache.put('old', 'a' * 10)
+            ReviewCache.put('new', 'b' * 10)
+        self.assertEqual(ReviewCache.get_stats()['entries'], 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import time
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.service.review_service import ReviewService
+from biz.utils.code_reviewer import CodeReviewer
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.db_pool import get_connection, sql_local_day
+from biz.utils.review_rollup import ReviewRollup
+from biz.utils.version_tracker import VersionTracker
+
+
+class TestReviewRollup(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        ReviewService.init_db()
+        self.today = time.strftime('%Y-%m-%d')
+
+    def _insert_push(self, author, score, additions=0):
+        with get_connection(self.db_file) as conn:
+            conn.execute("INSERT INTO push_review_log (project_name, author, updated_at, score, additions) "
+                         "VALUES ('p', ?, ?, ?, ?)", (author, int(time.time()), score, additions))
+
+    def test_rollup_follows_inserts(self):
+        self._insert_push('alice', 80, 10)
+        self._insert_push('alice', 60, 5)
+        self._insert_push('bob', 90)
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='carol', review_type='svn', score=70)
+        # 同一版本重新审查，替换之前的记录
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='carol', review_type='svn', score=50)
+
+        by_author = ReviewRollup.query(['author'], start_day=self.today, end_day=self.today).set_index('author')
+        self.assertEqual(by_author.loc['alice', 'review_count'], 2)
+        self.assertEqual(by_author.loc['alice', 'avg_score'], 70)
+        self.assertEqual(by_author.loc['alice', 'score_min'], 60)
+        self.assertEqual(by_author.loc['alice', 'additions'], 15)
+        self.assertEqual(by_author.loc['carol', 'review_count'], 1)
+        self.assertEqual(by_author.loc['carol', 'avg_score'], 50)
+
+        daily = ReviewRollup.query(['day'], review_types=['push'])
+        self.assertEqual(daily['review_count'].tolist(), [3])
+
+    def test_avg_score_skips_null_scores(self):
+        self._insert_push('alice', 80)
+        self._insert_push('alice', None)
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='alice', review_type='svn', score=None)
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='alice', review_type='svn', score=60)
+
+        rollup = ReviewRollup.query(['author']).set_index('author')
+        self.assertEqual(rollup.loc['alice', 'review_count'], 3)
+        self.assertEqual(rollup.loc['alice', 'avg_score'], 70)
+
+        # 重建结果与触发器一致
+        ReviewRollup.rebuild()
+        self.assertEqual(ReviewRollup.query(['author'])['avg_score'].tolist(), [70])
+
+    def test_upgrade_adds_scored_count(self):
+        self._insert_push('alice', 80)
+        # 模拟旧版表结构
+        with get_connection(self.db_file) as conn:
+            for table, *_ in ReviewRollup.SOURCES:
+                conn.execute(f"DROP TRIGGER trg_{table}_daily_rollup")
+                conn.execute(f"DROP TRIGGER trg_{table}_daily_rollup_update")
+            conn.execute("DROP TRIGGER trg_version_tracker_daily_rollup_replace")
+            conn.execute("ALTER TABLE review_daily_rollup DROP COLUMN scored_count")
+        ReviewRollup.init_db()
+        self._insert_push('alice', None)
+        self.assertEqual(ReviewRollup.query(['author'])['avg_score'].tolist(), [80])
+
+    def test_retry_review_moves_rollup(self):
+        yesterday = int(time.time()) - 86400
+        with get_connection(self.db_file) as conn:
+            conn.execute("INSERT INTO push_review_log (project_name, author, updated_at, score, additions, file_details) "
+                         "VALUES ('p', 'alice', ?, 80, 5, '[]')", (yesterday,))
+        self._insert_push('alice', 60)
+        VersionTracker.record_version_review('q', [{'id': 'r1'}], author='carol', review_type='svn', score=None)
+        version_hash = VersionTracker.generate_version_hash([{'id': 'r1'}])
+
+        # 重新审查原地更新评分和时间
+        with patch.object(CodeReviewer, '__init__', return_value=None), \
+                patch.object(CodeReviewer, 'review_and_strip_code', return_value='总分:40分'), \
+                patch('biz.event.event_manager.on_push_reviewed'), \
+                patch('biz.event.event_manager.on_svn_reviewed'):
+            ReviewService._async_retry_review('push', 1)
+            ReviewService._async_retry_review('svn', version_hash)
+
+        with get_connection(self.db_file) as conn:
+            expected = conn.execute(f"""
+                SELECT day, review_type, author, SUM(n), SUM(score_sum) * 1.0 / NULLIF(SUM(scored), 0), SUM(additions)
+                FROM (SELECT {sql_local_day('updated_at')} AS day, 'push' AS review_type, author, 1 AS n,
+                             COALESCE(score, 0) AS score_sum, score IS NOT NULL AS scored, additions
+                      FROM push_review_log
+                      UNION ALL
+                      SELECT {sql_local_day('reviewed_at')}, review_type, author, 1, COALESCE(score, 0),
+                             score IS NOT NULL, additions_count
+                      FROM version_tracker)
+                GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+            """).fetchall()
+        rollup = ReviewRollup.query(['day', 'review_type', 'author'])
+        self.assertEqual([tuple(row) for row in rollup[['day', 'review_type', 'author', 'review_count', 'avg_score',
+                                                        'additions']].itertuples(index=False)],
+                         [tuple(row) for row in expected])
+        self.assertEqual(len(expected), 2)
+
+    def test_cleanup_keeps_history_and_rebuild(self):
+        self._insert_push('alice', 80)
+        with get_connection(self.db_file) as conn:
+            conn.execute("DELETE FROM push_review_log")
+        self.assertEqual(ReviewRollup.query(['author'])['review_count'].tolist(), [1])
+
+        # 重建只反映现存的审查记录
+        self._insert_push('bob', 90)
+        ReviewRollup.rebuild(since_day=self.today)
+        self.assertEqual(ReviewRollup.query(['author'])['author'].tolist(), ['bob'])
+
+
+if __name__ == '__main__':
+    main()
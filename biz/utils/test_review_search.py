@@ -0,0 +1,66 @@
+import json
+from unittest import TestCase, main
+
+from biz.entity.review_entity import PushReviewEntity
+from biz.service.review_service import ReviewService
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.db_pool import get_connection
+from biz.utils.version_tracker import VersionTracker
+
+
+class TestReviewSearch(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        ReviewService.init_db()
+
+    def _push(self, author, review_result, commit_messages='', file_details='[]'):
+        ReviewService.insert_push_review_log_with_details(
+            PushReviewEntity(project_name='p', author=author, branch='main', updated_at=1, commits=[],
+                             score=80, review_result=review_result, url_slug='', webhook_data={},
+                             additions=1, deletions=0),
+            file_details=file_details)
+        # PushReviewEntity 从 commits 生成提交说明，这里直接写入
+        with get_connection(self.db_file) as conn:
+            conn.execute("UPDATE push_review_log SET commit_messages = ? WHERE author = ?", (commit_messages, author))
+
+    def test_search_resolves_blobs_and_ranks(self):
+        # 超过 BLOB_MIN_SIZE 的审查结果以 blob 引用保存，索引中是原文
+        self._push('alice', '代码整体良好。' * 200 + '发现空指针风险', commit_messages='修复登录')
+        self._push('bob', '没有问题', commit_messages='处理空指针异常',
+                   file_details=json.dumps([{'new_path': 'src/Login.java', 'diff': ''}]))
+        VersionTracker.record_version_review('p', [{'id': 'r1', 'message': 'svn 提交'}], author='carol',
+                                             review_type='svn', review_result='OK')
+
+        result = ReviewService.search('空指针')
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total_count'], 2)
+        # 提交说明的权重更高，较短的文档排在前面
+        self.assertEqual([record['author'] for record in result['data']], ['bob', 'alice'])
+        self.assertIn('**空指针**', result['data'][1]['snippet'])
+
+        self.assertEqual([r['author'] for r in ReviewService.search('login.JAVA')['data']], ['bob'])
+        self.assertEqual([r['author'] for r in ReviewService.search('空指针 登录')['data']], ['alice'])
+        # 少于 3 个字的词按子串匹配
+        self.assertEqual([r['author'] for r in ReviewService.search('良好')['data']], ['alice'])
+        self.assertEqual(ReviewService.search('空指针', review_type='svn')['total_count'], 0)
+        page = ReviewService.search('空指针', limit=1, offset=1)
+        self.assertEqual((page['total_count'], [r['author'] for r in page['data']]), (2, ['alice']))
+
+    def test_index_follows_updates_and_deletes(self):
+        VersionTracker.record_version_review('p', [{'id': 'r1'}], author='carol', review_type='svn',
+                                             review_result='旧的审查意见')
+        self.assertEqual(ReviewService.search('旧的审查')['total_count'], 1)
+        # 重新审查同一版本会替换旧记录
+        VersionTracker.record_version_review('p', [{'id': 'r1'}], author='carol', review_type='svn',
+                                             review_result='新的审查意见')
+        self.assertEqual(ReviewService.search('旧的审查')['total_count'], 0)
+        self.assertEqual(ReviewService.search('新的审查')['total_count'], 1)
+
+        with get_connection(self.db_file) as conn:
+            conn.execute("DELETE FROM version_tracker")
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM review_search").fetchone()[0], 0)
+        self.assertEqual(ReviewService.search('新的审查')['total_count'], 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.utils.svn_cache import SVNCache
+
+
+class TestSVNCache(TestCase):
+    def setUp(self):
+        """使用临时缓存目录，避免影响 data/svn_cache"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.env_patch = patch.dict(os.environ, {'SVN_CACHE_DIR': self.cache_dir, 'SVN_CACHE_ENABLED': '1'})
+        self.env_patch.start()
+        SVNCache._size = None
+
+    def tearDown(self):
+        self.env_patch.stop()
+        SVNCache._size = None
+        shutil.rmtree(self.cache_dir)
+
+    def _count(self, kind):
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.cache_dir, kind)))
+
+    def test_put_get_and_dedupe(self):
+        self.assertIsNone(SVNCache.get('root', 'cat', '/a.py', '5'))
+        SVNCache.put('print("你好")\n', 'root', 'cat', '/a.py', '5')
+        SVNCache.put('print("你好")\n', 'root', 'cat', '/a.py', '6')
+        self.assertEqual(SVNCache.get('root', 'cat', '/a.py', '6'), 'print("你好")\n')
+        # 内容相同的两个版本只保存一份
+        self.assertEqual((self._count('refs'), self._count('objects')), (2, 1))
+
+    def test_evicts_least_recently_used(self):
+        for revision in range(3):
+            SVNCache.put(os.urandom(4000).hex(), 'root', 'diff-c', revision)
+        # 将 r0 标记为较早访问、r1 较晚访问
+        old = time.time() - 100
+        for path, _, files in os.walk(self.cache_dir):
+            for name in files:
+                os.utime(os.path.join(path, name), (old, old))
+        SVNCache.get('root', 'diff-c', 1)
+
+        SVNCache.evict(max_bytes=10000)
+        self.assertIsNotNone(SVNCache.get('root', 'diff-c', 1))
+        self.assertIsNone(SVNCache.get('root', 'diff-c', 0))
+
+    def test_corrupted_object_is_a_miss(self):
+        SVNCache.put('content', 'root', 'log', '7')
+        for path, _, files in os.walk(os.path.join(self.cache_dir, 'objects')):
+            for name in files:
+                with open(os.path.join(path, name), 'wb') as f:
+                    f.write(b'not zlib')
+        self.assertIsNone(SVNCache.get('root', 'log', '7'))
+        self.assertEqual(self._count('refs'), 0)
+
+
+if __name__ == '__main__':
+    main()
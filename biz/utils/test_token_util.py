@@ -0,0 +1,74 @@
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.utils import token_util
+
+
+class FakeEncoding:
+    """按空格切分的假编码器，避免测试依赖网络下载 tiktoken 词表"""
+
+    def __init__(self):
+        self.calls = 0
+        self.encoded_chars = 0
+
+    def encode_ordinary(self, text):
+        self.calls += 1
+        self.encoded_chars += len(text)
+        # 与 tiktoken 一致，空文本没有 token
+        return text.split(' ') if text else []
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+
+class TestTokenUtil(TestCase):
+    def setUp(self):
+        self.encoding = FakeEncoding()
+        self.patch = patch.object(token_util, 'get_encoding', return_value=self.encoding)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_quick_check_skips_encoding(self):
+        """明显未超限时不编码"""
+        self.assertTrue(token_util.is_within_token_limit('a b c', 10))
+        self.assertEqual(token_util.truncate_text_by_tokens('a b c', 10), 'a b c')
+        self.assertEqual(self.encoding.calls, 0)
+
+    def test_long_text_checks_prefix_first(self):
+        """超长文本先编码按行截断的前缀，前缀已超限时不编码整段文本"""
+        text = '\n'.join(['a b c d'] * 1000)
+        self.assertFalse(token_util.is_within_token_limit(text, 10))
+        self.assertEqual(self.encoding.calls, 1)
+        self.assertLessEqual(self.encoding.encoded_chars, 10 * token_util._MAX_CHARS_PER_TOKEN)
+
+    def test_long_text_is_not_rejected_by_length_alone(self):
+        """字符数远超限制但 token 数未超限时（如长单词）不误判为超限"""
+        self.assertTrue(token_util.is_within_token_limit('x' * 1000, 10))
+        self.assertTrue(token_util.is_within_token_limit('x' * 500 + '\n' + 'y' * 500, 10))
+
+    def test_truncate_counts_tokens_exactly(self):
+        """字符数超长但 token 数未超限的文本不截断；前缀已超限时只编码前缀"""
+        self.assertEqual(token_util.truncate_text_by_tokens('x' * 1000, 10), 'x' * 1000)
+        text = '\n'.join(['a b c d'] * 1000)
+        self.encoding.encoded_chars = 0
+        self.assertEqual(token_util.truncate_text_by_tokens(text, 3), 'a b c')
+        self.assertLessEqual(self.encoding.encoded_chars, 3 * token_util._MAX_CHARS_PER_TOKEN)
+
+    def test_exact_count_when_ambiguous(self):
+        text = ' '.join(['word'] * 20)
+        self.assertFalse(token_util.is_within_token_limit(text, 10))
+        self.assertTrue(token_util.is_within_token_limit(text, 20))
+        self.assertEqual(token_util.truncate_text_by_tokens(text, 3), 'word word word')
+
+    def test_count_tokens_batch(self):
+        self.assertEqual(token_util.count_tokens_batch(['a b', '', 'a b c']), [2, 0, 3])
+        self.assertEqual(token_util.count_tokens_batch([]), [])
+
+
+if __name__ == '__main__':
+    main()
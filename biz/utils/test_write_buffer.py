@@ -0,0 +1,77 @@
+import json
+import os
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from biz.entity.review_entity import PushReviewEntity
+from biz.service.review_service import ReviewService
+from biz.utils.db_files import TempDatabaseMixin
+from biz.utils.db_pool import get_connection
+from biz.utils.version_tracker import VersionTracker
+from biz.utils.write_buffer import ReviewWriteBuffer
+
+
+class TestReviewWriteBuffer(TempDatabaseMixin, TestCase):
+    def setUp(self):
+        """日志目录也放在临时目录中，避免影响 data/"""
+        super().setUp()
+        self.journal_dir = os.path.join(self.tmp_dir, 'write_buffer')
+        env_patch = patch.dict(os.environ, {'REVIEW_WRITE_JOURNAL_DIR': self.journal_dir,
+                                            'REVIEW_WRITE_BATCH_SIZE': '3'})
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+        ReviewService.init_db()
+        ReviewService.upgrade_db_add_file_details()
+
+    def _count(self, table):
+        with get_connection(self.db_file) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _push(self, author):
+        ReviewService.insert_push_review_log_with_details(
+            PushReviewEntity(project_name='p', author=author, branch='main', updated_at=1, commits=[],
+                             score=80, review_result='ok', url_slug='', webhook_data={}, additions=1, deletions=0),
+            file_details='[]')
+
+    def test_batch_flushes_on_size_and_exit(self):
+        with ReviewWriteBuffer.batch():
+            self._push('alice')
+            VersionTracker.record_version_review('p', [{'id': 'r1'}], author='alice', review_type='svn')
+            self.assertEqual(self._count('push_review_log'), 0)
+            # 缓冲中的版本记录参与去重检查
+            self.assertIsNotNone(VersionTracker.is_version_reviewed('p', [{'id': 'r1'}]))
+            self.assertTrue(os.listdir(self.journal_dir))
+
+            self._push('bob')
+            self.assertEqual(self._count('push_review_log'), 2)
+            self._push('carol')
+        self.assertEqual(self._count('push_review_log'), 3)
+        self.assertEqual(self._count('version_tracker'), 1)
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+        # 不在批量范围内时立即写入
+        self._push('dave')
+        self.assertEqual(self._count('push_review_log'), 4)
+
+    def test_recover_journal_of_dead_process(self):
+        ops = [{'op_id': f'op{i}', 'table': 'push_review_log', 'replace': False,
+                'values': {'project_name': 'p', 'author': author, 'updated_at': 1}}
+               for i, author in enumerate(['alice', 'bob'])]
+        # 进程在提交第一条记录后、删除日志前被结束
+        ReviewWriteBuffer.init_db()
+        with get_connection(self.db_file) as conn:
+            conn.execute("INSERT INTO push_review_log (project_name, author, updated_at) VALUES ('p', 'alice', 1)")
+            conn.execute("INSERT INTO write_buffer_applied (op_id, applied_at) VALUES ('op0', 1)")
+        os.makedirs(self.journal_dir)
+        with open(os.path.join(self.journal_dir, '999999999.jsonl'), 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(op) + '\n' for op in ops) + '{"op_id": "op2", "ta')
+
+        self.assertEqual(ReviewWriteBuffer.recover(), 1)
+        with get_connection(self.db_file) as conn:
+            authors = [row[0] for row in conn.execute("SELECT author FROM push_review_log ORDER BY id")]
+        self.assertEqual(authors, ['alice', 'bob'])
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+
+if __name__ == '__main__':
+    main()
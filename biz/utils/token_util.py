@@ -1,21 +1,124 @@
+import threading
+from typing import List, Optional
+
 import tiktoken
 
+DEFAULT_ENCODING = "cl100k_base"  # 适用于 OpenAI GPT 系列
+
+# 字节级 BPE 每个 token 至少对应 1 个字节，因此 UTF-8 字节数是 token 数的上界；
+# 实际代码平均每个 token 约 3~4 个字符，超过该倍数的超长文本先只编码这么长的前缀，前缀已超限即可判定超限
+_MAX_CHARS_PER_TOKEN = 12
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+def get_encoding(encoding_name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """
+    获取编码器，首次使用时才加载并在进程内缓存，避免每次计数都重新初始化。
+
+    Args:
+        encoding_name (str): 编码器名称，默认为 "cl100k_base"。
+
+    Returns:
+        tiktoken.Encoding: 编码器实例。
+    """
+    encoding = _encodings.get(encoding_name)
+    if encoding is None:
+        with _encodings_lock:
+            encoding = _encodings.get(encoding_name)
+            if encoding is None:
+                encoding = tiktoken.get_encoding(encoding_name)
+                _encodings[encoding_name] = encoding
+    return encoding
+
+
+def _quick_check(text: str, max_tokens: int) -> Optional[bool]:
+    """
+    仅根据文本长度判断是否一定在 token 限制内，无法确定时返回 None。
+
+    Returns:
+        Optional[bool]: True 表示一定不超限（字节数不超过 token 上限），None 表示需要编码计数。
+    """
+    if len(text) <= max_tokens and len(text.encode("utf-8")) <= max_tokens:
+        return True
+    return None
+
+
+def _line_prefix(text: str, max_chars: int) -> str:
+    """
+    取不超过 max_chars 的前缀，在前后都是非空白字符（后一个字符也不是 /）的单个换行之后截断。
+    tiktoken 的预分词不会跨越这种位置，整段文本的 token 数等于两段分别编码之和，
+    因此前缀的 token 数是整段文本 token 数的下界；找不到这样的位置时返回空字符串。
+    """
+    index = len(text) if len(text) <= max_chars else max_chars
+    while index > 0:
+        index = text.rfind("\n", 0, index)
+        if index < 0:
+            return ""
+        if 0 < index < len(text) - 1 and not text[index - 1].isspace() and not text[index + 1].isspace() \
+                and text[index + 1] != '/':
+            return text[:index + 1]
+    return ""
+
 
-def count_tokens(text: str) -> int:
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
     """
     计算文本的 token 数量。
 
     Args:
         text (str): 输入文本。
+        encoding_name (str): 使用的编码器名称，默认为 "cl100k_base"。
 
     Returns:
         int: token 数量。
     """
-    encoding = tiktoken.get_encoding("cl100k_base")  # 适用于 OpenAI GPT 系列
-    return len(encoding.encode(text))
+    if not text:
+        return 0
+    return len(get_encoding(encoding_name).encode_ordinary(text))
+
+
+def count_tokens_batch(texts: List[str], encoding_name: str = DEFAULT_ENCODING) -> List[int]:
+    """
+    批量计算多段文本（如多个文件的 diff）的 token 数量，由 tiktoken 在多线程中并行编码。
+
+    Args:
+        texts (List[str]): 输入文本列表。
+        encoding_name (str): 使用的编码器名称，默认为 "cl100k_base"。
+
+    Returns:
+        List[int]: 与输入顺序一致的 token 数量列表。
+    """
+    if not texts:
+        return []
+    encoded = get_encoding(encoding_name).encode_ordinary_batch([text or "" for text in texts])
+    return [len(tokens) for tokens in encoded]
+
+
+def is_within_token_limit(text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> bool:
+    """
+    判断文本是否不超过最大 token 数量，明显未超限时不编码，超长文本的前缀已超限时不做完整编码。
 
+    Args:
+        text (str): 输入文本。
+        max_tokens (int): 最大 token 数量。
+        encoding_name (str): 使用的编码器名称，默认为 "cl100k_base"。
 
-def truncate_text_by_tokens(text: str, max_tokens: int, encoding_name: str = "cl100k_base") -> str:
+    Returns:
+        bool: 不超过限制时返回 True。
+    """
+    if not text:
+        return True
+    if _quick_check(text, max_tokens):
+        return True
+    if len(text) > max_tokens * _MAX_CHARS_PER_TOKEN:
+        prefix = _line_prefix(text, max_tokens * _MAX_CHARS_PER_TOKEN)
+        if prefix and count_tokens(prefix, encoding_name) > max_tokens:
+            return False
+    return count_tokens(text, encoding_name) <= max_tokens
+
+
+def truncate_text_by_tokens(text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> str:
     """
     根据最大 token 数量截断文本。
 
@@ -27,21 +130,29 @@ def truncate_text_by_tokens(text: str, max_tokens: int, encoding_name: str = "cl
     Returns:
         str: 截断后的文本。
     """
-    # 获取编码器
-    encoding = tiktoken.get_encoding(encoding_name)
+    if not text or _quick_check(text, max_tokens) is True:
+        return text
+
+    encoding = get_encoding(encoding_name)
+    # 超长文本先编码按行截断的前缀（与 is_within_token_limit 相同）：前缀的 token 与整段文本开头的 token 相同，
+    # 前缀已超限时直接截断，否则按整段文本精确计数，不按字符数截断
+    if len(text) > max_tokens * _MAX_CHARS_PER_TOKEN:
+        prefix = _line_prefix(text, max_tokens * _MAX_CHARS_PER_TOKEN)
+        if prefix:
+            tokens = encoding.encode_ordinary(prefix)
+            if len(tokens) > max_tokens:
+                return encoding.decode(tokens[:max_tokens])
 
     # 将文本编码为 tokens
-    tokens = encoding.encode(text)
+    tokens = encoding.encode_ordinary(text)
 
     # 如果 tokens 数量超过最大限制，则截断
     if len(tokens) > max_tokens:
-        truncated_tokens = tokens[:max_tokens]
-        truncated_text = encoding.decode(truncated_tokens)
-        return truncated_text
+        return encoding.decode(tokens[:max_tokens])
 
     return text
 
 if __name__ == '__main__':
     text = "Hello, world! This is a test text for token counting."
     print(count_tokens(text))  # 输出：11
-    print(truncate_text_by_tokens(text, 5))  # 输出："Hello, world!"
\ No newline at end of file
+    print(truncate_text_by_tokens(text, 5))  # 输出："Hello, world!"
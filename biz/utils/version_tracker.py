@@ -3,7 +3,10 @@ import hashlib
 import json
 from typing import Optional, List, Dict
 from datetime import datetime
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_pool import get_connection
 from biz.utils.log import logger
+from biz.utils.write_buffer import ReviewWriteBuffer
 
 
 class VersionTracker:
@@ -16,7 +19,7 @@ class VersionTracker:
     def init_db():
         """初始化版本追踪表"""
         try:
-            with sqlite3.connect(VersionTracker.DB_FILE) as conn:
+            with get_connection(VersionTracker.DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # 创建版本追踪表
@@ -159,8 +162,14 @@ class VersionTracker:
             version_hash = VersionTracker.generate_version_hash(commits, changes)
             if not version_hash:
                 return None
+
+            # 批量写入时刚审查的版本可能还在缓冲中
+            pending = ReviewWriteBuffer.find_pending('version_tracker', project_name=project_name,
+                                                     version_hash=version_hash)
+            if pending:
+                return pending
                 
-            with sqlite3.connect(VersionTracker.DB_FILE) as conn:
+            with get_connection(VersionTracker.DB_FILE) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT * FROM version_tracker 
@@ -172,7 +181,7 @@ class VersionTracker:
                 result = cursor.fetchone()
                 if result:
                     columns = [desc[0] for desc in cursor.description]
-                    review_info = dict(zip(columns, result))                    
+                    review_info = BlobStore.resolve_records([dict(zip(columns, result))])[0]
                     logger.info(f"Found existing review for project {project_name}, "
                               f"version {version_hash[:8]}...")
                     return review_info
@@ -256,26 +265,17 @@ class VersionTracker:
             
             current_time = int(datetime.now().timestamp())
             
-            with sqlite3.connect(VersionTracker.DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO version_tracker 
-                    (project_name, version_hash, commit_sha, author, branch, 
-                     file_paths, changes_hash, review_type, reviewed_at, 
-                     review_result, score, created_at, commit_message, commit_date,
-                     additions_count, deletions_count, file_details)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    project_name, version_hash, commit_sha, author, branch,
-                    file_paths, changes_hash, review_type, current_time,
-                    review_result, score, current_time, commit_message, commit_date,
-                    additions_count, deletions_count, file_details
-                ))
-                
-                conn.commit()
-                logger.info(f"Recorded version review for project {project_name}, "
-                          f"version {version_hash[:8]}... with detailed info")
-                return True
+            ReviewWriteBuffer.write('version_tracker', {
+                'project_name': project_name, 'version_hash': version_hash, 'commit_sha': commit_sha,
+                'author': author, 'branch': branch, 'file_paths': file_paths, 'changes_hash': changes_hash,
+                'review_type': review_type, 'reviewed_at': current_time, 'review_result': review_result,
+                'score': score, 'created_at': current_time, 'commit_message': commit_message,
+                'commit_date': commit_date, 'additions_count': additions_count,
+                'deletions_count': deletions_count, 'file_details': file_details,
+            }, replace=True)
+            logger.info(f"Recorded version review for project {project_name}, "
+                      f"version {version_hash[:8]}... with detailed info")
+            return True
                 
         except Exception as e:
             logger.error(f"Error recording version review: {e}")
@@ -294,7 +294,7 @@ class VersionTracker:
             已审查版本列表
         """
         try:
-            with sqlite3.connect(VersionTracker.DB_FILE) as conn:
+            with get_connection(VersionTracker.DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 if project_name:
@@ -314,7 +314,7 @@ class VersionTracker:
                 results = cursor.fetchall()
                 columns = [desc[0] for desc in cursor.description]
                 
-                return [dict(zip(columns, result)) for result in results]
+                return BlobStore.resolve_records([dict(zip(columns, result)) for result in results])
                 
         except Exception as e:
             logger.error(f"Error getting reviewed versions: {e}")
@@ -332,20 +332,13 @@ class VersionTracker:
             删除的记录数
         """
         try:
-            cutoff_time = int((datetime.now().timestamp() - (days * 24 * 3600)))
-            
-            with sqlite3.connect(VersionTracker.DB_FILE) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    DELETE FROM version_tracker 
-                    WHERE created_at < ?
-                ''', (cutoff_time,))
-                
-                deleted_count = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Cleaned up {deleted_count} old version records")
-                return deleted_count
+            # 删除前先写入归档文件，界面仍可查询
+            from biz.utils.review_archive import ReviewArchive
+            deleted_count = ReviewArchive.archive_table('version_tracker', days)
+            if deleted_count:
+                BlobStore.gc()
+            logger.info(f"Cleaned up {deleted_count} old version records")
+            return deleted_count
                 
         except Exception as e:
             logger.error(f"Error cleaning up old records: {e}")
@@ -360,7 +353,7 @@ class VersionTracker:
             统计信息字典
         """
         try:
-            with sqlite3.connect(VersionTracker.DB_FILE) as conn:
+            with get_connection(VersionTracker.DB_FILE) as conn:
                 cursor = conn.cursor()
                 
                 # 总记录数
@@ -0,0 +1,291 @@
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import psutil
+
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_pool import get_connection
+from biz.utils.default_config import get_env_bool, get_env_int, get_env_with_default
+from biz.utils.log import logger
+from biz.utils.review_search import ReviewSearch
+
+
+class ReviewWriteBuffer:
+    """
+    审查记录批量写入 - 在 batch() 范围内，审查日志和版本追踪记录先进入内存缓冲，
+    累计 REVIEW_WRITE_BATCH_SIZE 条或最早一条等待超过 REVIEW_WRITE_FLUSH_INTERVAL 秒时在一个事务中写入，
+    退出 batch() 时写入剩余记录。不在 batch() 范围内的写入与原来一样立即提交
+
+    缓冲中的记录同时追加到 <REVIEW_WRITE_JOURNAL_DIR>/<pid>.jsonl，进程被强制结束时不会丢失：
+    下次有进程开始批量写入时重放已退出进程遗留的日志。每条记录带唯一 op_id，
+    与记录在同一事务中写入 write_buffer_applied 表，重放时跳过已经提交过的记录
+    """
+    DB_FILE = "data/data.db"
+
+    _lock = threading.RLock()
+    _ops: List[Dict] = []
+    _depth = 0
+    _timer: Optional[threading.Timer] = None
+    _journal = None
+    _recovered_pid = None
+    _initialized_pid = None
+    _atexit_registered = False
+
+    @staticmethod
+    def init_db():
+        """初始化已提交记录标记表"""
+        with get_connection(ReviewWriteBuffer.DB_FILE) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS write_buffer_applied (
+                    op_id TEXT PRIMARY KEY,
+                    applied_at INTEGER
+                )
+            ''')
+            conn.commit()
+        ReviewWriteBuffer._initialized_pid = os.getpid()
+
+    @staticmethod
+    def _ensure_tables():
+        # 在开始写事务之前建表，事务中再用另一个连接建表会等待自己持有的写锁
+        if ReviewWriteBuffer._initialized_pid != os.getpid():
+            ReviewWriteBuffer.init_db()
+        if BlobStore._initialized_pid != os.getpid():
+            BlobStore.init_db()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return get_env_bool('REVIEW_WRITE_BUFFER_ENABLED', True)
+
+    @staticmethod
+    def get_journal_dir() -> str:
+        return get_env_with_default('REVIEW_WRITE_JOURNAL_DIR', 'data/write_buffer')
+
+    @staticmethod
+    def _journal_file(pid: int) -> str:
+        return os.path.join(ReviewWriteBuffer.get_journal_dir(), f"{pid}.jsonl")
+
+    @staticmethod
+    @contextmanager
+    def batch():
+        """
+        批量写入范围，可嵌套、可在多个线程中同时使用；退出时写入缓冲中的全部记录
+
+        用法：
+            with ReviewWriteBuffer.batch():
+                for commit in commits:
+                    ...  # insert_*_review_log / record_version_review
+        """
+        with ReviewWriteBuffer._lock:
+            ReviewWriteBuffer._depth += 1
+            if ReviewWriteBuffer._recovered_pid != os.getpid():
+                ReviewWriteBuffer._recovered_pid = os.getpid()
+                ReviewWriteBuffer.recover()
+            if not ReviewWriteBuffer._atexit_registered:
+                import atexit
+                atexit.register(ReviewWriteBuffer.flush)
+                ReviewWriteBuffer._atexit_registered = True
+        try:
+            yield
+        finally:
+            with ReviewWriteBuffer._lock:
+                ReviewWriteBuffer._depth -= 1
+                outermost = ReviewWriteBuffer._depth == 0
+            ReviewWriteBuffer.flush()
+            if outermost:
+                # 批量写入结束后顺带索引新记录，搜索时无需集中补建索引
+                ReviewSearch.sync(limit=1000)
+
+    @staticmethod
+    def batched(func):
+        """装饰器：函数执行期间的审查记录写入合并提交"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with ReviewWriteBuffer.batch():
+                return func(*args, **kwargs)
+        return wrapper
+
+    @staticmethod
+    def write(table: str, values: Dict, replace: bool = False):
+        """
+        写入一条记录：处于 batch() 范围内时进入缓冲，否则立即写入
+
+        :param table: 表名
+        :param values: 列名 -> 值，review_result/file_details 等大字段在写入时交给 BlobStore
+        :param replace: 是否使用 INSERT OR REPLACE
+        """
+        op = {'op_id': uuid.uuid4().hex, 'table': table, 'values': values, 'replace': replace}
+        with ReviewWriteBuffer._lock:
+            if ReviewWriteBuffer._depth > 0 and ReviewWriteBuffer.is_enabled():
+                ReviewWriteBuffer._append_journal(op)
+                ReviewWriteBuffer._ops.append(op)
+                if len(ReviewWriteBuffer._ops) >= get_env_int('REVIEW_WRITE_BATCH_SIZE', 50):
+                    ReviewWriteBuffer.flush()
+                elif ReviewWriteBuffer._timer is None:
+                    ReviewWriteBuffer._timer = threading.Timer(
+                        get_env_int('REVIEW_WRITE_FLUSH_INTERVAL', 5), ReviewWriteBuffer.flush)
+                    ReviewWriteBuffer._timer.daemon = True
+                    ReviewWriteBuffer._timer.start()
+                return
+        with get_connection(ReviewWriteBuffer.DB_FILE) as conn:
+            ReviewWriteBuffer._apply(conn.cursor(), [op], track=False)
+            conn.commit()
+
+    @staticmethod
+    def find_pending(table: str, **match) -> Optional[Dict]:
+        """在尚未写入的缓冲记录中查找（最新的）匹配记录，供去重检查使用"""
+        with ReviewWriteBuffer._lock:
+            for op in reversed(ReviewWriteBuffer._ops):
+                if op['table'] == table and all(op['values'].get(k) == v for k, v in match.items()):
+                    return dict(op['values'])
+        return None
+
+    @staticmethod
+    def flush() -> int:
+        """在一个事务中写入缓冲中的全部记录，返回写入数量；失败时记录保留在缓冲和日志中，下次继续写入"""
+        with ReviewWriteBuffer._lock:
+            if ReviewWriteBuffer._timer is not None:
+                ReviewWriteBuffer._timer.cancel()
+                ReviewWriteBuffer._timer = None
+            ops = ReviewWriteBuffer._ops
+            if not ops:
+                return 0
+            try:
+                ReviewWriteBuffer._ensure_tables()
+                with get_connection(ReviewWriteBuffer.DB_FILE) as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('BEGIN IMMEDIATE')
+                    ReviewWriteBuffer._apply(cursor, ops)
+                    conn.commit()
+            except sqlite3.DatabaseError as e:
+                logger.error(f"批量写入 {len(ops)} 条审查记录失败，稍后重试: {e}")
+                return 0
+            ReviewWriteBuffer._ops = []
+            ReviewWriteBuffer._close_journal(remove=True)
+            ReviewWriteBuffer._forget([op['op_id'] for op in ops])
+            logger.info(f"批量写入 {len(ops)} 条审查记录")
+            return len(ops)
+
+    @staticmethod
+    def _apply(cursor, ops: List[Dict], track: bool = True) -> int:
+        """在调用方的事务中写入记录，track 为 True 时同时写入 op_id 标记，返回实际写入数量"""
+        now = int(time.time())
+        applied = 0
+        for op in ops:
+            if track:
+                cursor.execute('INSERT OR IGNORE INTO write_buffer_applied (op_id, applied_at) VALUES (?, ?)',
+                               (op['op_id'], now))
+                if cursor.rowcount == 0:
+                    # 重放日志时跳过已经提交过的记录
+                    continue
+            table = op['table']
+            ref_columns = BlobStore.REF_COLUMNS.get(table, [])
+            columns = list(op['values'])
+            values = [BlobStore.put(cursor, op['values'][column]) if column in ref_columns else op['values'][column]
+                      for column in columns]
+            cursor.execute(f"INSERT {'OR REPLACE ' if op['replace'] else ''}INTO {table} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join(['?'] * len(columns))})", values)
+            applied += 1
+        return applied
+
+    @staticmethod
+    def _forget(op_ids: List[str]):
+        """日志删除后 op_id 不再需要，从 write_buffer_applied 中移除"""
+        try:
+            with get_connection(ReviewWriteBuffer.DB_FILE) as conn:
+                # 同时清理上次删除日志后、清理标记前中断遗留的过期标记
+                conn.execute('DELETE FROM write_buffer_applied WHERE applied_at < ?', (int(time.time()) - 30 * 24 * 3600,))
+                for start in range(0, len(op_ids), 500):
+                    batch = op_ids[start:start + 500]
+                    conn.execute(f"DELETE FROM write_buffer_applied WHERE op_id IN ({','.join(['?'] * len(batch))})",
+                                 batch)
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"清理批量写入标记失败: {e}")
+
+    @staticmethod
+    def _append_journal(op: Dict):
+        try:
+            if ReviewWriteBuffer._journal is None:
+                os.makedirs(ReviewWriteBuffer.get_journal_dir(), exist_ok=True)
+                ReviewWriteBuffer._journal = open(ReviewWriteBuffer._journal_file(os.getpid()), 'a', encoding='utf-8')
+            ReviewWriteBuffer._journal.write(json.dumps(op, ensure_ascii=False) + '\n')
+            # 写入操作系统缓冲即可在进程崩溃后保留
+            ReviewWriteBuffer._journal.flush()
+        except OSError as e:
+            logger.warning(f"写入批量写入日志失败，进程异常退出时缓冲中的记录可能丢失: {e}")
+
+    @staticmethod
+    def _close_journal(remove: bool):
+        if ReviewWriteBuffer._journal is not None:
+            ReviewWriteBuffer._journal.close()
+            ReviewWriteBuffer._journal = None
+        if remove:
+            try:
+                os.remove(ReviewWriteBuffer._journal_file(os.getpid()))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除批量写入日志失败: {e}")
+
+    @staticmethod
+    def recover() -> int:
+        """重放已退出进程遗留的批量写入日志，返回写入的记录数"""
+        directory = ReviewWriteBuffer.get_journal_dir()
+        if not os.path.isdir(directory):
+            return 0
+        recovered = 0
+        for name in sorted(os.listdir(directory)):
+            owner = name.split('.')[0]
+            if not name.endswith('.jsonl') or not owner.isdigit():
+                continue
+            pid = int(owner)
+            if pid == os.getpid():
+                # 当前进程还没有缓冲记录，同名日志来自已退出的、pid 相同的旧进程
+                if ReviewWriteBuffer._ops or ReviewWriteBuffer._journal is not None:
+                    continue
+            elif psutil.pid_exists(pid):
+                continue
+            # 改名认领，避免多个进程同时重放同一个日志
+            claimed = os.path.join(directory, f"{os.getpid()}.{uuid.uuid4().hex}.jsonl")
+            try:
+                os.rename(os.path.join(directory, name), claimed)
+            except OSError:
+                continue
+            recovered += ReviewWriteBuffer._replay(claimed)
+        if recovered:
+            logger.info(f"已从批量写入日志恢复 {recovered} 条审查记录")
+        return recovered
+
+    @staticmethod
+    def _replay(path: str) -> int:
+        ops = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    # 进程结束时写到一半的最后一行
+                    logger.warning(f"跳过批量写入日志 {path} 中不完整的记录")
+        if not ops:
+            os.remove(path)
+            return 0
+        try:
+            ReviewWriteBuffer._ensure_tables()
+            with get_connection(ReviewWriteBuffer.DB_FILE) as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                applied = ReviewWriteBuffer._apply(cursor, ops)
+                conn.commit()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"重放批量写入日志 {path} 失败: {e}")
+            return 0
+        os.remove(path)
+        ReviewWriteBuffer._forget([op['op_id'] for op in ops])
+        return applied
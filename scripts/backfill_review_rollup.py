@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+审查记录按天汇总 - 回填/重建脚本
+从 mr_review_log、push_review_log、version_tracker 重新生成 review_daily_rollup 表。
+新数据库无需执行（汇总表首次创建时会自动回填，之后由触发器实时更新）；
+适用于手工导入或修改了审查记录、或需要校正某段时间汇总数据的场景。
+
+注意：已被清理的审查记录无法恢复，重建范围内这部分的历史汇总会丢失，可用 --since 限定范围
+
+用法:
+    python scripts/backfill_review_rollup.py [--since YYYY-MM-DD]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)  # 切换到项目根目录
+
+from biz.service.review_service import ReviewService
+from biz.utils.review_rollup import ReviewRollup
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回填/重建审查记录按天汇总')
+    parser.add_argument('--since', help='只重建该日期（YYYY-MM-DD，含）之后的汇总，默认全部重建')
+    args = parser.parse_args()
+
+    ReviewService.init_db()
+    start = time.perf_counter()
+    try:
+        count = ReviewRollup.rebuild(args.since)
+    except Exception as e:
+        print(f"❌ 重建汇总失败: {e}")
+        return 1
+    scope = f"{args.since} 之后" if args.since else "全部"
+    print(f"✅ 已重建{scope}的汇总数据，共 {count} 行，耗时 {time.perf_counter() - start:.1f} 秒")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,7 +21,8 @@ def run_rq_worker():
     """运行 RQ 队列工作器"""
     try:
         from redis import Redis
-        from rq import Worker, Queue
+        from rq import Queue
+        from biz.utils.queue import PriorityWorker, get_rq_queue_names
         
         # 获取 Redis 配置
         redis_url = get_env_with_default('REDIS_URL')
@@ -32,14 +33,17 @@ def run_rq_worker():
             redis_port = int(get_env_with_default('REDIS_PORT'))
             redis_conn = Redis(host=redis_host, port=redis_port)
         
-        # 创建队列列表
-        queue_names = ['default', 'gitlab', 'github', 'svn']
+        # 创建队列列表：优先级通道队列在前，旧版本使用的队列放在最后以便处理遗留任务
+        queue_names = get_rq_queue_names() + ['default', 'gitlab', 'github', 'svn']
+        worker_queue = get_env_with_default('WORKER_QUEUE')
+        if worker_queue and worker_queue not in queue_names:
+            queue_names.append(worker_queue)
         queues = [Queue(name, connection=redis_conn) for name in queue_names]
         
         logger.info(f"🚀 启动 RQ Worker，监听队列: {queue_names}")
         
-        # 创建并启动工作器
-        worker = Worker(queues, connection=redis_conn)
+        # 创建并启动工作器，按优先级通道的权重和等待时间选择下一个任务
+        worker = PriorityWorker(queues, connection=redis_conn)
         worker.work()
         
     except ImportError:
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+审查日志查询性能基准测试
+在临时数据库中写入大量审查记录（默认100万条），执行仪表盘和日报使用的查询，
+任一查询耗时超过预算时以非零状态码退出
+
+用法:
+    python scripts/benchmark_review_queries.py [--rows 1000000] [--budget-ms 500] [--keep DB_FILE]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from biz.service.review_service import ReviewService
+from biz.utils.db_files import use_db_file
+from biz.utils.db_pool import get_connection, close_all_connections
+from biz.utils.review_rollup import ReviewRollup
+
+DAY = 24 * 3600
+AUTHORS = [f"dev{i:03d}" for i in range(200)]
+PROJECTS = [f"project-{i:02d}" for i in range(50)]
+
+
+def seed(rows: int, now: int):
+    """按 MR : Push : 版本追踪 = 2 : 3 : 5 的比例写入最近两年的记录"""
+    rng = random.Random(42)
+    span = 730 * DAY
+    counts = {'mr_review_log': rows * 2 // 10, 'push_review_log': rows * 3 // 10}
+    counts['version_tracker'] = rows - counts['mr_review_log'] - counts['push_review_log']
+
+    with get_connection(ReviewService.DB_FILE) as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO mr_review_log (project_name, author, source_branch, target_branch, updated_at,
+                                       commit_messages, score, url, review_result, additions, deletions)
+            VALUES (?, ?, 'feature', 'main', ?, 'commit message', ?, '', 'review result', ?, ?)
+        ''', ((rng.choice(PROJECTS), rng.choice(AUTHORS), now - rng.randrange(span), rng.randint(40, 100),
+               rng.randint(0, 500), rng.randint(0, 200)) for _ in range(counts['mr_review_log'])))
+        cursor.executemany('''
+            INSERT INTO push_review_log (project_name, author, branch, updated_at, commit_messages, score,
+                                         review_result, additions, deletions)
+            VALUES (?, ?, 'main', ?, 'commit message', ?, 'review result', ?, ?)
+        ''', ((rng.choice(PROJECTS), rng.choice(AUTHORS), now - rng.randrange(span), rng.randint(40, 100),
+               rng.randint(0, 500), rng.randint(0, 200)) for _ in range(counts['push_review_log'])))
+        cursor.executemany('''
+            INSERT INTO version_tracker (project_name, version_hash, commit_sha, author, branch, review_type,
+                                         reviewed_at, review_result, score, created_at, commit_message,
+                                         additions_count, deletions_count)
+            VALUES (?, ?, ?, ?, 'trunk', ?, ?, 'review result', ?, ?, 'commit message', ?, ?)
+        ''', ((rng.choice(PROJECTS), f"v{i}", f"r{i}", rng.choice(AUTHORS),
+               rng.choice(['svn', 'svn', 'svn', 'github', 'gitlab']), t, rng.randint(40, 100), t,
+               rng.randint(0, 500), rng.randint(0, 200))
+              for i, t in ((i, now - rng.randrange(span)) for i in range(counts['version_tracker']))))
+        conn.commit()
+    return counts
+
+
+def dashboard_queries(now: int):
+    """仪表盘、日报常用的查询组合"""
+    week_ago = now - 7 * DAY
+    month_ago = now - 30 * DAY
+    return {
+        '日报: 当天的Push记录': lambda: ReviewService.get_push_review_logs(
+            updated_at_gte=now - DAY, updated_at_lte=now),
+        '日报: 当天的MR记录': lambda: ReviewService.get_mr_review_logs(
+            updated_at_gte=now - DAY, updated_at_lte=now),
+        'MR: 单个作者近30天': lambda: ReviewService.get_mr_review_logs(
+            authors=[AUTHORS[0]], updated_at_gte=month_ago),
+        'Push: 单个项目近7天': lambda: ReviewService.get_push_review_logs(
+            project_names=[PROJECTS[0]], updated_at_gte=week_ago),
+        'SVN: 近7天': lambda: ReviewService.get_version_tracking_logs(
+            updated_at_gte=week_ago, review_types=['svn']),
+        '版本追踪: 单个作者近30天': lambda: ReviewService.get_version_tracking_logs(
+            authors=[AUTHORS[1]], updated_at_gte=month_ago),
+        '统计: 各类型数量': ReviewService.get_review_type_stats,
+        '侧边栏: 作者列表': lambda: ReviewService.get_distinct_authors(['mr', 'push', 'svn']),
+        '侧边栏: 项目列表': lambda: ReviewService.get_distinct_projects(['mr', 'push', 'svn']),
+        '侧边栏: 各类型数量': lambda: ReviewService.get_review_counts(['mr', 'push', 'svn', 'github']),
+        '图表: 近30天每日趋势': lambda: ReviewRollup.query(
+            ['day'], review_types=['svn'], start_day=time.strftime('%Y-%m-%d', time.localtime(month_ago))),
+        '图表: 作者排行近30天': lambda: ReviewRollup.query(
+            ['author'], review_types=['push'], start_day=time.strftime('%Y-%m-%d', time.localtime(month_ago))),
+        '列表: 全部类型首页': lambda: ReviewService.get_review_statistics(
+            start_date=month_ago, include_blobs=False, limit=20)['data'],
+        '列表: 单个作者首页': lambda: ReviewService.get_review_statistics(
+            authors=[AUTHORS[2]], include_blobs=False, limit=20)['data'],
+    }
+
+
+def explain(sql: str, params=()):
+    with get_connection(ReviewService.DB_FILE) as conn:
+        return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='审查日志查询性能基准测试')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='写入的记录总数')
+    parser.add_argument('--budget-ms', type=float, default=500, help='单个查询的耗时预算（毫秒）')
+    parser.add_argument('--keep', help='保留测试数据库到指定路径（默认使用临时文件并在结束后删除）')
+    args = parser.parse_args()
+
+    tmp_dir = None if args.keep else tempfile.mkdtemp(prefix='benchmark_')
+    db_file = args.keep or os.path.join(tmp_dir, 'benchmark.db')
+    try:
+        # 所有 DB_FILE 都指向测试数据库，不会在 data/data.db 中创建表或写入数据
+        with use_db_file(db_file):
+            failures = run(db_file, args.rows, args.budget_ms)
+    finally:
+        close_all_connections()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if failures:
+        print(f"\n❌ {len(failures)} 个查询超出 {args.budget_ms}ms 预算: {', '.join(failures)}")
+        return 1
+    print(f"\n✅ 所有查询均在 {args.budget_ms}ms 预算内")
+    return 0
+
+
+def run(db_file: str, rows: int, budget_ms: float):
+    """初始化测试数据库、写入数据并执行查询，返回超出预算的查询名称"""
+    ReviewService.init_db()
+    ReviewService.upgrade_db_add_file_details()
+
+    now = int(time.time())
+    start = time.perf_counter()
+    counts = seed(rows, now)
+    print(f"写入 {sum(counts.values())} 条记录 {counts}，耗时 {time.perf_counter() - start:.1f} 秒")
+    # 写入数据后重新收集统计信息，与线上长期运行的数据库一致
+    ReviewService.create_indexes()
+    with get_connection(db_file) as conn:
+        conn.execute("ANALYZE")
+
+    for detail in explain("SELECT * FROM mr_review_log WHERE author IN (?) AND updated_at >= ? ORDER BY updated_at DESC",
+                          (AUTHORS[0], now)):
+        print(f"  查询计划: {detail}")
+
+    failures = []
+    print(f"\n{'查询':<24}{'行数':>10}{'耗时(ms)':>12}")
+    for name, query in dashboard_queries(now).items():
+        query()  # 预热，排除首次打开数据库和编译语句的开销
+        start = time.perf_counter()
+        result = query()
+        elapsed = (time.perf_counter() - start) * 1000
+        rows_returned = len(result) if hasattr(result, '__len__') else '-'
+        flag = '' if elapsed <= budget_ms else '  超出预算'
+        print(f"{name:<24}{rows_returned:>10}{elapsed:>12.1f}{flag}")
+        if flag:
+            failures.append(name)
+    return failures
+
+
+if __name__ == '__main__':
+    sys.exit(main())
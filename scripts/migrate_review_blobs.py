@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+审查记录大字段迁移脚本
+将 mr_review_log、push_review_log、version_tracker 中内联保存的审查结果和文件详情
+压缩后移入 review_blobs 表，记录中只保留引用。新写入的记录会自动使用压缩存储，
+本脚本只需对升级前的旧数据执行一次，服务运行期间也可以执行。
+
+用法:
+    python scripts/migrate_review_blobs.py [--batch-size 500] [--vacuum]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)  # 切换到项目根目录
+
+from biz.service.review_service import ReviewService
+from biz.utils.blob_store import BlobStore
+from biz.utils.db_pool import get_connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将审查记录中的大字段迁移到压缩存储')
+    parser.add_argument('--batch-size', type=int, default=500, help='每个事务处理的记录数')
+    parser.add_argument('--vacuum', action='store_true', help='迁移后执行 VACUUM 回收磁盘空间（期间会锁定数据库）')
+    args = parser.parse_args()
+
+    ReviewService.init_db()
+    size_before = os.path.getsize(ReviewService.DB_FILE)
+    for table in BlobStore.REF_COLUMNS:
+        start = time.perf_counter()
+        migrated = BlobStore.migrate(table, args.batch_size)
+        print(f"✅ {table}: 迁移 {migrated} 个字段，耗时 {time.perf_counter() - start:.1f} 秒")
+
+    if args.vacuum:
+        print("🔄 正在执行 VACUUM...")
+        with get_connection(ReviewService.DB_FILE) as conn:
+            conn.execute("VACUUM")
+        size_after = os.path.getsize(ReviewService.DB_FILE)
+        print(f"📦 数据库大小: {size_before / 1024 / 1024:.1f}MB -> {size_after / 1024 / 1024:.1f}MB")
+    else:
+        print("💡 迁移释放的空间会被后续写入复用，如需立即缩小数据库文件请加 --vacuum 参数")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+审查历史迁移脚本：SQLite -> MySQL
+将 data/data.db 中的审查记录、版本追踪、SVN 检查点、大字段和汇总表复制到 MYSQL_* 配置的数据库，
+之后设置 DB_BACKEND=mysql，多个 API/工作节点即可共享同一份审查历史。
+
+按主键 INSERT IGNORE，可以重复执行（例如切换前先迁移一次，停机后再补迁增量）。
+汇总表最后整体覆盖：SQLite 中的按天汇总包含已归档记录的历史，不能由触发器重新生成。
+
+用法:
+    python scripts/migrate_sqlite_to_mysql.py [--sqlite data/data.db] [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)  # 切换到项目根目录
+
+from biz.utils import db_mysql
+
+# 审查记录写入时由触发器维护汇总表，因此先复制审查记录，最后覆盖汇总表
+RECORD_TABLES = ['mr_review_log', 'push_review_log', 'version_tracker', 'svn_checkpoints',
+                 'review_blobs', 'review_cache', 'review_cache_stats']
+SUMMARY_TABLES = ['review_summary', 'review_daily_rollup']
+
+
+def copy_table(source: sqlite3.Connection, target, table: str, batch_size: int, replace: bool = False) -> int:
+    columns = [name for name, _ in db_mysql.TABLES[table][0]]
+    existing = {row[1] for row in source.execute(f"PRAGMA table_info({table})")}
+    if not existing:
+        print(f"⏭️  {table}: SQLite 中不存在，跳过")
+        return 0
+    columns = [column for column in columns if column in existing]
+    select = f"SELECT {', '.join(columns)} FROM {table}"
+    insert = (f"{'REPLACE' if replace else 'INSERT IGNORE'} INTO {table} ({', '.join(columns)}) "
+              f"VALUES ({', '.join(['?'] * len(columns))})")
+    copied = 0
+    cursor = source.execute(select)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return copied
+        target.executemany(insert, rows)
+        target.commit()
+        copied += len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将审查历史从 SQLite 迁移到 MySQL')
+    parser.add_argument('--sqlite', default='data/data.db', help='SQLite 数据库文件')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每个事务写入的记录数')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.sqlite):
+        print(f"❌ 找不到 SQLite 数据库: {args.sqlite}")
+        return 1
+    db_mysql.ensure_schema()
+    source = sqlite3.connect(args.sqlite)
+    target = db_mysql.connect()
+    try:
+        for table in RECORD_TABLES:
+            start = time.perf_counter()
+            copied = copy_table(source, target, table, args.batch_size)
+            print(f"✅ {table}: 复制 {copied} 条记录，耗时 {time.perf_counter() - start:.1f} 秒")
+        for table in SUMMARY_TABLES:
+            target.execute(f"DELETE FROM {table}")
+            target.commit()
+            copied = copy_table(source, target, table, args.batch_size, replace=True)
+            print(f"✅ {table}: 覆盖为 {copied} 条汇总")
+    finally:
+        source.close()
+        target.close()
+    print("💡 迁移完成后在各节点设置 DB_BACKEND=mysql 并重启服务")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -115,12 +115,17 @@ class AnalyticsEngine:
                 else:
                     st.write("📅 时间信息: 不可用")
     
-    def show_charts_analysis(self, df: pd.DataFrame, review_type: str):
-        """显示图表分析 - 优化版本"""
+    def show_charts_analysis(self, df: pd.DataFrame, review_type: str, filters: Dict[str, Any] = None):
+        """
+        显示图表分析 - 优化版本
+        传入 filters（authors/projects/date_range/score_range）时，趋势、作者、项目图表从按天汇总表读取
+        """
         if df.empty:
             st.info("暂无数据可分析")
             return
         
+        self._rollup_filters = self._get_rollup_filters(review_type, filters)
+        
         st.markdown("### 📊 数据分析图表")
         
         # 选择图表类型
@@ -138,6 +143,32 @@ class AnalyticsEngine:
         with chart_tabs[3]:
             self._show_detailed_insights(df)
     
+    @staticmethod
+    def _get_rollup_filters(review_type: str, filters: Dict[str, Any] = None):
+        """将页面筛选条件转换为汇总表查询条件；汇总表无法按单条记录的评分筛选，此时返回 None 使用明细数据"""
+        if filters is None:
+            return None
+        score_range = filters.get('score_range')
+        if score_range and tuple(score_range) != (0, 100):
+            return None
+        date_range = filters.get('date_range') or (None, None)
+        return {
+            'review_types': [review_type] if review_type else None,
+            'authors': filters.get('authors') or None,
+            'projects': filters.get('projects') or None,
+            'start_day': date_range[0].strftime('%Y-%m-%d') if len(date_range) > 0 and date_range[0] else None,
+            'end_day': date_range[1].strftime('%Y-%m-%d') if len(date_range) > 1 and date_range[1] else None,
+        }
+
+    def _query_rollup(self, group_by: List[str]):
+        """从按天汇总表聚合数据，不可用时返回 None"""
+        rollup_filters = getattr(self, '_rollup_filters', None)
+        if rollup_filters is None:
+            return None
+        from biz.utils.review_rollup import ReviewRollup
+        result = ReviewRollup.query(group_by, **rollup_filters)
+        return None if result.empty else result
+
     def _show_trend_analysis(self, df: pd.DataFrame):
         """显示趋势分析"""
         st.markdown("#### 📈 时间趋势分析")
@@ -149,8 +180,12 @@ class AnalyticsEngine:
             with trend_col1:
                 # 每日提交趋势
                 df_time = df[df['datetime'].notna()].copy()
-                df_time['date'] = df_time['datetime'].dt.date
-                daily_counts = df_time.groupby('date').size().reset_index(name='count')
+                daily_counts = self._query_rollup(['day'])
+                if daily_counts is not None:
+                    daily_counts = daily_counts.rename(columns={'day': 'date', 'review_count': 'count'})
+                else:
+                    df_time['date'] = df_time['datetime'].dt.date
+                    daily_counts = df_time.groupby('date').size().reset_index(name='count')
                 
                 if len(daily_counts) > 1:
                     fig_daily = px.line(
@@ -201,9 +236,14 @@ class AnalyticsEngine:
         if 'author' in df.columns:
             author_col1, author_col2 = st.columns(2)
             
+            author_rollup = self._query_rollup(['author'])
             with author_col1:
                 # 作者提交数量排行
-                author_counts = df['author'].value_counts().head(15)
+                if author_rollup is not None:
+                    author_counts = author_rollup.set_index('author')['review_count'] \
+                        .sort_values(ascending=False).head(15)
+                else:
+                    author_counts = df['author'].value_counts().head(15)
                 if not author_counts.empty:
                     fig_authors = px.bar(
                         x=author_counts.values,
@@ -225,7 +265,11 @@ class AnalyticsEngine:
             with author_col2:
                 # 作者评分分布（如果有评分数据）
                 if 'score' in df.columns and df['score'].notna().any():
-                    author_scores = df.groupby('author')['score'].mean().sort_values(ascending=False).head(10)
+                    if author_rollup is not None:
+                        author_scores = author_rollup.set_index('author')['avg_score']
+                    else:
+                        author_scores = df.groupby('author')['score'].mean()
+                    author_scores = author_scores.sort_values(ascending=False).head(10)
                     if not author_scores.empty:
                         fig_scores = px.bar(
                             x=author_scores.index,
@@ -258,7 +302,12 @@ class AnalyticsEngine:
             
             with project_col1:
                 # 项目数据分布饼图
-                project_counts = df[project_name].value_counts().head(10)
+                project_rollup = self._query_rollup(['project_name'])
+                if project_rollup is not None:
+                    project_counts = project_rollup.set_index('project_name')['review_count'] \
+                        .sort_values(ascending=False).head(10)
+                else:
+                    project_counts = df[project_name].value_counts().head(10)
                 if not project_counts.empty:
                     fig_projects = px.pie(
                         values=project_counts.values,
@@ -272,9 +321,14 @@ class AnalyticsEngine:
             with project_col2:
                 # 项目活跃度时间线
                 if 'datetime' in df.columns and df['datetime'].notna().any():
-                    project_timeline = df[df['datetime'].notna()].groupby([
-                        df['datetime'].dt.date, project_name
-                    ]).size().reset_index(name='count')
+                    project_timeline = self._query_rollup(['day', 'project_name'])
+                    if project_timeline is not None:
+                        project_timeline = project_timeline.rename(columns={
+                            'day': 'datetime', 'project_name': project_name, 'review_count': 'count'})
+                    else:
+                        project_timeline = df[df['datetime'].notna()].groupby([
+                            df['datetime'].dt.date, project_name
+                        ]).size().reset_index(name='count')
                     
                     if len(project_timeline) > 0:
                         # 只显示top 5项目的时间线
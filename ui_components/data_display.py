@@ -41,9 +41,14 @@ class DataDisplayManager:
             # 显示查询摘要
             self.ui.show_query_summary(review_type, authors, projects, date_range, score_range)
             
+            # 超过保留天数的记录已归档，由用户选择是否一并读取
+            include_archive = self._show_archive_option(review_type)
+            
             # 获取和预处理数据
             with self.ui.show_loading_spinner("正在获取数据..."):
-                df = self._get_and_preprocess_data(review_service, review_type, authors, projects, date_range, score_range)
+                df = self._get_and_preprocess_data(review_service, review_type, authors, projects, date_range,
+                                                   score_range, include_archive)
+            query = self._build_query_filters(review_type, authors, projects, date_range, score_range)
             
             if df is None or df.empty:
                 self.ui.show_no_data_help(review_type)
@@ -52,37 +57,65 @@ class DataDisplayManager:
             # 创建主要功能标签页
             main_tabs = st.tabs(["📋 详细数据", "📊 统计分析", "📈 图表分析", "📥 数据导出"])
             with main_tabs[0]:
-                self._show_enhanced_data_table(df, review_type)
+                # 评分筛选需要先从审查结果中补全缺失的评分，无法在数据库中分页，改用已筛选的 df
+                paged_query = None if include_archive or query['score_range'] else query
+                self._show_enhanced_data_table(df, review_type, paged_query)
 
             with main_tabs[1]:
                 self.analytics.show_statistics_panel(df, review_type)
             
             with main_tabs[2]:
-                self.analytics.show_charts_analysis(df, review_type)
+                self.analytics.show_charts_analysis(df, review_type, filters={
+                    'authors': authors, 'projects': projects, 'date_range': date_range, 'score_range': score_range})
             
             with main_tabs[3]:
-                self.exporter.show_export_panel(df, review_type)
+                self.exporter.show_export_panel(df, review_type, prepare=self._with_review_details)
                 
         except Exception as e:
             logger.error(f"显示{review_type}数据时发生错误: {str(e)}")
             self.ui.show_error_message(f"数据显示出现错误: {str(e)}")
             st.exception(e)
     
-    def _get_and_preprocess_data(self, review_service, review_type, authors, projects, date_range, score_range):
+    @staticmethod
+    def _show_archive_option(review_type: str) -> bool:
+        """存在归档文件时显示“包含已归档记录”选项"""
+        from biz.utils.review_archive import ReviewArchive
+        if review_type == 'mr':
+            tables = ['mr_review_log']
+        elif review_type == 'push':
+            tables = ['push_review_log']
+        else:
+            tables = ['version_tracker']
+        if not any(ReviewArchive.list_months(table) for table in tables):
+            return False
+        return st.checkbox("包含已归档的历史记录（读取归档文件，速度较慢）", value=False,
+                           key=f"include_archive_{review_type}")
+
+    @staticmethod
+    def _build_query_filters(review_type, authors, projects, date_range, score_range) -> Dict[str, Any]:
+        """将页面筛选条件转换为 ReviewService.get_review_statistics 的参数"""
+        start_date = end_date = None
+        if date_range:
+            start_date = date_range[0].strftime('%Y-%m-%d') if date_range[0] else None
+            end_date = date_range[1].strftime('%Y-%m-%d') if date_range[1] else None
+        return {
+            'review_type': review_type,
+            'start_date': start_date,
+            'end_date': end_date,
+            'authors': authors or None,
+            'projects': projects or None,
+            'score_range': score_range if score_range and tuple(score_range) != (0, 100) else None,
+        }
+
+    def _get_and_preprocess_data(self, review_service, review_type, authors, projects, date_range, score_range,
+                                 include_archive: bool = False):
         """获取和预处理数据"""
         try:
-            # 解析日期范围
-            start_date = end_date = None
-            if date_range:
-                start_date = date_range[0].strftime('%Y-%m-%d') if date_range[0] else None
-                end_date = date_range[1].strftime('%Y-%m-%d') if date_range[1] else None
-            
-            # 获取数据
-            result = review_service.get_review_statistics(
-                review_type=review_type,
-                start_date=start_date,
-                end_date=end_date
-            )
+            query = self._build_query_filters(review_type, authors, projects, date_range, score_range)
+            
+            # 获取数据：筛选条件在数据库中执行，统计和图表只需要摘要字段；
+            # 审查结果等大字段在分页显示、导出和补全评分时再按 id 读取
+            result = review_service.get_review_statistics(include_blobs=False, **query)
             
             # 处理响应
             if isinstance(result, dict):
@@ -93,6 +126,9 @@ class DataDisplayManager:
             else:
                 data = result
             
+            if include_archive:
+                data = list(data or []) + review_service.get_archived_statistics(**query)
+            
             if not data:
                 return pd.DataFrame()
             
@@ -105,6 +141,11 @@ class DataDisplayManager:
                 logger.warning(f"未知数据类型: {type(data)}")
                 return pd.DataFrame()
             
+            # 评分缺失的记录需要从审查结果中提取，只为这些记录读取审查结果
+            if 'score' in df.columns:
+                score = pd.to_numeric(df['score'], errors='coerce')
+                df = self._with_review_details(df, score.isna() | (score <= 0), columns=('review_result',))
+            
             # 预处理数据
             df = self.processor.preprocess_dataframe(df)
             
@@ -118,17 +159,24 @@ class DataDisplayManager:
             self.ui.show_error_message(f"获取数据失败: {str(e)}")
             return None
     
-    def _show_enhanced_data_table(self, df: pd.DataFrame, review_type: str):
-        """显示增强的数据表"""
+    def _show_enhanced_data_table(self, df: pd.DataFrame, review_type: str, query: Optional[Dict[str, Any]] = None):
+        """
+        显示增强的数据表
+        :param query: 数据库筛选条件；按时间倒序浏览且未搜索时，每页通过游标分页从数据库读取（含审查结果）
+        """
         st.markdown("### 📋 数据详情")
         
         # 创建控制面板
         controls = self.ui.create_data_table_controls()
         
+        if query is not None and not controls['search_term'] and controls['sort_by'] == "时间倒序":
+            self._show_paged_data_table(query, review_type, controls['page_size'])
+            return
+        
         # 应用搜索筛选
         display_df = df.copy()
         if controls['search_term']:
-            mask = self._apply_search_filter(display_df, controls['search_term'])
+            mask = self._apply_search_filter(display_df, controls['search_term'], review_type)
             display_df = display_df[mask]
         
         # 应用排序
@@ -158,19 +206,106 @@ class DataDisplayManager:
         # 当前页数据
         start_idx = (current_page - 1) * page_size
         end_idx = min(start_idx + page_size, total_rows)
-        page_data = display_df.iloc[start_idx:end_idx]
+        # 当前页补充审查结果，详情和卡片摘要不必逐条查询
+        page_data = self._with_review_details(display_df.iloc[start_idx:end_idx])
         
         st.markdown("---")
         # 显示数据卡片
         self._display_data_cards(page_data, review_type, start_idx)
     
-    def _apply_search_filter(self, df: pd.DataFrame, search_term: str) -> pd.Series:
-        """应用搜索筛选"""
+    def _show_paged_data_table(self, query: Dict[str, Any], review_type: str, page_size: int):
+        """按 (时间, 类型, id) 游标分页从数据库读取当前页，已访问页的游标缓存在会话中，跳页时退回偏移量分页"""
+        from biz.service.review_service import ReviewService
+        state_key = f"review_page_cursors_{review_type}_{page_size}_{hash(repr(sorted(query.items())))}"
+        cursors = st.session_state.setdefault(state_key, {1: None})
+        
+        total_rows = ReviewService.get_review_statistics(include_blobs=False, limit=1, **query).get('total_count', 0)
+        if not total_rows:
+            self.ui.show_warning_message("没有找到匹配的数据记录")
+            return
+        total_pages = (total_rows - 1) // page_size + 1
+        
+        page_col1, page_col2, page_col3 = st.columns([1, 2, 1])
+        with page_col2:
+            current_page = st.number_input(
+                f"页码 (共 {total_pages} 页，{total_rows} 条记录)",
+                min_value=1,
+                max_value=total_pages,
+                value=1,
+                step=1
+            )
+        
+        start_idx = (current_page - 1) * page_size
+        cursor = cursors.get(current_page)
+        result = ReviewService.get_review_statistics(
+            include_blobs=True, limit=page_size, cursor=cursor, offset=0 if cursor else start_idx, **query)
+        if result.get('next_cursor'):
+            cursors[current_page + 1] = result['next_cursor']
+        page_data = pd.DataFrame(result.get('data') or [])
+        if page_data.empty:
+            self.ui.show_warning_message("没有找到匹配的数据记录")
+            return
+        page_data = self.processor.preprocess_dataframe(page_data)
+        
+        st.markdown("---")
+        self._display_data_cards(page_data, review_type, start_idx)
+    
+    @staticmethod
+    def _with_review_details(df: pd.DataFrame, rows: Optional[pd.Series] = None,
+                             columns: Tuple[str, ...] = ('review_result', 'file_details', 'file_paths')) -> pd.DataFrame:
+        """
+        为列表数据补充审查结果等大字段（列表查询不读取这些字段），已有值的记录和归档记录不再读取
+        :param rows: 需要补充的记录（布尔序列），默认全部
+        """
+        if df.empty or not {'id', 'type'}.issubset(df.columns):
+            return df
+        from biz.service.review_service import ReviewService
+        needed = pd.Series(True, index=df.index) if rows is None else rows.reindex(df.index, fill_value=False)
+        needed &= df['id'].notna()
+        present = [column for column in columns if column in df.columns]
+        if len(present) == len(columns):
+            needed &= df[present].isna().any(axis=1)
+        if 'archived' in df.columns:
+            needed &= df['archived'] != True
+        if not needed.any():
+            return df
+        keys = [(review_type, int(review_id)) for review_type, review_id in zip(df.loc[needed, 'type'], df.loc[needed, 'id'])]
+        details = ReviewService.get_review_details(keys)
+        df = df.copy()
+        for column in columns:
+            if column not in df.columns:
+                df[column] = None
+            df[column] = df[column].astype(object)
+            df.loc[needed, column] = [details.get(key, {}).get(column) for key in keys]
+        return df
+
+    # 全文索引覆盖的字段，索引可用时不再在内存中逐行匹配
+    _INDEXED_SEARCH_COLUMNS = ('review_result', 'commit_messages', 'file_details', 'file_paths')
+
+    def _apply_search_filter(self, df: pd.DataFrame, search_term: str, review_type: str = None) -> pd.Series:
+        """应用搜索筛选：审查结果、提交说明和文件路径通过全文索引匹配，作者、项目等其他字段在内存中匹配"""
+        from biz.service.review_service import ReviewService
         text_columns = df.select_dtypes(include=['object']).columns
         mask = pd.Series(False, index=df.index)
         
+        indexed = pd.Series(False, index=df.index)
+        if {'id', 'type'}.issubset(df.columns):
+            result = ReviewService.search(search_term, review_type=review_type, limit=None, highlight=None)
+            if result.get('success'):
+                hits = {(record['type'], record['id']) for record in result['data']}
+                mask |= pd.Series([(t, i) in hits for t, i in zip(df['type'], df['id'])], index=df.index)
+                # 已归档的记录不在索引中，仍逐列匹配
+                indexed = df['archived'] != True if 'archived' in df.columns else ~indexed
+        
         for col in text_columns:
-            mask |= df[col].astype(str).str.contains(search_term, case=False, na=False)
+            if col in self._INDEXED_SEARCH_COLUMNS:
+                candidates = df.index[~indexed]
+                if len(candidates) == 0:
+                    continue
+                mask.loc[candidates] |= df.loc[candidates, col].astype(str).str.contains(
+                    search_term, case=False, na=False).astype(bool)
+            else:
+                mask |= df[col].astype(str).str.contains(search_term, case=False, na=False)
         
         return mask
     
@@ -202,10 +337,25 @@ class DataDisplayManager:
             if card_state == "expanded":
                 with st.container():
                     st.markdown("---")
-                    self.ui.show_detail_modal(row, review_type)
+                    self.ui.show_detail_modal(self._load_detail(row), review_type)
                     st.markdown("---")
 
 
+    @staticmethod
+    def _load_detail(row: pd.Series) -> pd.Series:
+        """补充列表中未读取的审查结果、文件详情等字段"""
+        # 归档记录自带审查结果
+        if pd.notna(row.get('review_result')) or pd.isna(row.get('id')) or row.get('archived') == True:
+            return row
+        from biz.service.review_service import ReviewService
+        detail = ReviewService.get_review_detail(row.get('type'), int(row['id']))
+        if not detail:
+            return row
+        row = row.copy()
+        for key in ('review_result', 'file_details', 'file_paths'):
+            row[key] = detail.get(key)
+        return row
+
 # 创建全局数据显示管理器实例
 display_manager = DataDisplayManager()
 
@@ -6,7 +6,7 @@ import pandas as pd
 from io import BytesIO, StringIO
 import json
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -227,8 +227,12 @@ class DataExporter:
         
         return summary
     
-    def show_export_panel(self, df: pd.DataFrame, review_type: str):
-        """显示导出面板"""
+    def show_export_panel(self, df: pd.DataFrame, review_type: str,
+                          prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None):
+        """
+        显示导出面板
+        :param prepare: 导出前对数据的补充处理，如列表数据不含审查结果时在导出时再读取
+        """
         if df.empty:
             st.info("📥 暂无数据可导出")
             return
@@ -255,7 +259,9 @@ class DataExporter:
             st.write("") # 占位符
             st.write("") # 占位符
             if st.button("🚀 开始导出", type="primary"):
-                self.export_data(df, format_type, review_type, filename_prefix)
+                with st.spinner("正在准备导出数据..."):
+                    export_df = prepare(df) if prepare else df
+                self.export_data(export_df, format_type, review_type, filename_prefix)
         
         # 显示导出信息
         st.markdown("---")
@@ -660,9 +660,10 @@ def env_management_page():
                     log_level = st.selectbox("日志级别", 
                                            ["DEBUG", "INFO", "WARNING", "ERROR"],
                                            index=["DEBUG", "INFO", "WARNING", "ERROR"].index(env_config.get("LOG_LEVEL", "DEBUG")))
+                    queue_driver_options = ["async", "memory", "pool"]
                     queue_driver = st.selectbox("队列驱动", 
-                                              ["async", "memory"],
-                                              index=0 if env_config.get("QUEUE_DRIVER", "async") == "async" else 1)
+                                              queue_driver_options,
+                                              index=queue_driver_options.index(env_config.get("QUEUE_DRIVER", "async")) if env_config.get("QUEUE_DRIVER", "async") in queue_driver_options else 0)
                     log_file = st.text_input("日志文件路径", value=env_config.get("LOG_FILE", "log/app.log"))
                 
                 with col4:
@@ -1214,7 +1215,7 @@ def env_management_page():
                                    "REVIEW_STYLE", "REVIEW_MAX_TOKENS", "SUPPORTED_EXTENSIONS"],
                     "🔀 平台开关": ["SVN_CHECK_ENABLED", "GITLAB_ENABLED", "GITHUB_ENABLED"],
                     "📋 版本追踪配置": ["VERSION_TRACKING_ENABLED", "REUSE_PREVIOUS_REVIEW_RESULT", "VERSION_TRACKING_RETENTION_DAYS"],
-                    "🏠 系统配置": ["API_PORT", "API_URL", "UI_PORT", "UI_URL", "TZ", "LOG_LEVEL", "LOG_FILE", "LOG_MAX_BYTES", "LOG_BACKUP_COUNT", "QUEUE_DRIVER"],
+                    "🏠 系统配置": ["API_PORT", "API_URL", "UI_PORT", "UI_URL", "TZ", "LOG_LEVEL", "LOG_FILE", "LOG_MAX_BYTES", "LOG_BACKUP_COUNT", "QUEUE_DRIVER", "QUEUE_POOL_WORKERS", "QUEUE_POOL_MAX_SIZE", "QUEUE_POOL_DRAIN_TIMEOUT", "QUEUE_PRIORITY_WEIGHTS", "QUEUE_PRIORITY_MAX_WAIT"],
                     "⚡ Redis配置": ["REDIS_HOST", "REDIS_PORT"],
                     "📊 报告配置": ["REPORT_CRONTAB_EXPRESSION"],
                     "🔗 GitLab配置": ["GITLAB_URL", "GITLAB_ACCESS_TOKEN", "PUSH_REVIEW_ENABLED", "MERGE_REVIEW_ONLY_PROTECTED_BRANCHES_ENABLED"],
@@ -9,43 +9,19 @@ from biz.service.review_service import ReviewService
 
 def get_available_authors(review_types):
     """获取可用的作者列表"""
-    authors = set()
     try:
-        review_service = ReviewService()
-        for review_type in review_types:
-            result = review_service.get_review_statistics(
-                review_type=review_type,
-                start_date=None,
-                end_date=None
-            )
-            if result.get('success') and result.get('data'):
-                for record in result['data']:
-                    if record.get('author'):
-                        authors.add(record['author'])
+        return ReviewService.get_distinct_authors(review_types)
     except Exception as e:
         st.error(f"获取作者列表失败: {e}")
-    
-    return sorted(list(authors))
+        return []
 
 def get_available_projects(review_types):
     """获取可用的项目列表"""
-    projects = set()
     try:
-        review_service = ReviewService()
-        for review_type in review_types:
-            result = review_service.get_review_statistics(
-                review_type=review_type,
-                start_date=None,
-                end_date=None
-            )
-            if result.get('success') and result.get('data'):
-                for record in result['data']:
-                    if record.get('project'):
-                        projects.add(record['project'])
+        return ReviewService.get_distinct_projects(review_types)
     except Exception as e:
         st.error(f"获取项目列表失败: {e}")
-    
-    return sorted(list(projects))
+        return []
 
 def format_timestamp(timestamp):
     """格式化时间戳"""
@@ -75,39 +51,16 @@ def get_platform_status(config_manager):
 
 def get_review_stats(platforms):
     """获取审查统计数据"""
-    review_stats = {}
-    review_service = ReviewService()
-    
-    # 获取各类型的统计数据
+    review_types = []
     if platforms.get('gitlab'):
-        for review_type in ['mr', 'push']:
-            try:
-                result = review_service.get_review_statistics(review_type=review_type)
-                if result.get('success') and result.get('data'):
-                    review_stats[f'{review_type}_count'] = len(result['data'])
-                else:
-                    review_stats[f'{review_type}_count'] = 0
-            except:
-                review_stats[f'{review_type}_count'] = 0
-    
+        review_types.extend(['mr', 'push'])
     if platforms.get('svn'):
-        try:
-            result = review_service.get_review_statistics(review_type='svn')
-            if result.get('success') and result.get('data'):
-                review_stats['svn_count'] = len(result['data'])
-            else:
-                review_stats['svn_count'] = 0
-        except:
-            review_stats['svn_count'] = 0
-    
+        review_types.append('svn')
     if platforms.get('github'):
-        try:
-            result = review_service.get_review_statistics(review_type='github')
-            if result.get('success') and result.get('data'):
-                review_stats['github_count'] = len(result['data'])
-            else:
-                review_stats['github_count'] = 0
-        except:
-            review_stats['github_count'] = 0
-    
-    return review_stats
+        review_types.append('github')
+    if not review_types:
+        return {}
+
+    # 各类型数量由汇总表一次查询得到
+    counts = ReviewService.get_review_counts(review_types)
+    return {f'{review_type}_count': counts.get(review_type, 0) for review_type in review_types}